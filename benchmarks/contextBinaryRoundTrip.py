@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+# Checks the binary context files of `--save-context-binary` and `--load-context-binary`. Each frontend is run twice on
+# the synthetic inputs of `syntheticInputs.py`, once saving a binary context file and once loading it back with the
+# same arguments, and every generated file (assembly, migrated functions, csv context and function info) is compared.
+# The saved file is also fully loaded with `Context.loadContextFromBinaryFile` and saved again, which must produce the
+# same file, including its relocation overrides and $gp accesses.
+#
+# Exits with 1 if any file differs.
+#
+# Usage: python3 benchmarks/contextBinaryRoundTrip.py [--functions N] [--seed N]
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+repoPath = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repoPath))
+
+from spimdisasm import common
+
+import syntheticInputs
+
+
+
+def runFrontend(args: list[str]) -> None:
+    # Each run gets its own interpreter, so nothing is shared between them
+    subprocess.run([sys.executable, "-m", "spimdisasm", *args, "-q"], check=True, cwd=repoPath, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def compareDirectories(expected: Path, actual: Path) -> list[str]:
+    "Returns the paths, relative to the directories, of the files which differ or only exist in one of them"
+    expectedFiles = {path.relative_to(expected) for path in expected.rglob("*") if path.is_file()}
+    actualFiles = {path.relative_to(actual) for path in actual.rglob("*") if path.is_file()}
+
+    differences: list[str] = []
+    for path in sorted(expectedFiles | actualFiles):
+        if path not in expectedFiles or path not in actualFiles:
+            differences.append(f"{path} (only in one run)")
+        elif (expected / path).read_bytes() != (actual / path).read_bytes():
+            differences.append(str(path))
+    return differences
+
+def checkRoundTrip(name: str, frontendArgs: list[str], workdir: Path) -> bool:
+    def outputArgs(outdir: Path) -> list[str]:
+        return [str(outdir / "asm"), "--split-functions", str(outdir / "functions"), "--save-context", str(outdir / "context.csv"), "--function-info", str(outdir / "function_info.csv")]
+
+    binaryContextPath = workdir / f"{name}.bin"
+    saving = workdir / name / "saving"
+    loading = workdir / name / "loading"
+    runFrontend([*frontendArgs[:2], *outputArgs(saving), *frontendArgs[2:], "--save-context-binary", str(binaryContextPath)])
+    runFrontend([*frontendArgs[:2], *outputArgs(loading), *frontendArgs[2:], "--load-context-binary", str(binaryContextPath)])
+
+    differences = compareDirectories(saving, loading)
+
+    context = common.Context()
+    context.loadContextFromBinaryFile(binaryContextPath)
+    resavedPath = workdir / f"{name}.resaved.bin"
+    context.saveContextToBinaryFile(resavedPath)
+    if resavedPath.read_bytes() != binaryContextPath.read_bytes():
+        differences.append(f"{binaryContextPath.name} (saved again after fully loading it)")
+
+    if len(differences) == 0:
+        print(f"{name}: OK ({len(context.globalRelocationOverrides)} relocation overrides)")
+        return True
+
+    print(f"{name}: {len(differences)} files differ")
+    for path in differences:
+        print(f"    {path}")
+    return False
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Checks that loading a binary context file doesn't change the disassembly")
+    parser.add_argument("--functions", help="Amount of functions of the generated rom and elf. Defaults to 1500", type=int, default=1500)
+    parser.add_argument("--seed", help="Seed used to generate the inputs. Defaults to 0", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="spimdisasm_context_binary_") as tempdir:
+        workdir = Path(tempdir)
+
+        rom = syntheticInputs.buildRom(syntheticInputs.generateImage(args.seed, args.functions))
+        romPath = workdir / "rom.bin"
+        romPath.write_bytes(rom.data)
+        splitsPath = workdir / "rom_splits.csv"
+        splitsPath.write_text("".join(",".join(row) + "\n" for row in rom.splits))
+
+        elfPath = workdir / "object.o"
+        elfPath.write_bytes(syntheticInputs.buildElf(syntheticInputs.generateImage(args.seed + 1, args.functions)))
+
+        ok = checkRoundTrip("singleFileDisasm", ["singleFileDisasm", str(romPath), "--file-splits", str(splitsPath), "--vram", f"{rom.vram:X}"], workdir)
+        ok = checkRoundTrip("elfObjDisasm", ["elfObjDisasm", str(elfPath)], workdir) and ok
+
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+# Reports how many bytes each `common.ContextSymbol` takes, optionally
+# comparing it against the `ContextSymbol` of another spimdisasm source tree,
+# for example a checkout of a previous release.
+#
+# Usage: python3 benchmarks/contextSymbolMemoryReport.py [--size N] [--baseline-tree PATH]
+#
+# A baseline tree can be made with `git worktree add /tmp/spimdisasm-base <commit>`.
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+
+def makeBareSymbols(cls: Callable[[int], Any], size: int) -> list[Any]:
+    return [cls(0x80000000 + i * 4) for i in range(size)]
+
+def makeBranchLabels(cls: Callable[[int], Any], size: int) -> list[Any]:
+    # Branch labels get a referencing function but never use the other containers
+    func = cls(0x80000000)
+    symbols = []
+    for i in range(size):
+        sym = cls(0x80000004 + i * 4)
+        sym.referenceFunctions.add(func)
+        symbols.append(sym)
+    return symbols
+
+
+scenarios: dict[str, Callable[[Callable[[int], Any], int], list[Any]]] = {
+    "bare symbols": makeBareSymbols,
+    "branch labels": makeBranchLabels,
+}
+
+def measure(func: Callable[[Callable[[int], Any], int], list[Any]], cls: Callable[[int], Any], size: int) -> float:
+    tracemalloc.start()
+    symbols = func(cls, size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del symbols
+    return current / size
+
+def measureTree(tree: Path, size: int) -> dict[str, float]:
+    "Measures every scenario using the `ContextSymbol` of the given source tree"
+    sys.path.insert(0, str(tree))
+    from spimdisasm.common import ContextSymbol
+
+    return {name: measure(func, ContextSymbol, size) for name, func in scenarios.items()}
+
+def measureTreeInSubprocess(tree: Path, size: int) -> dict[str, float]:
+    # Each tree is imported on its own interpreter, since both are the `spimdisasm` package
+    output = subprocess.run(
+        [sys.executable, __file__, "--size", str(size), "--tree", str(tree), "--json"],
+        check=True, stdout=subprocess.PIPE, text=True,
+    ).stdout
+    result: dict[str, float] = json.loads(output)
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reports the memory used per ContextSymbol")
+    parser.add_argument("--size", help="Amount of symbols to allocate per scenario. Defaults to 100000", type=int, default=100000)
+    parser.add_argument("--tree", help="Source tree to measure. Defaults to the tree containing this script", default=str(Path(__file__).resolve().parent.parent))
+    parser.add_argument("--baseline-tree", help="Source tree to compare against, for example a checkout of a previous release", metavar="PATH")
+    parser.add_argument("--json", help="Print the measurements of --tree as json instead of a table", action="store_true")
+    args = parser.parse_args()
+
+    if args.json:
+        print(json.dumps(measureTree(Path(args.tree), args.size)))
+        return 0
+
+    current = measureTreeInSubprocess(Path(args.tree), args.size)
+    if args.baseline_tree is None:
+        print(f"{'scenario':<16} {'B/sym':>10}")
+        for name, after in current.items():
+            print(f"{name:<16} {after:>10.1f}")
+        return 0
+
+    baseline = measureTreeInSubprocess(Path(args.baseline_tree), args.size)
+    print(f"{'scenario':<16} {'baseline (B/sym)':>17} {'current (B/sym)':>16} {'saved':>7}")
+    for name, after in current.items():
+        before = baseline[name]
+        print(f"{name:<16} {before:>17.1f} {after:>16.1f} {1 - after/before:>6.1%}")
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+# Reproducible benchmark suite, running the frontends and the main stages of the disassembler on synthetic inputs
+# generated by `syntheticInputs.py`. Everything runs offline and the inputs only depend on `--seed` and `--scale`.
+#
+# Reports the best time of each benchmark, its throughput and the peak memory allocated while it runs. The results can
+# be saved as a baseline and later runs compared against it, exiting with 1 if any benchmark got slower or used more
+# memory than the given tolerance.
+#
+# A baseline of an older release can be made by copying this script and `syntheticInputs.py` into a checkout of it,
+# for example one made with `git worktree add /tmp/spimdisasm-base <tag>`, and running it from there.
+#
+# Usage: python3 benchmarks/disasmBenchmark.py [--scale N] [--repeat N] [--seed N] [--only NAME [NAME ...]]
+#                                              [--save-baseline PATH] [--baseline PATH] [--tolerance PERCENT]
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import dataclasses
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Iterator, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import spimdisasm
+from spimdisasm import common, mips, singleFileDisasm, elfObjDisasm
+
+import syntheticInputs
+
+
+@dataclasses.dataclass
+class Inputs:
+    romImage: syntheticInputs.SyntheticImage
+    rom: syntheticInputs.SyntheticRom
+    romPath: Path
+    splitsPath: Path
+    elfImage: syntheticInputs.SyntheticImage
+    elfPath: Path
+    overlaysRom: syntheticInputs.SyntheticRom
+    overlays: list[syntheticInputs.SyntheticOverlay]
+    sortedDictKeys: list[int]
+    workdir: Path
+
+def generateInputs(seed: int, scale: int, workdir: Path) -> Inputs:
+    romImage = syntheticInputs.generateImage(seed, 1500 * scale)
+    rom = syntheticInputs.buildRom(romImage)
+    romPath = workdir / "rom.bin"
+    romPath.write_bytes(rom.data)
+    splitsPath = workdir / "rom_splits.csv"
+    splitsPath.write_text("".join(",".join(row) + "\n" for row in rom.splits))
+
+    elfImage = syntheticInputs.generateImage(seed + 1, 500 * scale)
+    elfPath = workdir / "object.o"
+    elfPath.write_bytes(syntheticInputs.buildElf(elfImage))
+
+    overlaysRom, overlays = syntheticInputs.buildOverlaysRom(seed + 2, 200, 32 * scale, 40)
+
+    rng = random.Random(seed)
+    count = 50000 * scale
+    sortedDictKeys = rng.sample(range(0x80000000, 0x80000000 + count * 16, 4), count)
+
+    return Inputs(romImage, rom, romPath, splitsPath, elfImage, elfPath, overlaysRom, overlays, sortedDictKeys, workdir)
+
+
+def getRomSections(inputs: Inputs, context: common.Context) -> dict[str, tuple[int, int, int]]:
+    "Returns the vrom start, vrom end and vram of each section of the rom, and sets the context ranges for it"
+    image = inputs.romImage
+    vram = inputs.rom.vram
+    sections: dict[str, tuple[int, int, int]] = dict()
+    offset = 0
+    for name in (".text", ".data", ".rodata"):
+        size = image.getSectionSize(name)
+        sections[name] = (offset, offset + size, vram + offset)
+        offset += size
+    context.changeGlobalSegmentRanges(0, offset, vram, vram + offset + image.bssSize)
+    return sections
+
+def analyzedRomText(inputs: Inputs) -> mips.sections.SectionText:
+    context = common.Context()
+    vromStart, vromEnd, vram = getRomSections(inputs, context)[".text"]
+    section = mips.sections.SectionText(context, vromStart, vromEnd, vram, "text", inputs.rom.data, 0, None)
+    section.analyze()
+    return section
+
+
+# Each benchmark prepares everything it needs and returns the amount of processed items and the function to time.
+# Preparing is not timed and is performed again before each repetition, since most stages mutate the context.
+PreparedBenchmark = Tuple[int, Callable[[], Any]]
+
+def prepareSingleFileDisasm(inputs: Inputs) -> PreparedBenchmark:
+    outputPath = inputs.workdir / "singleFileDisasm"
+    args = singleFileDisasm.getArgsParser().parse_args([str(inputs.romPath), str(outputPath), "--file-splits", str(inputs.splitsPath), "--vram", f"{inputs.rom.vram:X}", "--split-functions", str(outputPath / "functions"), "-q"])
+    return inputs.rom.wordsCount, lambda: singleFileDisasm.processArguments(args)
+
+def prepareElfObjDisasm(inputs: Inputs) -> PreparedBenchmark:
+    outputPath = inputs.workdir / "elfObjDisasm"
+    args = elfObjDisasm.getArgsParser().parse_args([str(inputs.elfPath), str(outputPath), "--split-functions", str(outputPath / "functions"), "-q"])
+    return inputs.elfImage.wordsCount(), lambda: elfObjDisasm.processArguments(args)
+
+def prepareTextAnalyze(inputs: Inputs) -> PreparedBenchmark:
+    context = common.Context()
+    vromStart, vromEnd, vram = getRomSections(inputs, context)[".text"]
+    section = mips.sections.SectionText(context, vromStart, vromEnd, vram, "text", inputs.rom.data, 0, None)
+    return (vromEnd - vromStart) // 4, section.analyze
+
+def prepareDataAnalyze(inputs: Inputs) -> PreparedBenchmark:
+    context = common.Context()
+    vromStart, vromEnd, vram = getRomSections(inputs, context)[".data"]
+    section = mips.sections.SectionData(context, vromStart, vromEnd, vram, "data", inputs.rom.data, 0, None)
+    return (vromEnd - vromStart) // 4, section.analyze
+
+def prepareTextEmit(inputs: Inputs) -> PreparedBenchmark:
+    section = analyzedRomText(inputs)
+    return section.sizew, lambda: section.disassembleToFile(io.StringIO())
+
+def prepareDataEmit(inputs: Inputs) -> PreparedBenchmark:
+    context = common.Context()
+    sections = getRomSections(inputs, context)
+    text = mips.sections.SectionText(context, *sections[".text"], "text", inputs.rom.data, 0, None)
+    data = mips.sections.SectionData(context, *sections[".data"], "data", inputs.rom.data, 0, None)
+    rodata = mips.sections.SectionRodata(context, *sections[".rodata"], "rodata", inputs.rom.data, 0, None)
+    for section in (text, data, rodata):
+        section.analyze()
+
+    def emit() -> None:
+        data.disassembleToFile(io.StringIO())
+        rodata.disassembleToFile(io.StringIO())
+    return data.sizew + rodata.sizew, emit
+
+def prepareOverlays(inputs: Inputs) -> PreparedBenchmark:
+    context = common.Context()
+    mainSize = inputs.overlays[0].vromStart if len(inputs.overlays) > 0 else len(inputs.overlaysRom.data)
+    context.changeGlobalSegmentRanges(0, mainSize, inputs.overlaysRom.vram, inputs.overlaysRom.vram + mainSize)
+
+    sections: list[mips.sections.SectionBase] = []
+    for overlay in inputs.overlays:
+        offsets = overlay.sectionOffsets
+        context.addOverlaySegment("ovl", overlay.vromStart, overlay.vromEnd, overlay.vram, overlay.vram + offsets[".bss"])
+        for name, sectionClass in ((".text", mips.sections.SectionText), (".data", mips.sections.SectionData), (".rodata", mips.sections.SectionRodata)):
+            end = {".text": ".data", ".data": ".rodata", ".rodata": ".bss"}[name]
+            vromStart = overlay.vromStart + offsets[name]
+            vromEnd = overlay.vromStart + offsets[end]
+            sections.append(sectionClass(context, vromStart, vromEnd, overlay.vram + offsets[name], name[1:], inputs.overlaysRom.data, overlay.vromStart, "ovl"))
+
+    def analyzeAndEmit() -> None:
+        for section in sections:
+            section.analyze()
+        for section in sections:
+            section.disassembleToFile(io.StringIO())
+    return sum(section.sizew for section in sections), analyzeAndEmit
+
+def prepareSortedDict(inputs: Inputs) -> PreparedBenchmark:
+    keys = inputs.sortedDictKeys
+
+    def run() -> None:
+        d: common.SortedDict[int] = common.SortedDict()
+        for key in keys:
+            d[key] = key
+        for key in keys:
+            d.getKeyRight(key + 3)
+        for key in keys[::64]:
+            for _ in d.getRange(key, key + 0x400):
+                pass
+        for key in keys[::2]:
+            del d[key]
+    return len(keys), run
+
+
+@dataclasses.dataclass
+class Benchmark:
+    prepare: Callable[[Inputs], PreparedBenchmark]
+    unit: str
+
+benchmarks: dict[str, Benchmark] = {
+    "singleFileDisasm": Benchmark(prepareSingleFileDisasm, "words"),
+    "elfObjDisasm": Benchmark(prepareElfObjDisasm, "words"),
+    "SectionText.analyze": Benchmark(prepareTextAnalyze, "words"),
+    "SectionData.analyze": Benchmark(prepareDataAnalyze, "words"),
+    "text emitter": Benchmark(prepareTextEmit, "words"),
+    "data emitter": Benchmark(prepareDataEmit, "words"),
+    "overlays": Benchmark(prepareOverlays, "words"),
+    "SortedDict": Benchmark(prepareSortedDict, "keys"),
+}
+
+
+def getBaseConfig() -> Any:
+    "Returns a copy of the configuration every benchmark starts from"
+    if hasattr(common, "getActiveGlobalConfig"):
+        return common.getActiveGlobalConfig().copy()
+    # Releases without per-context configurations only have the `GlobalConfig` instance, so its attributes are saved
+    return copy.deepcopy(vars(common.GlobalConfig))
+
+@contextlib.contextmanager
+def activeConfig(baseConfig: Any) -> Iterator[None]:
+    "Runs the block with a new copy of `baseConfig` as the configuration, since the frontends change it"
+    if hasattr(common, "getActiveGlobalConfig"):
+        with baseConfig.copy().activate():
+            yield
+        return
+
+    savedAttributes = vars(common.GlobalConfig).copy()
+    vars(common.GlobalConfig).update(copy.deepcopy(baseConfig))
+    try:
+        yield
+    finally:
+        vars(common.GlobalConfig).clear()
+        vars(common.GlobalConfig).update(savedAttributes)
+
+def runBenchmark(benchmark: Benchmark, inputs: Inputs, baseConfig: Any, repeat: int) -> dict[str, Any]:
+    best = float("inf")
+    items = 0
+    for _ in range(repeat):
+        with activeConfig(baseConfig):
+            items, func = benchmark.prepare(inputs)
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+
+    # Tracing allocations slows everything down, so memory is measured on its own run
+    with activeConfig(baseConfig):
+        _, func = benchmark.prepare(inputs)
+        tracemalloc.start()
+        try:
+            func()
+            _, peakMemory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "items": items,
+        "unit": benchmark.unit,
+        "throughput": items / best,
+        "peakMemory": peakMemory,
+    }
+
+
+def compareAgainstBaseline(results: dict[str, dict[str, Any]], baseline: dict[str, Any], tolerance: float) -> bool:
+    "Prints the change of every benchmark against the baseline, returns True if any of them regressed"
+    regressed = False
+    baselineResults: dict[str, dict[str, Any]] = baseline["results"]
+    print()
+    print(f"Compared against spimdisasm {baseline['spimdisasm']} (python {baseline['python']}), tolerance {tolerance:.0%}")
+    print(f"{'benchmark':<22} {'time':>9} {'memory':>9}")
+    for name, result in results.items():
+        old = baselineResults.get(name)
+        if old is None:
+            print(f"{name:<22} {'(not in baseline)':>19}")
+            continue
+        timeChange = result["seconds"] / old["seconds"] - 1
+        memoryChange = result["peakMemory"] / max(old["peakMemory"], 1) - 1
+        status = ""
+        if timeChange > tolerance or memoryChange > tolerance:
+            status = "  REGRESSION"
+            regressed = True
+        print(f"{name:<22} {timeChange:>+9.1%} {memoryChange:>+9.1%}{status}")
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Times the frontends and the main stages of spimdisasm on deterministic synthetic inputs")
+    parser.add_argument("--scale", help="Multiplies the size of every generated input. Defaults to 1", type=int, default=1)
+    parser.add_argument("--repeat", help="Amount of times each benchmark is run, the best time is reported. Defaults to 3", type=int, default=3)
+    parser.add_argument("--seed", help="Seed used to generate the inputs. Defaults to 0", type=int, default=0)
+    parser.add_argument("--only", help="Only run the given benchmarks", nargs="+", choices=list(benchmarks), metavar="NAME")
+    parser.add_argument("--save-baseline", help="Write the results as json to the given path, to be used later with --baseline", metavar="PATH")
+    parser.add_argument("--baseline", help="Compare the results against a json previously written by --save-baseline. Exits with 1 if any benchmark regressed", metavar="PATH")
+    parser.add_argument("--tolerance", help="Allowed slowdown or memory increase against the baseline before considering it a regression, in percentage. Defaults to 10", type=float, default=10.0)
+    args = parser.parse_args()
+
+    baseline: dict[str, Any]|None = None
+    if args.baseline is not None:
+        baseline = json.loads(Path(args.baseline).read_text())
+        assert baseline is not None
+        if baseline["seed"] != args.seed or baseline["scale"] != args.scale:
+            print(f"Error: the baseline was generated with --seed {baseline['seed']} --scale {baseline['scale']}", file=sys.stderr)
+            return 2
+
+    baseConfig = getBaseConfig()
+    selected = {name: benchmark for name, benchmark in benchmarks.items() if args.only is None or name in args.only}
+
+    results: dict[str, dict[str, Any]] = dict()
+    with tempfile.TemporaryDirectory(prefix="spimdisasm_bench_") as tempdir:
+        inputs = generateInputs(args.seed, args.scale, Path(tempdir))
+
+        print(f"{'benchmark':<22} {'items':>8} {'best (s)':>9} {'throughput':>16} {'peak (MiB)':>11}")
+        for name, benchmark in selected.items():
+            result = runBenchmark(benchmark, inputs, baseConfig, args.repeat)
+            results[name] = result
+            throughput = f"{result['throughput']:,.0f} {result['unit']}/s"
+            print(f"{name:<22} {result['items']:>8} {result['seconds']:>9.3f} {throughput:>16} {result['peakMemory'] / (1024 * 1024):>11.2f}")
+
+    if args.save_baseline is not None:
+        report = {
+            "spimdisasm": spimdisasm.__version__,
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "scale": args.scale,
+            "results": results,
+        }
+        Path(args.save_baseline).write_text(json.dumps(report, indent=4) + "\n")
+
+    if baseline is not None:
+        if compareAgainstBaseline(results, baseline, args.tolerance / 100):
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
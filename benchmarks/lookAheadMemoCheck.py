@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+# Checks the visited states memo of the look-ahead symbol finder against rabbitizer's own RegistersTracker. The text of
+# the synthetic rom of `syntheticInputs.py` and a set of generated branch-heavy functions are analyzed three times:
+#
+# - Without the memo, using a plain `rabbitizer.RegistersTracker`.
+# - With the memo forced on for every function (`SymbolFunction.LOOK_AHEAD_MEMO_THRESHOLD = 0`).
+# - With the memo forced on but never stopping a walk, checking that every walk which the memo would have stopped does
+#   not change the analysis from that point on. This is what the memo relies on and fails if the registers state
+#   mirrored by `StatefulRegistersTracker` misses anything which affects rabbitizer's results.
+#
+# The analysis results of every function and the generated assembly of both first runs are compared. Exits with 1 on
+# any difference.
+#
+# Usage: python3 benchmarks/lookAheadMemoCheck.py [--functions N] [--branchy-functions N] [--seed N]
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import dataclasses
+import io
+import random
+import sys
+from pathlib import Path
+from typing import Any, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import rabbitizer
+
+from spimdisasm import common, mips
+
+import syntheticInputs
+
+
+# Registers used by the generated functions
+_GP = 28
+_T9 = 25
+_RA = 31
+
+def _iType(op: int, rs: int, rt: int, imm: int) -> int:
+    return (op << 26) | (rs << 21) | (rt << 16) | (imm & 0xFFFF)
+
+def _rType(rs: int, rt: int, rd: int, funct: int) -> int:
+    return (rs << 21) | (rt << 16) | (rd << 11) | funct
+
+def _hiHalf(address: int) -> int:
+    return ((address >> 16) + ((address >> 15) & 1)) & 0xFFFF
+
+def generateBranchyFunction(rng: random.Random, nInstr: int, dataVram: int, dataSize: int) -> list[int]:
+    """Function made of %hi/%lo pairs, $gp accesses and calls split by many branches, forwards and backwards. Some %hi
+    and %lo are on their own, so their pairing depends on the path taken to reach them"""
+    words: list[int] = []
+    if rng.random() < 0.3:
+        # .cpload
+        words += [_iType(0x0F, 0, _GP, 0), _iType(0x09, _GP, _GP, 0), _rType(_GP, _T9, _GP, 0x21)]
+
+    while len(words) < nInstr - 2:
+        reg = rng.randrange(8, 16)
+        address = dataVram + rng.randrange(0, dataSize // 4) * 4
+        kind = rng.random()
+        if kind < 0.15:
+            words.append(_iType(0x23, _GP, rng.randrange(2, 8), rng.randrange(-0x80, 0x80) * 4))
+        elif kind < 0.25:
+            # Indirect call
+            words += [_iType(0x0F, 0, _T9, _hiHalf(address)), _iType(0x23, _T9, _T9, address), _rType(_T9, 0, _RA, 0x09), 0]
+        elif kind < 0.4:
+            # %hi whose %lo may be after a branch, or in another path
+            words.append(_iType(0x0F, 0, reg, _hiHalf(address)))
+        elif kind < 0.55:
+            words.append(_iType(rng.choice((0x09, 0x23, 0x2B)), reg, rng.randrange(2, 8), address))
+        else:
+            words.append(_iType(0x0F, 0, reg, _hiHalf(address)))
+            op = rng.choice((0x09, 0x23, 0x21, 0x24, 0x2B, 0x31))
+            words.append(_iType(op, reg, rng.randrange(2, 8), address))
+
+        # Branches never leave the function, so the section splits it at its `jr $ra`
+        maxOffset = min(40, nInstr - 4 - len(words))
+        if rng.random() < 0.5 and maxOffset > 0:
+            if rng.random() < 0.3 and len(words) > 8:
+                offset = -rng.randrange(1, len(words) // 2)
+            else:
+                offset = rng.randrange(1, maxOffset + 1)
+            words += [_iType(rng.choice((0x04, 0x05)), rng.randrange(2, 8), 0, offset), _iType(0x09, rng.randrange(2, 8), reg, address)]
+
+    words = words[:nInstr - 2]
+    # Avoid leaving a branch without its delay slot
+    if len(words) > 0 and rabbitizer.Instruction(words[-1]).isBranch():
+        words[-1] = 0
+    return words + [_rType(_RA, 0, 0, 0x08), 0]
+
+def generateBranchyText(seed: int, functionsCount: int) -> bytes:
+    rng = random.Random(seed)
+    words: list[int] = []
+    for _ in range(functionsCount):
+        words += generateBranchyFunction(rng, rng.choice((16, 64, 200, 400, 800)), 0x80100000, 0x10000)
+    return b"".join(word.to_bytes(4, "big") for word in words)
+
+
+@dataclasses.dataclass
+class TextInput:
+    name: str
+    data: bytes
+    vram: int
+    pic: bool
+
+
+def analysisSnapshot(analyzer: mips.symbols.analysis.InstrAnalyzer) -> dict[str, Any]:
+    "Copy of the analysis results of a function, which can be compared with the ones of the same or another run"
+    snapshot: dict[str, Any] = dict()
+    for name, value in vars(analyzer).items():
+        if name.startswith("_") or name == "context":
+            continue
+        if name == "possibleSymbolTypes":
+            # Walking again the same path only increases the amount of accesses, only which ones were found is used
+            value = {address: frozenset(accesses) for address, accesses in value.items()}
+        elif name == "luiInstrs":
+            value = {offset: instr.getRaw() for offset, instr in value.items()}
+        elif isinstance(value, list):
+            value = [repr(item) for item in value]
+        elif isinstance(value, dict):
+            value = {key: copy.copy(item) if dataclasses.is_dataclass(item) else item for key, item in value.items()}
+        elif isinstance(value, set):
+            value = value.copy()
+        snapshot[name] = value
+    return snapshot
+
+
+class _RecordingStates(set):
+    "Visited states which never stop a walk, but remember the analysis when the first one would have"
+
+    def __init__(self, function: mips.symbols.SymbolFunction):
+        super().__init__()
+        self.function = function
+        self.analysisAtHit: dict[str, Any]|None = None
+
+    def __contains__(self, stateKey: object) -> bool:
+        if self.analysisAtHit is None and super().__contains__(stateKey):
+            self.analysisAtHit = analysisSnapshot(self.function.instrAnalyzer)
+        return False
+
+@dataclasses.dataclass
+class MemoCheckResults:
+    hits: int = 0
+    failures: list[str] = dataclasses.field(default_factory=list)
+
+@contextlib.contextmanager
+def checkedLookAhead(results: MemoCheckResults) -> Iterator[None]:
+    "Makes every look-ahead walk check that the memo would only have stopped walks which don't change the analysis"
+    original = mips.symbols.SymbolFunction._lookAheadSymbolFinder
+
+    def lookAheadSymbolFinder(self: mips.symbols.SymbolFunction, instr: rabbitizer.Instruction, prevInstr: rabbitizer.Instruction, instructionOffset: int, trackedRegistersOriginal: rabbitizer.RegistersTracker) -> None:
+        if not isinstance(self._lookAheadStates, _RecordingStates):
+            self._lookAheadStates = _RecordingStates(self)
+        states = self._lookAheadStates
+        states.analysisAtHit = None
+
+        original(self, instr, prevInstr, instructionOffset, trackedRegistersOriginal)
+
+        if states.analysisAtHit is not None:
+            results.hits += 1
+            if states.analysisAtHit != analysisSnapshot(self.instrAnalyzer):
+                results.failures.append(f"{self.getName()} at offset 0x{instructionOffset:X}")
+
+    mips.symbols.SymbolFunction._lookAheadSymbolFinder = lookAheadSymbolFinder # type: ignore[method-assign]
+    try:
+        yield
+    finally:
+        mips.symbols.SymbolFunction._lookAheadSymbolFinder = original # type: ignore[method-assign]
+
+@contextlib.contextmanager
+def memoThreshold(threshold: int) -> Iterator[None]:
+    original = mips.symbols.SymbolFunction.LOOK_AHEAD_MEMO_THRESHOLD
+    mips.symbols.SymbolFunction.LOOK_AHEAD_MEMO_THRESHOLD = threshold
+    try:
+        yield
+    finally:
+        mips.symbols.SymbolFunction.LOOK_AHEAD_MEMO_THRESHOLD = original
+
+
+def analyzeText(textInput: TextInput) -> tuple[dict[str, Any], str]:
+    "Returns the analysis results of every function and the generated assembly"
+    config = common.getActiveGlobalConfig().copy()
+    config.PIC = textInput.pic
+    config.VERBOSE = False
+    context = common.Context(config)
+    with context.activate():
+        context.changeGlobalSegmentRanges(0, len(textInput.data), textInput.vram, textInput.vram + len(textInput.data) + 0x100000)
+        section = mips.sections.SectionText(context, 0, len(textInput.data), textInput.vram, textInput.name, textInput.data, 0, None)
+        section.analyze()
+
+        analysis = {func.getName(): analysisSnapshot(func.instrAnalyzer) for func in section.symbolList if isinstance(func, mips.symbols.SymbolFunction)}
+        output = io.StringIO()
+        section.disassembleToFile(output)
+    return analysis, output.getvalue()
+
+def checkText(textInput: TextInput) -> bool:
+    with memoThreshold(1 << 62):
+        plainAnalysis, plainOutput = analyzeText(textInput)
+    with memoThreshold(0):
+        memoAnalysis, memoOutput = analyzeText(textInput)
+        results = MemoCheckResults()
+        with checkedLookAhead(results):
+            analyzeText(textInput)
+
+    ok = True
+    differentFunctions = [name for name in plainAnalysis if plainAnalysis[name] != memoAnalysis.get(name)]
+    if len(differentFunctions) != 0 or plainAnalysis.keys() != memoAnalysis.keys():
+        print(f"{textInput.name}: the analysis of {len(differentFunctions)} functions differs with the memo")
+        for name in differentFunctions:
+            print(f"    {name}")
+        ok = False
+    if plainOutput != memoOutput:
+        print(f"{textInput.name}: the generated assembly differs with the memo")
+        ok = False
+    if len(results.failures) != 0:
+        print(f"{textInput.name}: {len(results.failures)} of {results.hits} walks stopped by the memo would have changed the analysis")
+        for failure in results.failures:
+            print(f"    {failure}")
+        ok = False
+
+    if ok:
+        print(f"{textInput.name}: OK ({len(plainAnalysis)} functions, {results.hits} walks stopped by the memo)")
+    return ok
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Checks the visited states memo of the look-ahead symbol finder against rabbitizer's RegistersTracker")
+    parser.add_argument("--functions", help="Amount of functions of the generated rom. Defaults to 1500", type=int, default=1500)
+    parser.add_argument("--branchy-functions", help="Amount of generated branch-heavy functions. Defaults to 40", type=int, default=40)
+    parser.add_argument("--seed", help="Seed used to generate the inputs. Defaults to 0", type=int, default=0)
+    args = parser.parse_args()
+
+    if not mips.symbols.analysis.StatefulRegistersTracker.isSupported():
+        print(f"The memo is not used with the installed rabbitizer {rabbitizer.__version__}, nothing to check")
+        return 0
+
+    romImage = syntheticInputs.generateImage(args.seed, args.functions)
+    rom = syntheticInputs.buildRom(romImage)
+    romText = rom.data[:romImage.getSectionSize(".text")]
+    branchyText = generateBranchyText(args.seed, args.branchy_functions)
+
+    ok = True
+    for textInput in (
+        TextInput("rom", romText, rom.vram, False),
+        TextInput("branchy", branchyText, 0x80000000, False),
+        TextInput("branchy_pic", branchyText, 0x80000000, True),
+    ):
+        ok = checkText(textInput) and ok
+
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    exit(main())
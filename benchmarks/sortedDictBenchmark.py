@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+# Microbenchmark comparing `common.SortedDict` against the previous implementation,
+# which kept every key on a single Python list.
+#
+# Usage: python3 benchmarks/sortedDictBenchmark.py [--size N] [--repeat N]
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from spimdisasm.common import SortedDict
+
+
+class ListSortedDict:
+    """The previous `SortedDict` implementation, kept as the reference for this benchmark"""
+
+    def __init__(self):
+        self.map: dict[int, Any] = dict()
+        self.sortedKeys: list[int] = list()
+
+    def add(self, key: int, value: Any) -> None:
+        if key not in self.map:
+            bisect.insort(self.sortedKeys, key)
+        self.map[key] = value
+
+    def remove(self, key: int) -> None:
+        del self.map[key]
+        self.sortedKeys.remove(key)
+
+    def bulkLoad(self, pairs) -> None:
+        for key, value in pairs:
+            self.add(key, value)
+
+    def getKeyRight(self, key: int, inclusive: bool=True):
+        if inclusive:
+            index = bisect.bisect_right(self.sortedKeys, key)
+        else:
+            index = bisect.bisect_left(self.sortedKeys, key)
+        if index == 0:
+            return None
+        currentKey = self.sortedKeys[index - 1]
+        return currentKey, self.map[currentKey]
+
+    def getRange(self, startKey: int, endKey: int):
+        keyIndexStart = bisect.bisect_left(self.sortedKeys, startKey)
+        keyIndexEnd = bisect.bisect_left(self.sortedKeys, endKey)
+        for index in range(keyIndexStart, keyIndexEnd):
+            key = self.sortedKeys[index]
+            yield (key, self.map[key])
+
+
+def benchRandomInserts(cls: type, keys: list[int]) -> None:
+    d = cls()
+    for key in keys:
+        d.add(key, key)
+
+def benchSortedInserts(cls: type, keys: list[int]) -> None:
+    d = cls()
+    for key in sorted(keys):
+        d.add(key, key)
+
+def benchBulkLoad(cls: type, keys: list[int]) -> None:
+    d = cls()
+    d.bulkLoad((key, key) for key in sorted(keys))
+
+def benchRepeatedBulkLoads(cls: type, keys: list[int]) -> None:
+    d = cls()
+    batchSize = max(len(keys) // 50, 1)
+    for i in range(0, len(keys), batchSize):
+        d.bulkLoad((key, key) for key in keys[i:i+batchSize])
+
+def benchChurn(cls: type, keys: list[int]) -> None:
+    d = cls()
+    for key in keys:
+        d.add(key, key)
+    for key in keys[::2]:
+        d.remove(key)
+    for key in keys[::2]:
+        d.add(key, key)
+
+def benchLookups(cls: type, keys: list[int]) -> None:
+    d = cls()
+    for key in keys:
+        d.add(key, key)
+    for key in keys:
+        d.getKeyRight(key + 3)
+    for key in keys[::64]:
+        for _ in d.getRange(key, key + 0x400):
+            pass
+
+
+benchmarks: dict[str, Callable[[type, list[int]], None]] = {
+    "random inserts": benchRandomInserts,
+    "sorted inserts": benchSortedInserts,
+    "bulk load": benchBulkLoad,
+    "repeated bulk loads": benchRepeatedBulkLoads,
+    "insert/remove churn": benchChurn,
+    "lookups": benchLookups,
+}
+
+def timeIt(func: Callable[[type, list[int]], None], cls: type, keys: list[int], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(cls, keys)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compares SortedDict against the old list based implementation")
+    parser.add_argument("--size", help="Amount of keys to use. Defaults to 50000", type=int, default=50000)
+    parser.add_argument("--repeat", help="Amount of times each benchmark is run, the best time is reported. Defaults to 3", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0x5EED)
+    keys = rng.sample(range(0x80000000, 0x80000000 + args.size * 16, 4), args.size)
+
+    print(f"{'benchmark':<20} {'list (s)':>10} {'chunked (s)':>12} {'speedup':>8}")
+    for name, func in benchmarks.items():
+        oldTime = timeIt(func, ListSortedDict, keys, args.repeat)
+        newTime = timeIt(func, SortedDict, keys, args.repeat)
+        print(f"{name:<20} {oldTime:>10.3f} {newTime:>12.3f} {oldTime/newTime:>7.2f}x")
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
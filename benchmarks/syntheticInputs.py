@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+# Deterministic generator of synthetic MIPS inputs, used by `disasmBenchmark.py`.
+#
+# The generated code mimics what IDO and GCC produce: functions with stack frames, `%hi`/`%lo` pairs to load, store
+# and take the address of symbols, `jal`s, branches, float constants and `switch`es implemented with jump tables.
+# The data contains pointer tables, strings and plain values. Every input depends only on the seed and sizes used.
+#
+# Usage: python3 benchmarks/syntheticInputs.py OUTDIR [--functions N] [--seed N]
+#
+# Writes a flat binary (`rom.bin`) with its splits csv (`rom_splits.csv`) for `singleFileDisasm`, and a relocatable
+# elf object (`object.o`) for `elfObjDisasm`.
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import random
+import struct
+from pathlib import Path
+from typing import Sequence
+
+
+R_MIPS_32 = 2
+R_MIPS_26 = 4
+R_MIPS_HI16 = 5
+R_MIPS_LO16 = 6
+
+_RELOC_TYPES = {"32": R_MIPS_32, "26": R_MIPS_26, "hi16": R_MIPS_HI16, "lo16": R_MIPS_LO16}
+
+# Registers
+_ZERO, _AT, _V0, _V1, _A0, _A1 = 0, 1, 2, 3, 4, 5
+_T0, _T6, _T7, _T8, _T9 = 8, 14, 15, 24, 25
+_SP, _RA = 29, 31
+
+
+def _rType(rs: int, rt: int, rd: int, sa: int, funct: int) -> int:
+    return (rs << 21) | (rt << 16) | (rd << 11) | (sa << 6) | funct
+
+def _iType(op: int, rs: int, rt: int, imm: int) -> int:
+    return (op << 26) | (rs << 21) | (rt << 16) | (imm & 0xFFFF)
+
+def _addu(rd: int, rs: int, rt: int) -> int:
+    return _rType(rs, rt, rd, 0, 0x21)
+
+def _sll(rd: int, rt: int, sa: int) -> int:
+    return _rType(0, rt, rd, sa, 0x00)
+
+def _jr(rs: int) -> int:
+    return _rType(rs, 0, 0, 0, 0x08)
+
+def _addiu(rt: int, rs: int, imm: int) -> int:
+    return _iType(0x09, rs, rt, imm)
+
+def _sltiu(rt: int, rs: int, imm: int) -> int:
+    return _iType(0x0B, rs, rt, imm)
+
+def _lw(rt: int, imm: int, base: int) -> int:
+    return _iType(0x23, base, rt, imm)
+
+def _sw(rt: int, imm: int, base: int) -> int:
+    return _iType(0x2B, base, rt, imm)
+
+_NOP = 0
+_LUI = 0x0F
+_ADDIU = 0x09
+_LW = 0x23
+_SW = 0x2B
+_LWC1 = 0x31
+_LDC1 = 0x35
+_BEQ = 0x04
+_BNE = 0x05
+_JAL = 0x03
+
+
+@dataclasses.dataclass
+class SyntheticSymbol:
+    name: str
+    section: str
+    "One of `.text`, `.data`, `.rodata` or `.bss`"
+    offset: int
+    "Offset of the symbol inside its section"
+    size: int
+    isFunction: bool = False
+    isLocal: bool = False
+    "Local symbols (jump table labels) are referenced through their section, like assemblers do"
+
+@dataclasses.dataclass
+class SyntheticRef:
+    "A word which references a symbol. The referenced address is encoded into the word when linking the image"
+    word: int
+    "The word without the referenced address"
+    kind: str
+    "One of `hi16`, `lo16`, `26` or `32`"
+    symbol: str
+    addend: int = 0
+
+@dataclasses.dataclass
+class SyntheticImage:
+    """The sections of a generated compilation unit, not yet placed in any address space.
+
+    Each word of `sections` is either a plain word or a `SyntheticRef`."""
+    sections: dict[str, list[int|SyntheticRef]]
+    bssSize: int
+    symbols: dict[str, SyntheticSymbol]
+    externals: dict[str, int]
+    "Symbols referenced by this image but defined somewhere else, with their addresses"
+
+    def getSectionSize(self, section: str) -> int:
+        if section == ".bss":
+            return self.bssSize
+        return len(self.sections[section]) * 4
+
+    def linkAt(self, vrams: dict[str, int]) -> dict[str, list[int]]:
+        "Returns the words of every section, with every reference resolved as if each section was placed at `vrams`"
+        def resolve(ref: SyntheticRef) -> int:
+            sym = self.symbols.get(ref.symbol)
+            if sym is None:
+                return self.externals[ref.symbol] + ref.addend
+            return vrams[sym.section] + sym.offset + ref.addend
+
+        return {name: [_encodeRef(w, resolve(w)) if isinstance(w, SyntheticRef) else w for w in words] for name, words in self.sections.items()}
+
+    def wordsCount(self) -> int:
+        return sum(len(words) for words in self.sections.values())
+
+
+def _encodeRef(ref: SyntheticRef, address: int) -> int:
+    if ref.kind == "hi16":
+        return ref.word | (((address + 0x8000) >> 16) & 0xFFFF)
+    if ref.kind == "lo16":
+        return ref.word | (address & 0xFFFF)
+    if ref.kind == "26":
+        return ref.word | ((address >> 2) & 0x3FFFFFF)
+    return address & 0xFFFFFFFF
+
+
+_WORDS = ["actor", "player", "camera", "scene", "room", "object", "sound", "save", "file", "menu", "effect", "collision",
+    "light", "matrix", "texture", "message", "event", "timer", "enemy", "item"]
+
+def _makeString(rng: random.Random) -> bytes:
+    words = [rng.choice(_WORDS) for _ in range(rng.randrange(1, 6))]
+    text = " ".join(words)
+    if rng.random() < 0.5:
+        text += rng.choice([": %d", ": %s", " (%x)", " %f", "\\n"]).replace("\\n", "\n")
+    return text.encode("ascii") + b"\0"
+
+def _bytesToWords(data: bytes) -> list[int]:
+    data += b"\0" * (-len(data) % 4)
+    return list(struct.unpack(f">{len(data)//4}I", data))
+
+
+class _FunctionWriter:
+    "Emits the instructions of a single function, resolving its branches once every label is known"
+
+    def __init__(self, text: list[int|SyntheticRef]):
+        self.text = text
+        self.start = len(text)
+        self.labels: dict[str, int] = dict()
+        self.branches: list[tuple[int, int, str]] = list()
+
+    def emit(self, word: int|SyntheticRef) -> None:
+        self.text.append(word)
+
+    def emitBranch(self, op: int, rs: int, rt: int, label: str) -> None:
+        self.branches.append((len(self.text), (op << 26) | (rs << 21) | (rt << 16), label))
+        self.text.append(0)
+
+    def placeLabel(self, label: str) -> None:
+        self.labels[label] = len(self.text)
+
+    def emitHi(self, reg: int, symbol: str, addend: int=0) -> None:
+        self.emit(SyntheticRef(_iType(_LUI, 0, reg, 0), "hi16", symbol, addend))
+
+    def emitLo(self, op: int, rt: int, base: int, symbol: str, addend: int=0) -> None:
+        self.emit(SyntheticRef(_iType(op, base, rt, 0), "lo16", symbol, addend))
+
+    def finish(self) -> None:
+        for index, word, label in self.branches:
+            self.text[index] = word | ((self.labels[label] - index - 1) & 0xFFFF)
+
+
+class _ImageGenerator:
+    def __init__(self, rng: random.Random, prefix: str, functionCount: int, externals: dict[str, int]):
+        self.rng = rng
+        self.prefix = prefix
+        self.functionCount = functionCount
+        self.externalFunctions = sorted(externals)
+        self.image = SyntheticImage({".text": [], ".data": [], ".rodata": []}, 0, dict(), dict(externals))
+
+        self.functionNames = [f"{prefix}func_{i:05}" for i in range(functionCount)]
+        self.dataWords: list[tuple[str, int]] = list()
+        "Data and bss symbols which can be loaded or stored, with their size"
+        self.strings: list[str] = list()
+        self.floats: list[str] = list()
+        self.doubles: list[str] = list()
+
+    def addSymbol(self, name: str, section: str, offset: int, size: int, isFunction: bool=False, isLocal: bool=False) -> None:
+        self.image.symbols[name] = SyntheticSymbol(name, section, offset, size, isFunction, isLocal)
+
+    def appendObject(self, section: str, name: str, words: Sequence[int|SyntheticRef], alignment: int=4) -> None:
+        sectionWords = self.image.sections[section]
+        while (len(sectionWords) * 4) % alignment != 0:
+            sectionWords.append(0)
+        self.addSymbol(name, section, len(sectionWords) * 4, len(words) * 4)
+        sectionWords.extend(words)
+
+    def generateData(self) -> None:
+        rng = self.rng
+        for i in range(max(8, self.functionCount)):
+            name = f"{self.prefix}D_{i:05}"
+            kind = rng.random()
+            if kind < 0.35:
+                size = rng.choice([1, 1, 1, 2, 4, 8])
+                self.appendObject(".data", name, [rng.randrange(0, 0x10000) for _ in range(size)])
+                self.dataWords.append((name, size))
+            elif kind < 0.5:
+                # Function pointer table
+                self.appendObject(".data", name, [SyntheticRef(0, "32", rng.choice(self.functionNames)) for _ in range(rng.randrange(2, 12))])
+            elif kind < 0.6:
+                # Table of pointers to strings, which are placed before it
+                strings = []
+                for j in range(rng.randrange(2, 6)):
+                    stringName = f"{self.prefix}D_{i:05}_str{j}"
+                    self.appendObject(".data", stringName, _bytesToWords(_makeString(rng)))
+                    strings.append(stringName)
+                self.appendObject(".data", name, [SyntheticRef(0, "32", s) for s in strings])
+            elif kind < 0.75:
+                self.appendObject(".rodata", name, _bytesToWords(_makeString(rng)))
+                self.strings.append(name)
+            elif kind < 0.85:
+                self.appendObject(".rodata", name, list(struct.unpack(">I", struct.pack(">f", rng.uniform(-1000.0, 1000.0)))))
+                self.floats.append(name)
+            elif kind < 0.9:
+                self.appendObject(".rodata", name, list(struct.unpack(">II", struct.pack(">d", rng.uniform(-1000.0, 1000.0)))), alignment=8)
+                self.doubles.append(name)
+            else:
+                size = rng.choice([1, 2, 4, 16, 64])
+                self.addSymbol(name, ".bss", self.image.bssSize, size * 4)
+                self.image.bssSize += size * 4
+                self.dataWords.append((name, size))
+
+        if len(self.dataWords) == 0:
+            self.appendObject(".data", f"{self.prefix}D_var", [0])
+            self.dataWords.append((f"{self.prefix}D_var", 1))
+        if len(self.strings) == 0:
+            self.appendObject(".rodata", f"{self.prefix}D_str", _bytesToWords(b"placeholder\0"))
+            self.strings.append(f"{self.prefix}D_str")
+        if len(self.floats) == 0:
+            self.appendObject(".rodata", f"{self.prefix}D_flt", [0x3F800000])
+            self.floats.append(f"{self.prefix}D_flt")
+        if len(self.doubles) == 0:
+            self.appendObject(".rodata", f"{self.prefix}D_dbl", [0x3FF00000, 0], alignment=8)
+            self.doubles.append(f"{self.prefix}D_dbl")
+
+    def randomCallTarget(self) -> str:
+        if len(self.externalFunctions) > 0 and self.rng.random() < 0.3:
+            return self.rng.choice(self.externalFunctions)
+        return self.rng.choice(self.functionNames)
+
+    def emitStatement(self, f: _FunctionWriter, isGcc: bool) -> None:
+        rng = self.rng
+        kind = rng.random()
+        if kind < 0.25:
+            # Load a global, IDO uses $at as the base while GCC reuses the destination register
+            name, size = rng.choice(self.dataWords)
+            addend = 4 * rng.randrange(size)
+            dst = rng.choice([_V0, _T6, _T7, _T8])
+            base = dst if isGcc else _AT
+            f.emitHi(base, name, addend)
+            f.emitLo(_LW, dst, base, name, addend)
+        elif kind < 0.4:
+            name, size = rng.choice(self.dataWords)
+            addend = 4 * rng.randrange(size)
+            base = _V1 if isGcc else _AT
+            f.emitHi(base, name, addend)
+            f.emit(_addiu(_T9, _ZERO, rng.randrange(0, 0x100)))
+            f.emitLo(_SW, _T9, base, name, addend)
+        elif kind < 0.6:
+            # Pass a string to a function
+            string = rng.choice(self.strings)
+            f.emitHi(_A0, string)
+            f.emitLo(_ADDIU, _A0, _A0, string)
+            f.emit(SyntheticRef(_JAL << 26, "26", self.randomCallTarget()))
+            f.emit(_addiu(_A1, _ZERO, rng.randrange(0, 0x40)))
+        elif kind < 0.7:
+            f.emit(SyntheticRef(_JAL << 26, "26", self.randomCallTarget()))
+            f.emit(_NOP)
+        elif kind < 0.8:
+            if rng.random() < 0.5:
+                constant = rng.choice(self.floats)
+                f.emitHi(_AT, constant)
+                f.emitLo(_LWC1, 4, _AT, constant)
+            else:
+                constant = rng.choice(self.doubles)
+                f.emitHi(_AT, constant)
+                f.emitLo(_LDC1, 6, _AT, constant)
+        elif kind < 0.9:
+            label = f"skip{len(f.branches)}"
+            f.emitBranch(_BEQ if rng.random() < 0.5 else _BNE, rng.choice([_V0, _T6, _T7]), _ZERO, label)
+            f.emit(_NOP)
+            for _ in range(rng.randrange(1, 4)):
+                f.emit(_addiu(_T0 + rng.randrange(4), _T0 + rng.randrange(4), rng.randrange(-0x80, 0x80)))
+            f.placeLabel(label)
+        else:
+            for _ in range(rng.randrange(1, 5)):
+                reg = _T0 + rng.randrange(8)
+                f.emit(_addu(reg, reg, _T0 + rng.randrange(8)))
+
+    def emitSwitch(self, f: _FunctionWriter, funcName: str) -> None:
+        rng = self.rng
+        casesCount = rng.randrange(4, 16)
+        f.emit(_sltiu(_AT, _A0, casesCount))
+        f.emitBranch(_BEQ, _AT, _ZERO, "default")
+        f.emit(_sll(_T6, _A0, 2))
+
+        tableName = f"jtbl_{funcName}"
+        f.emitHi(_AT, tableName)
+        f.emit(_addu(_AT, _AT, _T6))
+        f.emitLo(_LW, _T6, _AT, tableName)
+        f.emit(_jr(_T6))
+        f.emit(_NOP)
+
+        caseLabels: list[str] = []
+        for case in range(casesCount):
+            caseLabel = f"L_{funcName}_case{case}"
+            caseLabels.append(caseLabel)
+            self.addSymbol(caseLabel, ".text", len(f.text) * 4, 0, isLocal=True)
+            f.emit(_addiu(_V0, _ZERO, case * 3 + 1))
+            f.emitBranch(_BEQ, _ZERO, _ZERO, "end")
+            f.emit(_NOP)
+
+        f.placeLabel("default")
+        f.emit(_addiu(_V0, _ZERO, -1))
+        f.placeLabel("end")
+        self.appendObject(".rodata", tableName, [SyntheticRef(0, "32", label) for label in caseLabels])
+
+    def generateFunctions(self) -> None:
+        rng = self.rng
+        text = self.image.sections[".text"]
+        for funcName in self.functionNames:
+            f = _FunctionWriter(text)
+            isGcc = rng.random() < 0.5
+            isLeaf = rng.random() < 0.2
+            frameSize = 0x18 + 8 * rng.randrange(0, 6)
+
+            if not isLeaf:
+                f.emit(_addiu(_SP, _SP, -frameSize))
+                f.emit(_sw(_RA, frameSize - 4, _SP))
+
+            if not isLeaf and rng.random() < 0.15:
+                self.emitSwitch(f, funcName)
+            for _ in range(rng.randrange(1, 4) if isLeaf else rng.randrange(3, 16)):
+                if isLeaf:
+                    self.emitLeafStatement(f, isGcc)
+                else:
+                    self.emitStatement(f, isGcc)
+
+            if not isLeaf:
+                f.emit(_lw(_RA, frameSize - 4, _SP))
+                f.emit(_jr(_RA))
+                f.emit(_addiu(_SP, _SP, frameSize))
+            else:
+                f.emit(_jr(_RA))
+                f.emit(_NOP)
+            f.finish()
+
+            self.addSymbol(funcName, ".text", f.start * 4, (len(text) - f.start) * 4, isFunction=True)
+
+    def emitLeafStatement(self, f: _FunctionWriter, isGcc: bool) -> None:
+        # Leaf functions don't call anything, since they don't save $ra
+        name, size = self.rng.choice(self.dataWords)
+        base = _V0 if isGcc else _AT
+        f.emitHi(base, name)
+        f.emitLo(_LW, _V0, base, name)
+
+    def generate(self) -> SyntheticImage:
+        self.generateData()
+        self.generateFunctions()
+        # Like linkers do, so each section can be placed right after the previous one
+        for words in self.image.sections.values():
+            words.extend([0] * (-len(words) % 4))
+        self.image.bssSize += -self.image.bssSize % 16
+        return self.image
+
+
+def generateImage(seed: int, functionCount: int, prefix: str="", externals: dict[str, int]|None=None) -> SyntheticImage:
+    """Generates a compilation unit with `functionCount` functions and about as many data symbols.
+
+    `externals` are functions defined outside of the image which its code may call, with their addresses."""
+    rng = random.Random(seed)
+    return _ImageGenerator(rng, prefix, functionCount, dict() if externals is None else externals).generate()
+
+
+@dataclasses.dataclass
+class SyntheticRom:
+    data: bytes
+    splits: list[list[str]]
+    "Rows of a splits csv, see `common.FileSplitFormat`"
+    vram: int
+    wordsCount: int
+
+def buildRom(image: SyntheticImage, vram: int=0x80100000, functionsPerFile: int=64) -> SyntheticRom:
+    "Places the sections of the image one after another, splitting its text in files of `functionsPerFile` functions"
+    textSize = image.getSectionSize(".text")
+    dataSize = image.getSectionSize(".data")
+    rodataSize = image.getSectionSize(".rodata")
+    offsets = {".text": 0, ".data": textSize, ".rodata": textSize + dataSize, ".bss": textSize + dataSize + rodataSize}
+    vrams = {name: vram + offset for name, offset in offsets.items()}
+    sections = image.linkAt(vrams)
+
+    words = sections[".text"] + sections[".data"] + sections[".rodata"]
+    data = struct.pack(f">{len(words)}I", *words)
+
+    splits: list[list[str]] = [["offset", "vram", ".text"]]
+    functions = sorted((sym.offset for sym in image.symbols.values() if sym.isFunction))
+    for i in range(0, len(functions), functionsPerFile):
+        offset = functions[i]
+        splits.append([f"{offset:X}", f"{vram + offset:X}", f"text_{i // functionsPerFile:04}"])
+    for section in (".data", ".rodata", ".bss"):
+        offset = offsets[section]
+        splits.append(["offset", "vram", section])
+        splits.append([f"{offset:X}", f"{vram + offset:X}", section[1:]])
+    end = offsets[".bss"] + image.bssSize
+    splits.append([f"{end:X}", f"{vram + end:X}", ".end"])
+
+    return SyntheticRom(data, splits, vram, len(words))
+
+
+@dataclasses.dataclass
+class SyntheticOverlay:
+    vromStart: int
+    vromEnd: int
+    vram: int
+    sectionOffsets: dict[str, int]
+    "Offset of each section relative to `vromStart`, `.bss` is not part of the rom"
+
+def buildOverlaysRom(seed: int, mainFunctionCount: int, overlayCount: int, overlayFunctionCount: int, vram: int=0x80100000, overlaysVram: int=0x80800000) -> tuple[SyntheticRom, list[SyntheticOverlay]]:
+    """Generates a main segment and `overlayCount` overlays placed after it.
+
+    Every overlay is linked at the same `overlaysVram`, and its code calls functions of the main segment."""
+    mainImage = generateImage(seed, mainFunctionCount)
+    rom = buildRom(mainImage, vram)
+    mainSize = len(rom.data)
+    mainVrams = {".text": vram, ".data": vram + mainImage.getSectionSize(".text")}
+    mainVrams[".rodata"] = mainVrams[".data"] + mainImage.getSectionSize(".data")
+    mainVrams[".bss"] = mainVrams[".rodata"] + mainImage.getSectionSize(".rodata")
+    externals = {name: mainVrams[sym.section] + sym.offset for name, sym in mainImage.symbols.items() if sym.isFunction}
+
+    chunks = [rom.data]
+    overlays: list[SyntheticOverlay] = []
+    wordsCount = rom.wordsCount
+    vromStart = mainSize
+    for i in range(overlayCount):
+        image = generateImage(seed + 1 + i, overlayFunctionCount, prefix=f"ovl{i:03}_", externals=externals)
+        offset = 0
+        offsets: dict[str, int] = dict()
+        for section in (".text", ".data", ".rodata", ".bss"):
+            offsets[section] = offset
+            offset += image.getSectionSize(section)
+        sections = image.linkAt({name: overlaysVram + sectionOffset for name, sectionOffset in offsets.items()})
+        words = sections[".text"] + sections[".data"] + sections[".rodata"]
+        chunks.append(struct.pack(f">{len(words)}I", *words))
+        overlays.append(SyntheticOverlay(vromStart, vromStart + len(words) * 4, overlaysVram, offsets))
+        vromStart += len(words) * 4
+        wordsCount += len(words)
+
+    return SyntheticRom(b"".join(chunks), rom.splits, vram, wordsCount), overlays
+
+
+def buildElf(image: SyntheticImage) -> bytes:
+    """Builds a big endian o32 relocatable elf object containing the image.
+
+    References to local symbols are relocated against their section, with the symbol offset stored as the addend,
+    while every other reference is relocated against its symbol."""
+    sectionOrder = [".text", ".data", ".rodata"]
+    sectionSymbolIndex = {name: i + 1 for i, name in enumerate(sectionOrder + [".bss"])}
+
+    globalSymbols = [sym for sym in image.symbols.values() if not sym.isLocal]
+    symbolIndex: dict[str, int] = dict()
+    firstGlobal = 1 + len(sectionSymbolIndex)
+    for i, sym in enumerate(globalSymbols):
+        symbolIndex[sym.name] = firstGlobal + i
+    for i, name in enumerate(sorted(image.externals)):
+        symbolIndex[name] = firstGlobal + len(globalSymbols) + i
+
+    sectionData: dict[str, bytes] = dict()
+    relocData: dict[str, bytes] = dict()
+    for name in sectionOrder:
+        words: list[int] = []
+        relocs: list[tuple[int, int]] = []
+        for i, w in enumerate(image.sections[name]):
+            if not isinstance(w, SyntheticRef):
+                words.append(w)
+                continue
+            refSym = image.symbols.get(w.symbol)
+            addend = w.addend
+            if refSym is not None and refSym.isLocal:
+                addend += refSym.offset
+                target = sectionSymbolIndex[refSym.section]
+            else:
+                target = symbolIndex[w.symbol]
+            words.append(_encodeRef(w, addend))
+            relocs.append((i * 4, (target << 8) | _RELOC_TYPES[w.kind]))
+        sectionData[name] = struct.pack(f">{len(words)}I", *words)
+        relocData[name] = b"".join(struct.pack(">II", offset, info) for offset, info in relocs)
+
+    strtab = bytearray(b"\0")
+    def addString(table: bytearray, string: str) -> int:
+        offset = len(table)
+        table += string.encode("ascii") + b"\0"
+        return offset
+
+    shndx = {".text": 1, ".data": 3, ".rodata": 5, ".bss": 7}
+    symtab = bytearray(struct.pack(">IIIBBH", 0, 0, 0, 0, 0, 0))
+    for name in sectionOrder + [".bss"]:
+        # STB_LOCAL, STT_SECTION
+        symtab += struct.pack(">IIIBBH", 0, 0, 0, 3, 0, shndx[name])
+    for sym in globalSymbols:
+        # STB_GLOBAL, STT_FUNC or STT_OBJECT
+        info = (1 << 4) | (2 if sym.isFunction else 1)
+        symtab += struct.pack(">IIIBBH", addString(strtab, sym.name), sym.offset, sym.size, info, 0, shndx[sym.section])
+    for name in sorted(image.externals):
+        symtab += struct.pack(">IIIBBH", addString(strtab, name), 0, 0, (1 << 4), 0, 0)
+
+    shstrtab = bytearray(b"\0")
+    # name, type, flags, data, link, info, alignment, entry size
+    headers: list[tuple[int, int, int, bytes, int, int, int, int]] = [(0, 0, 0, b"", 0, 0, 0, 0)]
+    for name, flags in ((".text", 0x6), (".data", 0x3), (".rodata", 0x2)):
+        headers.append((addString(shstrtab, name), 1, flags, sectionData[name], 0, 0, 16, 0))
+        headers.append((addString(shstrtab, ".rel" + name), 9, 0x40, relocData[name], 9, len(headers) - 1, 4, 8))
+    headers.append((addString(shstrtab, ".bss"), 8, 0x3, b"", 0, 0, 16, 0))
+    headers.append((addString(shstrtab, ".strtab"), 3, 0, bytes(strtab), 0, 0, 1, 0))
+    headers.append((addString(shstrtab, ".symtab"), 2, 0, bytes(symtab), 8, firstGlobal, 4, 16))
+    shstrtabName = addString(shstrtab, ".shstrtab")
+    headers.append((shstrtabName, 3, 0, bytes(shstrtab), 0, 0, 1, 0))
+    assert [h[1] for h in headers[1:8]] == [1, 9, 1, 9, 1, 9, 8]
+
+    body = bytearray()
+    offsets: list[int] = []
+    for _, shType, _, data, _, _, alignment, _ in headers:
+        while (52 + len(body)) % max(alignment, 1) != 0:
+            body.append(0)
+        offsets.append(52 + len(body))
+        if shType != 8:
+            body += data
+    while (52 + len(body)) % 4 != 0:
+        body.append(0)
+    shoff = 52 + len(body)
+
+    sectionHeaders = bytearray()
+    for (nameOffset, shType, flags, data, link, info, alignment, entrySize), offset in zip(headers, offsets):
+        size = image.bssSize if shType == 8 else len(data)
+        sectionHeaders += struct.pack(">IIIIIIIIII", nameOffset, shType, flags, 0, offset if shType != 0 else 0, size, link, info, alignment, entrySize)
+
+    # EF_MIPS_ARCH_2 | EF_MIPS_ABI_O32 | EF_MIPS_NOREORDER
+    elfFlags = 0x10000000 | 0x1000 | 0x1
+    header = b"\x7FELF" + bytes([1, 2, 1, 0]) + b"\0" * 8
+    header += struct.pack(">HHIIIIIHHHHHH", 1, 8, 1, 0, 0, shoff, elfFlags, 52, 0, 0, 40, len(headers), len(headers) - 1)
+    return bytes(header + body + sectionHeaders)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Writes synthetic inputs for singleFileDisasm and elfObjDisasm")
+    parser.add_argument("outdir", help="Directory where the generated files are written")
+    parser.add_argument("--functions", help="Amount of functions of the rom and the elf. Defaults to 2000", type=int, default=2000)
+    parser.add_argument("--seed", help="Defaults to 0", type=int, default=0)
+    args = parser.parse_args()
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    image = generateImage(args.seed, args.functions)
+    rom = buildRom(image)
+    (outdir / "rom.bin").write_bytes(rom.data)
+    (outdir / "rom_splits.csv").write_text("".join(",".join(row) + "\n" for row in rom.splits))
+    (outdir / "object.o").write_bytes(buildElf(image))
+
+    print(f"rom.bin: {rom.wordsCount} words, vram 0x{rom.vram:08X}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,14 +6,20 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import contextlib
 import dataclasses
 from pathlib import Path
+from typing import Any, Iterable
 
 from . import Utils
+from .GlobalConfig import GlobalConfigType, getActiveGlobalConfig
 from .ContextSymbols import ContextSymbol
 from .SymbolsSegment import SymbolsSegment
 from .GpAccesses import GpAccessContainer
 from .Relocation import RelocationInfo, RelocType
+from .RunStats import RunStats
+from .ContextBinaryFile import ContextBinaryWriter, ContextBinaryReader
 
 
 @dataclasses.dataclass
@@ -34,20 +40,87 @@ class AddressRange:
             self.end = address
         return None
 
+class AddressRangesIndex:
+    """Set of address ranges which answers if an address is inside any of them with a binary search.
+
+    The ranges are sorted and the overlapping or adjacent ones are merged the first time they are queried after adding
+    new ones. Ranges can only be added through this class, so the merged ranges always match the added ones.
+    """
+
+    def __init__(self):
+        self._ranges: list[tuple[int, int]] = []
+        "Every added `(start, end)` pair, in the order they were added"
+
+        self._isIndexed = True
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def addRange(self, start: int, end: int) -> None:
+        self._ranges.append((start, end))
+        self._isIndexed = False
+
+    def addRanges(self, ranges: Iterable[tuple[int, int]]) -> None:
+        "Adds every `(start, end)` pair"
+        self._ranges.extend(ranges)
+        self._isIndexed = False
+
+    def getRanges(self) -> list[tuple[int, int]]:
+        "Returns every added range as `(start, end)` pairs, in the order they were added"
+        return list(self._ranges)
+
+    def _build(self) -> None:
+        starts: list[int] = []
+        ends: list[int] = []
+        for start, end in sorted(x for x in self._ranges if x[0] < x[1]):
+            if len(ends) > 0 and start <= ends[-1]:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+
+        self._starts = starts
+        self._ends = ends
+        self._isIndexed = True
+
+    def isInRange(self, address: int) -> bool:
+        if not self._isIndexed:
+            self._build()
+        index = bisect.bisect_right(self._starts, address) - 1
+        if index < 0:
+            return False
+        return address < self._ends[index]
+
+    def getMergedRanges(self) -> list[tuple[int, int]]:
+        "Returns the sorted and merged ranges as `(start, end)` pairs"
+        if not self._isIndexed:
+            self._build()
+        return list(zip(self._starts, self._ends))
+
+
 class SymbolsRanges:
     def __init__(self, start: int, end: int):
         self.mainAddressRange = AddressRange(start, end)
-        self.specialRanges: list[AddressRange] = list()
+        self._specialRangesIndex = AddressRangesIndex()
+
+    @property
+    def specialRanges(self) -> tuple[AddressRange, ...]:
+        "Copy of the special ranges, in the order they were added. Use `addSpecialRange` to add more"
+        return tuple(AddressRange(start, end) for start, end in self._specialRangesIndex.getRanges())
+
+    def hasSpecialRanges(self) -> bool:
+        return len(self._specialRangesIndex) > 0
 
     def isInRange(self, address: int) -> bool:
         if self.mainAddressRange.isInRange(address):
             return True
 
-        for spRange in self.specialRanges:
-            if spRange.isInRange(address):
-                return True
-
-        return False
+        if len(self._specialRangesIndex) == 0:
+            return False
+        return self._specialRangesIndex.isInRange(address)
 
     def decreaseStart(self, address: int) -> None:
         self.mainAddressRange.decreaseStart(address)
@@ -59,9 +132,47 @@ class SymbolsRanges:
         # print(f"addSpecialRange: {start:X} {end:X}")
         if end <= start:
             return None
-        addrRange = AddressRange(start, end)
-        self.specialRanges.append(addrRange)
-        return addrRange
+        self._specialRangesIndex.addRange(start, end)
+        return AddressRange(start, end)
+
+    def addSpecialRanges(self, ranges: Iterable[tuple[int, int]]) -> None:
+        "Adds every `(start, end)` pair, ignoring the empty ones"
+        self._specialRangesIndex.addRanges((start, end) for start, end in ranges if start < end)
+
+class SegmentsIntervalIndex:
+    """Allows to quickly find which segments contain a given address.
+
+    The address space is split at every start and end of the indexed segments, producing a sorted list of elementary
+    intervals. Each interval stores every segment which contains it, keeping the order in which the segments were
+    passed to the constructor. Querying an address is a binary search over the list of intervals.
+    """
+
+    def __init__(self, segmentRanges: list[tuple[int, int, SymbolsSegment]]):
+        boundaries: set[int] = set()
+        for start, end, _ in segmentRanges:
+            if start < end:
+                boundaries.add(start)
+                boundaries.add(end)
+
+        self.boundaries: list[int] = sorted(boundaries)
+        segmentsPerInterval: list[list[SymbolsSegment]] = [[] for _ in self.boundaries]
+
+        for start, end, segment in segmentRanges:
+            if start >= end:
+                continue
+            startIndex = bisect.bisect_left(self.boundaries, start)
+            endIndex = bisect.bisect_left(self.boundaries, end)
+            for i in range(startIndex, endIndex):
+                segmentsPerInterval[i].append(segment)
+
+        self.segmentsPerInterval: list[tuple[SymbolsSegment, ...]] = [tuple(x) for x in segmentsPerInterval]
+
+    def getSegmentsContaining(self, address: int) -> tuple[SymbolsSegment, ...]:
+        index = bisect.bisect_right(self.boundaries, address) - 1
+        if index < 0:
+            return ()
+        return self.segmentsPerInterval[index]
+
 
 class Context:
     N64DefaultBanned = {
@@ -72,7 +183,16 @@ class Context:
         0x80000020,
     }
 
-    def __init__(self):
+    def __init__(self, config: GlobalConfigType|None=None):
+        self.config: GlobalConfigType = getActiveGlobalConfig().copy() if config is None else config
+        """The configuration to disassemble with when using this context.
+
+        Defaults to a copy of the configuration `GlobalConfig` refers to when the context is created, so contexts
+        don't share their configuration unless the same object is passed to each one of them. It is only used inside
+        the context's `activate` block, which is where any code changing `GlobalConfig` for this context must run,
+        including parsing an elf file with `Elf32File`. Outside of it `GlobalConfig` keeps referring to the
+        process-wide configuration."""
+
         # Arbitrary initial range
         self.globalSegment = SymbolsSegment(self, 0x0, 0x1000, 0x80000000, 0x80001000, overlayCategory=None)
         # For symbols that we don't know where they come from
@@ -82,18 +202,28 @@ class Context:
         self.overlaySegments: dict[str, dict[int, SymbolsSegment]] = dict()
         "Outer key is overlay type, inner key is the vrom of the overlay's segment"
 
+        self._overlaySegmentsVromIndex: SegmentsIntervalIndex|None = None
+        self._overlaySegmentsVramIndex: SegmentsIntervalIndex|None = None
+
         self.totalVramRange: SymbolsRanges = SymbolsRanges(self.globalSegment.vramStart, self.globalSegment.vramEnd)
         self._defaultVramRanges: bool = True
 
         # Stuff that looks like pointers, but the disassembler shouldn't count it as a pointer
         self.bannedSymbols: set[int] = set()
-        self.bannedRangedSymbols: list[AddressRange] = list()
+        self._bannedRangesIndex = AddressRangesIndex()
 
         self.globalRelocationOverrides: dict[int, RelocationInfo] = dict()
         "key: vrom address"
 
         self.gpAccesses = GpAccessContainer()
 
+        self.stats: RunStats = RunStats()
+        "Timings and counters of the work done with this context, see `getStatsReport`"
+
+    def activate(self) -> contextlib.AbstractContextManager[GlobalConfigType]:
+        "Makes `GlobalConfig` refer to this context's configuration on the current thread until the `with` block ends"
+        return self.config.activate()
+
 
     def changeGlobalSegmentRanges(self, vromStart: int, vromEnd: int, vramStart: int, vramEnd: int):
         if vromStart == vromEnd:
@@ -113,6 +243,7 @@ class Context:
             self.overlaySegments[overlayCategory] = dict()
         segment = SymbolsSegment(self, segmentVromStart, segmentVromEnd, segmentVramStart, segmentVramEnd, overlayCategory=overlayCategory)
         self.overlaySegments[overlayCategory][segmentVromStart] = segment
+        self.invalidateSegmentsIndex()
 
         if self._defaultVramRanges:
             self.totalVramRange.mainAddressRange.start = segmentVramStart
@@ -123,6 +254,38 @@ class Context:
 
         return segment
 
+    def invalidateSegmentsIndex(self) -> None:
+        """Discards the indices used to lookup overlay segments by address.
+
+        This is done automatically when an overlay segment is added or the ranges of a segment change. It only needs to
+        be called manually if `overlaySegments` is modified directly."""
+        self._overlaySegmentsVromIndex = None
+        self._overlaySegmentsVramIndex = None
+
+    def getOverlaySegmentsByVrom(self, vrom: int) -> tuple[SymbolsSegment, ...]:
+        """Returns every overlay segment which contains the given vrom address, in the same order as they would be
+        found when iterating `overlaySegments`."""
+        if self._overlaySegmentsVromIndex is None:
+            segmentRanges: list[tuple[int, int, SymbolsSegment]] = []
+            for segmentsPerVrom in self.overlaySegments.values():
+                for segmentVrom, overlaySegment in segmentsPerVrom.items():
+                    if overlaySegment.vromStart is None or overlaySegment.vromEnd is None:
+                        continue
+                    segmentRanges.append((max(segmentVrom, overlaySegment.vromStart), overlaySegment.vromEnd, overlaySegment))
+            self._overlaySegmentsVromIndex = SegmentsIntervalIndex(segmentRanges)
+        return self._overlaySegmentsVromIndex.getSegmentsContaining(vrom)
+
+    def getOverlaySegmentsByVram(self, vram: int) -> tuple[SymbolsSegment, ...]:
+        """Returns every overlay segment which contains the given vram address, in the same order as they would be
+        found when iterating `overlaySegments`."""
+        if self._overlaySegmentsVramIndex is None:
+            segmentRanges: list[tuple[int, int, SymbolsSegment]] = []
+            for segmentsPerVrom in self.overlaySegments.values():
+                for overlaySegment in segmentsPerVrom.values():
+                    segmentRanges.append((overlaySegment.vramStart, overlaySegment.vramEnd, overlaySegment))
+            self._overlaySegmentsVramIndex = SegmentsIntervalIndex(segmentRanges)
+        return self._overlaySegmentsVramIndex.getSegmentsContaining(vram)
+
     def isInTotalVramRange(self, address: int) -> bool:
         return self.totalVramRange.isInRange(address)
 
@@ -153,26 +316,82 @@ class Context:
     def addBannedSymbol(self, address: int):
         self.bannedSymbols.add(address)
 
+    @property
+    def bannedRangedSymbols(self) -> tuple[AddressRange, ...]:
+        "Copy of the banned ranges, in the order they were added. Use the `addBannedSymbolRange` methods to ban more"
+        return tuple(AddressRange(rangeStart, rangeEnd) for rangeStart, rangeEnd in self._bannedRangesIndex.getRanges())
+
     def addBannedSymbolRange(self, rangeStart: int, rangeEnd: int):
-        self.bannedRangedSymbols.append(AddressRange(rangeStart, rangeEnd))
+        self._bannedRangesIndex.addRange(rangeStart, rangeEnd)
 
     def addBannedSymbolRangeBySize(self, rangeStart: int, size: int):
-        self.bannedRangedSymbols.append(AddressRange(rangeStart, rangeStart + size))
+        self._bannedRangesIndex.addRange(rangeStart, rangeStart + size)
+
+    def addBannedSymbolRanges(self, ranges: Iterable[tuple[int, int]]):
+        "Bans every `(rangeStart, rangeEnd)` pair"
+        self._bannedRangesIndex.addRanges(ranges)
+
+    def readBannedRangesCsv(self, filepath: Path):
+        """Reads a csv where each row is either a single address to ban, or the start and end addresses of a range to
+        ban, in hex. Any column after those is ignored"""
+        if not filepath.exists():
+            return
+
+        bannedAddresses: list[int] = []
+        bannedRanges: list[tuple[int, int]] = []
+        for lineNumber, row in enumerate(Utils.readCsv(filepath), 1):
+            if len(row) == 0:
+                continue
+
+            try:
+                rangeStart = int(row[0], 16)
+                if len(row) == 1 or row[1].strip() == "":
+                    bannedAddresses.append(rangeStart)
+                    continue
+                rangeEnd = int(row[1], 16)
+            except ValueError:
+                raise RuntimeError(f"{filepath}:{lineNumber}: expected an address or a start and end address in hex, got '{','.join(row)}'")
+            if rangeEnd < rangeStart:
+                raise RuntimeError(f"{filepath}:{lineNumber}: the end of the range (0x{rangeEnd:X}) is smaller than its start (0x{rangeStart:X})")
+            bannedRanges.append((rangeStart, rangeEnd))
+
+        self.bannedSymbols.update(bannedAddresses)
+        self.addBannedSymbolRanges(bannedRanges)
 
     def isAddressBanned(self, address: int) -> bool:
         if address in self.bannedSymbols:
             return True
-        for ranged in self.bannedRangedSymbols:
-            if ranged.isInRange(address):
-                return True
-        return False
+        if len(self._bannedRangesIndex) == 0:
+            return False
+        return self._bannedRangesIndex.isInRange(address)
+
+    def getPointerCandidates(self, words: Iterable[int]) -> set[int]:
+        """Returns the values of `words` which are inside the total vram range and are not banned, so they may be
+        pointers.
+
+        Every distinct value is checked only once, and the checks which need to go through lists of ranges are only
+        done for the values which passed the cheaper ones."""
+        uniqueWords = set(words)
+
+        mainRange = self.totalVramRange.mainAddressRange
+        start = mainRange.start
+        end = mainRange.end
+        candidates = {w for w in uniqueWords if start <= w < end}
+        if self.totalVramRange.hasSpecialRanges():
+            candidates.update(w for w in uniqueWords - candidates if self.totalVramRange.isInRange(w))
+
+        candidates -= self.bannedSymbols
+        if len(self._bannedRangesIndex) > 0:
+            candidates = {w for w in candidates if not self.isAddressBanned(w)}
+        return candidates
 
     def addGlobalReloc(self, vromAddres: int, relocType: RelocType, symbol: ContextSymbol|str, addend: int=0) -> RelocationInfo:
         reloc = RelocationInfo(relocType, symbol, addend, globalReloc=True)
         self.globalRelocationOverrides[vromAddres] = reloc
         return reloc
 
-    def saveContextToFile(self, contextPath: Path):
+    def saveContextToFile(self, contextPath: Path) -> list[Path]:
+        "Saves every segment to its own csv file next to `contextPath`. Returns the paths of the written files"
         with contextPath.open("w") as f:
             self.globalSegment.saveContextToFile(f)
 
@@ -181,6 +400,7 @@ class Context:
         with unknownPath.open("w") as f:
             self.unknownSegment.saveContextToFile(f)
 
+        writtenPaths = [contextPath, unknownPath]
         for overlayCategory, segmentsPerVrom in self.overlaySegments.items():
             for segmentVrom, overlaySegment in segmentsPerVrom.items():
 
@@ -188,6 +408,60 @@ class Context:
                 ovlPath = contextPath.with_name(f"{contextPath.stem}_{overlayCategory}_{segmentVrom:06X}" + contextPath.suffix)
                 with ovlPath.open("w") as f:
                     overlaySegment.saveContextToFile(f)
+                writtenPaths.append(ovlPath)
+        return writtenPaths
+
+    def saveContextToBinaryFile(self, binaryContextPath: Path):
+        """Saves the context to a binary file, a faster to read and write alternative to the csv files of
+        `saveContextToFile`.
+
+        Every segment and their symbols, the banned symbols, the relocation overrides and the $gp accesses (GOT tables
+        and small sections) are saved. It can be loaded back with `loadContextFromBinaryFile`. Name callbacks
+        (`ContextSymbol.nameGetCallback`) are not saved."""
+        with binaryContextPath.open("wb") as f:
+            ContextBinaryWriter(self).write(f)
+
+    def loadContextFromBinaryFile(self, binaryContextPath: Path, onlyDeclared: bool=False):
+        """Loads a binary context file created by `saveContextToBinaryFile` into this context.
+
+        Symbols which already exist in this context have their information overwritten by the ones in the file, while
+        the symbols they reference are added to the existing references. Raises `RuntimeError` if the file is not a
+        binary context file or if it was created by an incompatible version.
+
+        This only loads the information stored in the context, it does not resume the analysis of a previous run:
+        sections still need to be analyzed again.
+
+        If `onlyDeclared` is `True` then only the segments, the banned symbols and the symbols declared by the user
+        (`ContextSymbol.isUserDeclared`) are loaded, the same information a symbol file can declare, without any of the
+        information found by analyzing the sections (autodetected sizes and types, references, string guesses, pointers
+        in data, etc) nor the relocation overrides and $gp accesses read from the input files. This allows to
+        disassemble the same sections again and get the same output as the run which saved the file."""
+        ContextBinaryReader(self, binaryContextPath.read_bytes(), onlyDeclared=onlyDeclared).read()
+
+    def getStatsReport(self) -> dict[str, Any]:
+        """Returns everything recorded on `stats` as a json-serializable dictionary, alongside the symbol lookup counters
+        of each segment.
+
+        The global counters `getSymbolCalls`, `getSymbolMisses` and `addSymbolCalls` are the sum of the ones of every
+        segment."""
+        segments: list[tuple[str, SymbolsSegment]] = [("global", self.globalSegment), ("unknown", self.unknownSegment)]
+        for overlayCategory, segmentsPerVrom in self.overlaySegments.items():
+            for segmentVrom, overlaySegment in segmentsPerVrom.items():
+                segments.append((f"{overlayCategory}_{segmentVrom:06X}", overlaySegment))
+
+        report = self.stats.toDict()
+        counters: dict[str, int] = report["counters"]
+        report["segments"] = []
+        for name, segment in segments:
+            segmentCounters = {
+                "getSymbolCalls": segment.getSymbolCalls,
+                "getSymbolMisses": segment.getSymbolMisses,
+                "addSymbolCalls": segment.addSymbolCalls,
+            }
+            for counterName, value in segmentCounters.items():
+                counters[counterName] = counters.get(counterName, 0) + value
+            report["segments"].append({"name": name, "symbols": len(segment.symbols), **segmentCounters})
+        return report
 
 
     @staticmethod
@@ -195,6 +469,8 @@ class Context:
         contextParser = parser.add_argument_group("Context configuration")
 
         contextParser.add_argument("--save-context", help="Saves the context to a file", metavar="FILENAME")
+        contextParser.add_argument("--save-context-binary", help="Saves the context to a binary file, which is faster to write and read than the csv of --save-context and can be used as a symbol file with --load-context-binary", metavar="FILENAME")
+        contextParser.add_argument("--load-context-binary", help="Uses a binary context file created with --save-context-binary as a symbol file, loading its segments, banned symbols and user declared symbols before reading any other symbol file. Information found by analyzing the sections is not loaded and the analysis is not resumed, so it can replace the symbol files used by the run which saved it without changing the output", metavar="FILENAME")
 
 
         csvConfig = parser.add_argument_group("Context .csv input files")
@@ -203,6 +479,7 @@ class Context:
         csvConfig.add_argument("--variables", help="Path to a variables csv", action="append")
         csvConfig.add_argument("--constants", help="Path to a constants csv", action="append")
         csvConfig.add_argument("--symbol-addrs", help="Path to a splat-compatible symbol_addrs.txt file", action="append")
+        csvConfig.add_argument("--banned-ranges", help="Path to a csv of addresses and address ranges which should never be considered as symbols", action="append")
 
 
         symbolsConfig = parser.add_argument_group("Context default symbols configuration")
@@ -215,6 +492,9 @@ class Context:
 
 
     def parseArgs(self, args: argparse.Namespace):
+        if args.load_context_binary is not None:
+            self.loadContextFromBinaryFile(Path(args.load_context_binary), onlyDeclared=True)
+
         if args.default_banned != False:
             self.fillDefaultBannedSymbols()
         if args.libultra_syms != False:
@@ -236,3 +516,6 @@ class Context:
         if args.symbol_addrs is not None:
             for filepath in args.symbol_addrs:
                 self.globalSegment.readSplatSymbolAddrs(Path(filepath))
+        if args.banned_ranges is not None:
+            for filepath in args.banned_ranges:
+                self.readBannedRangesCsv(Path(filepath))
@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO, Iterable, TYPE_CHECKING
+import rabbitizer
+
+from .SortedDict import SortedDict
+from .FileSectionType import FileSectionType
+from .ContextSymbols import SymbolSpecialType, ContextSymbol
+from .SymbolsSegment import SymbolsSegment
+from .Relocation import RelocType, RelocationInfo, RelocationStaticReference
+
+if TYPE_CHECKING:
+    from .Context import Context
+
+
+# Binary context file layout, every value is little endian:
+#
+# - Header: magic, version, amount of strings, amount of segments.
+# - String table: the length of every string, followed by every utf-8 encoded string concatenated.
+# - Banned symbols: amount of single addresses, amount of ranges, the addresses and the (start, end) pairs.
+# - Segments: a segment record followed by its symbol records, its constant records and its pointers in data.
+# - Relocation overrides: their amount followed by a record for each one. The symbol of a relocation is either a symbol
+#   index or a string index.
+# - $gp accesses: the GOT record, its locals and globals tables, and the (address, size) pairs of the small sections.
+#
+# A symbol record is a fixed size struct followed by the indices of the symbols referenced by its sets and
+# `SortedDict`s. Symbols are referenced by their index in the order they appear in the file. Strings are referenced by
+# their index in the string table.
+#
+# Bump CONTEXT_BINARY_VERSION whenever this layout, or the meaning of any field, changes.
+
+CONTEXT_BINARY_MAGIC = b"SPIMCTX\0"
+CONTEXT_BINARY_VERSION = 2
+
+_NONE_INDEX = 0xFFFFFFFF
+_NONE_SYMBOL = -1
+_NONE_ACCESS_TYPE = -1
+
+_SEGMENT_KIND_GLOBAL = 0
+_SEGMENT_KIND_UNKNOWN = 1
+_SEGMENT_KIND_OVERLAY = 2
+
+_headerStruct = struct.Struct("<8sIII")
+_bannedStruct = struct.Struct("<II")
+_segmentStruct = struct.Struct("<BBqqqqqIIII")
+_symbolStruct = struct.Struct("<qq6qBQ6IhbiiIIII")
+_relocStruct = struct.Struct("<qiBqqiq")
+_gotStruct = struct.Struct("<BqIII")
+
+_RELOC_FLAG_SYMBOL_IS_STRING = 1 << 0
+_RELOC_FLAG_HAS_STATIC_REFERENCE = 1 << 1
+_RELOC_FLAG_GLOBAL = 1 << 2
+
+_optionalIntFields: tuple[str, ...] = (
+    "userDeclaredSize",
+    "autodetectedSize",
+    "vromAddress",
+    "inFileOffset",
+    "gotIndex",
+    "firstLoAccess",
+)
+_stringFields: tuple[str, ...] = (
+    "name",
+    "nameEnd",
+    "parentFileName",
+    "overlayCategory",
+)
+_boolFields: tuple[str, ...] = (
+    "isDefined",
+    "isUserDeclared",
+    "isAutogenerated",
+    "isMaybeString",
+    "failedStringDecoding",
+    "isMaybePascalString",
+    "failedPascalStringDecoding",
+    "unknownSegment",
+    "isGot",
+    "isGotGlobal",
+    "isGotLocal",
+    "accessedAsGpRel",
+    "_isStatic",
+    "isAutoCreatedPad",
+    "isElfNotype",
+    "forceMigration",
+    "forceNotMigration",
+    "allowedToReferenceAddends",
+    "notAllowedToReferenceAddends",
+    "allowedToReferenceConstants",
+    "notAllowedToReferenceConstants",
+    "isAutocreatedSymFromOtherSizedSym",
+    "isMips1Double",
+)
+
+# Fields restored when only loading the symbols declared by the user. Every other field is filled by analyzing the
+# sections, so restoring it would make the analysis of the same sections produce different results.
+_declaredFields: frozenset[str] = frozenset({
+    "userDeclaredSize",
+    "vromAddress",
+    "gotIndex",
+    "name",
+    "nameEnd",
+    "overlayCategory",
+    "isDefined",
+    "isUserDeclared",
+    "isAutogenerated",
+    "isGot",
+    "isGotGlobal",
+    "isGotLocal",
+    "_isStatic",
+    "isElfNotype",
+    "forceMigration",
+    "forceNotMigration",
+    "allowedToReferenceAddends",
+    "notAllowedToReferenceAddends",
+    "allowedToReferenceConstants",
+    "notAllowedToReferenceConstants",
+})
+
+# Extra flags stored after the bool fields
+_FLAG_USER_TYPE_SPECIAL = 1 << len(_boolFields)
+_FLAG_AUTO_TYPE_SPECIAL = 1 << (len(_boolFields) + 1)
+_FLAG_HAS_UNSIGNED_ACCESS = 1 << (len(_boolFields) + 2)
+_FLAG_UNSIGNED_ACCESS = 1 << (len(_boolFields) + 3)
+
+_accessTypesByValue: dict[int, rabbitizer.Enum] = {
+    accessType.value: accessType for accessType in vars(rabbitizer.AccessType).values() if isinstance(accessType, rabbitizer.Enum)
+}
+
+
+class ContextBinaryWriter:
+    def __init__(self, context: Context):
+        self.context = context
+
+        self._strings: list[str] = []
+        self._stringIndices: dict[str, int] = dict()
+
+        self._symbolIndices: dict[int, int] = dict()
+        "key: id of the ContextSymbol"
+
+    def _internString(self, string: str|None) -> int:
+        if string is None:
+            return _NONE_INDEX
+        index = self._stringIndices.get(string)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(string)
+            self._stringIndices[string] = index
+        return index
+
+    def _internType(self, symType: SymbolSpecialType|str|None) -> tuple[int, bool]:
+        if isinstance(symType, SymbolSpecialType):
+            return self._internString(symType.name), True
+        return self._internString(symType), False
+
+    def _symbolIndex(self, contextSym: ContextSymbol|None) -> int:
+        if contextSym is None:
+            return _NONE_SYMBOL
+        return self._symbolIndices.get(id(contextSym), _NONE_SYMBOL)
+
+    def _symbolIndicesList(self, symbols: Iterable[ContextSymbol]) -> list[int]:
+        indices = [self._symbolIndex(sym) for sym in symbols]
+        return [index for index in indices if index != _NONE_SYMBOL]
+
+    def _getSegments(self) -> list[tuple[int, int, SymbolsSegment]]:
+        segments: list[tuple[int, int, SymbolsSegment]] = [
+            (_SEGMENT_KIND_GLOBAL, 0, self.context.globalSegment),
+            (_SEGMENT_KIND_UNKNOWN, 0, self.context.unknownSegment),
+        ]
+        for segmentsPerVrom in self.context.overlaySegments.values():
+            for segmentVrom, overlaySegment in segmentsPerVrom.items():
+                segments.append((_SEGMENT_KIND_OVERLAY, segmentVrom, overlaySegment))
+        return segments
+
+    def _writeSymbol(self, output: bytearray, contextSym: ContextSymbol) -> None:
+        noneMask = 0
+        optionalInts: list[int] = []
+        for i, fieldName in enumerate(_optionalIntFields):
+            value = getattr(contextSym, fieldName)
+            if value is None:
+                noneMask |= 1 << i
+                value = 0
+            optionalInts.append(value)
+
+        flags = 0
+        for i, fieldName in enumerate(_boolFields):
+            if getattr(contextSym, fieldName):
+                flags |= 1 << i
+
+        userTypeIndex, userTypeIsSpecial = self._internType(contextSym.userDeclaredType)
+        autoTypeIndex, autoTypeIsSpecial = self._internType(contextSym.autodetectedType)
+        if userTypeIsSpecial:
+            flags |= _FLAG_USER_TYPE_SPECIAL
+        if autoTypeIsSpecial:
+            flags |= _FLAG_AUTO_TYPE_SPECIAL
+        if contextSym.unsignedAccessType is not None:
+            flags |= _FLAG_HAS_UNSIGNED_ACCESS
+            if contextSym.unsignedAccessType:
+                flags |= _FLAG_UNSIGNED_ACCESS
+
+        accessType = _NONE_ACCESS_TYPE if contextSym.accessType is None else contextSym.accessType.value
+
+        # Sets are sorted so saving the same context always produces the same file
+        referenceFunctions = sorted(self._symbolIndicesList(contextSym.referenceFunctions)) if contextSym.hasReferenceFunctions() else []
+        referenceSymbols = sorted(self._symbolIndicesList(contextSym.referenceSymbols)) if contextSym.hasReferenceSymbols() else []
+        branchLabels = self._symbolIndicesList(contextSym.branchLabels.values()) if contextSym.hasBranchLabels() else []
+        jumpTables = self._symbolIndicesList(contextSym.jumpTables.values()) if contextSym.hasJumpTables() else []
+
+        output += _symbolStruct.pack(
+            contextSym.address,
+            contextSym.referenceCounter,
+            *optionalInts,
+            noneMask,
+            flags,
+            *(self._internString(getattr(contextSym, fieldName)) for fieldName in _stringFields),
+            userTypeIndex,
+            autoTypeIndex,
+            accessType,
+            contextSym.sectionType.value,
+            self._symbolIndex(contextSym.parentFunction),
+            self._symbolIndex(contextSym.autoCreatedPadMainSymbol),
+            len(referenceFunctions),
+            len(referenceSymbols),
+            len(branchLabels),
+            len(jumpTables),
+        )
+        references = referenceFunctions + referenceSymbols + branchLabels + jumpTables
+        if len(references) > 0:
+            output += struct.pack(f"<{len(references)}i", *references)
+
+    def _writeRelocs(self, output: bytearray) -> None:
+        output += struct.pack("<I", len(self.context.globalRelocationOverrides))
+        for vrom, relocInfo in sorted(self.context.globalRelocationOverrides.items()):
+            flags = 0
+            symbolIndex = _NONE_SYMBOL
+            if isinstance(relocInfo.symbol, ContextSymbol):
+                symbolIndex = self._symbolIndex(relocInfo.symbol)
+            if symbolIndex == _NONE_SYMBOL:
+                # Symbols which don't belong to any segment are saved by name
+                flags |= _RELOC_FLAG_SYMBOL_IS_STRING
+                symbolIndex = self._internString(relocInfo.symbol.getName() if isinstance(relocInfo.symbol, ContextSymbol) else relocInfo.symbol)
+            if relocInfo.staticReference is not None:
+                flags |= _RELOC_FLAG_HAS_STATIC_REFERENCE
+            if relocInfo.globalReloc:
+                flags |= _RELOC_FLAG_GLOBAL
+
+            staticReference = relocInfo.staticReference
+            output += _relocStruct.pack(
+                vrom,
+                relocInfo.relocType.value,
+                flags,
+                symbolIndex,
+                relocInfo.addend,
+                staticReference.sectionType.value if staticReference is not None else 0,
+                staticReference.sectionVram if staticReference is not None else 0,
+            )
+
+    def _writeGpAccesses(self, output: bytearray) -> None:
+        got = self.context.gpAccesses.got
+        smallSections = list(self.context.gpAccesses.smallSections.values())
+        output += _gotStruct.pack(
+            got.tableAddress is not None,
+            got.tableAddress if got.tableAddress is not None else 0,
+            len(got.localsTable),
+            len(got.globalsTable),
+            len(smallSections),
+        )
+        output += struct.pack(f"<{len(got.localsTable)}q", *got.localsTable)
+        output += struct.pack(f"<{len(got.globalsTable)}q", *got.globalsTable)
+        for smallSection in smallSections:
+            output += struct.pack("<qq", smallSection.address, smallSection.size)
+
+    def write(self, f: BinaryIO) -> None:
+        segments = self._getSegments()
+
+        # Assign every symbol its index before writing anything, so references can point forward
+        for _, _, segment in segments:
+            for _, contextSym in segment.symbols.items():
+                self._symbolIndices[id(contextSym)] = len(self._symbolIndices)
+            for contextSym in segment.constants.values():
+                self._symbolIndices[id(contextSym)] = len(self._symbolIndices)
+
+        body = bytearray()
+
+        bannedRanges = self.context.bannedRangedSymbols
+        body += _bannedStruct.pack(len(self.context.bannedSymbols), len(bannedRanges))
+        bannedSymbols = sorted(self.context.bannedSymbols)
+        body += struct.pack(f"<{len(bannedSymbols)}q", *bannedSymbols)
+        for bannedRange in bannedRanges:
+            body += struct.pack("<qq", bannedRange.start, bannedRange.end)
+
+        for kind, segmentVrom, segment in segments:
+            hasVrom = segment.vromStart is not None and segment.vromEnd is not None
+            body += _segmentStruct.pack(
+                kind,
+                hasVrom,
+                segmentVrom,
+                segment.vromStart if segment.vromStart is not None else 0,
+                segment.vromEnd if segment.vromEnd is not None else 0,
+                segment.vramStart,
+                segment.vramEnd,
+                self._internString(segment.overlayCategory),
+                len(segment.symbols),
+                len(segment.constants),
+                len(segment.newPointersInData),
+            )
+            for _, contextSym in segment.symbols.items():
+                self._writeSymbol(body, contextSym)
+            for contextSym in segment.constants.values():
+                self._writeSymbol(body, contextSym)
+            pointers = list(segment.newPointersInData)
+            body += struct.pack(f"<{len(pointers)}q", *pointers)
+
+        self._writeRelocs(body)
+        self._writeGpAccesses(body)
+
+        encodedStrings = [string.encode("utf-8") for string in self._strings]
+
+        f.write(_headerStruct.pack(CONTEXT_BINARY_MAGIC, CONTEXT_BINARY_VERSION, len(encodedStrings), len(segments)))
+        f.write(struct.pack(f"<{len(encodedStrings)}I", *(len(string) for string in encodedStrings)))
+        f.write(b"".join(encodedStrings))
+        f.write(body)
+
+
+class ContextBinaryReader:
+    def __init__(self, context: Context, data: bytes, onlyDeclared: bool=False):
+        self.context = context
+        self.data = data
+        self.offset = 0
+
+        self.onlyDeclared = onlyDeclared
+        """Only load the symbols declared by the user and their declared information, see `_declaredFields`. Relocation
+        overrides and $gp accesses are not loaded either, the frontends add them again from their inputs"""
+
+        self._strings: list[str] = []
+        self._symbols: list[ContextSymbol] = []
+        self._pendingReferences: list[tuple[ContextSymbol, int, int, list[int]]] = []
+
+    def _unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def _unpackArray(self, typeCode: str, count: int) -> tuple:
+        if count == 0:
+            return ()
+        fmt = f"<{count}{typeCode}"
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def _getString(self, index: int) -> str|None:
+        if index == _NONE_INDEX:
+            return None
+        return self._strings[index]
+
+    def _getType(self, index: int, isSpecial: bool) -> SymbolSpecialType|str|None:
+        string = self._getString(index)
+        if string is not None and isSpecial:
+            return SymbolSpecialType[string]
+        return string
+
+    def _getSegment(self, kind: int, segmentVrom: int, hasVrom: bool, vromStart: int, vromEnd: int, vramStart: int, vramEnd: int, overlayCategory: str|None) -> SymbolsSegment:
+        if kind == _SEGMENT_KIND_GLOBAL:
+            if hasVrom:
+                self.context.changeGlobalSegmentRanges(vromStart, vromEnd, vramStart, vramEnd)
+            return self.context.globalSegment
+        if kind == _SEGMENT_KIND_UNKNOWN:
+            return self.context.unknownSegment
+
+        assert overlayCategory is not None
+        segment = self.context.overlaySegments.get(overlayCategory, {}).get(segmentVrom)
+        if segment is None:
+            segment = self.context.addOverlaySegment(overlayCategory, segmentVrom, segmentVrom, vramStart, vramEnd)
+            if hasVrom:
+                segment.changeRanges(vromStart, vromEnd, vramStart, vramEnd)
+        return segment
+
+    def _readSymbol(self, symbolsDict: SortedDict[ContextSymbol]|dict[int, ContextSymbol]) -> None:
+        values = self._unpack(_symbolStruct)
+        address, referenceCounter = values[0:2]
+        optionalInts = values[2:8]
+        noneMask, flags = values[8:10]
+        stringIndices = values[10:14]
+        userTypeIndex, autoTypeIndex, accessType, sectionType = values[14:18]
+        parentFunction, autoCreatedPadMainSymbol = values[18:20]
+        counts = values[20:24]
+
+        if self.onlyDeclared:
+            self._unpackArray("i", sum(counts))
+            if flags & (1 << _boolFields.index("isUserDeclared")):
+                self._readDeclaredSymbol(symbolsDict, address, optionalInts, noneMask, flags, stringIndices, userTypeIndex)
+            return
+
+        contextSym = symbolsDict.get(address)
+        if contextSym is None:
+            contextSym = ContextSymbol(address)
+            symbolsDict[address] = contextSym
+        self._symbols.append(contextSym)
+
+        contextSym.referenceCounter = referenceCounter
+        for i, fieldName in enumerate(_optionalIntFields):
+            setattr(contextSym, fieldName, None if noneMask & (1 << i) else optionalInts[i])
+        for i, fieldName in enumerate(_boolFields):
+            setattr(contextSym, fieldName, bool(flags & (1 << i)))
+        for fieldName, stringIndex in zip(_stringFields, stringIndices):
+            setattr(contextSym, fieldName, self._getString(stringIndex))
+
+        contextSym.userDeclaredType = self._getType(userTypeIndex, bool(flags & _FLAG_USER_TYPE_SPECIAL))
+        contextSym.autodetectedType = self._getType(autoTypeIndex, bool(flags & _FLAG_AUTO_TYPE_SPECIAL))
+        contextSym.accessType = None if accessType == _NONE_ACCESS_TYPE else _accessTypesByValue[accessType]
+        contextSym.unsignedAccessType = bool(flags & _FLAG_UNSIGNED_ACCESS) if flags & _FLAG_HAS_UNSIGNED_ACCESS else None
+        contextSym.sectionType = FileSectionType.fromId(sectionType)
+
+        references = list(self._unpackArray("i", sum(counts)))
+        if parentFunction != _NONE_SYMBOL or autoCreatedPadMainSymbol != _NONE_SYMBOL or len(references) > 0:
+            self._pendingReferences.append((contextSym, parentFunction, autoCreatedPadMainSymbol, [*counts, *references]))
+
+    def _readDeclaredSymbol(self, symbolsDict: SortedDict[ContextSymbol]|dict[int, ContextSymbol], address: int, optionalInts: tuple, noneMask: int, flags: int, stringIndices: tuple, userTypeIndex: int) -> None:
+        contextSym = symbolsDict.get(address)
+        if contextSym is None:
+            contextSym = ContextSymbol(address)
+            symbolsDict[address] = contextSym
+
+        for i, fieldName in enumerate(_optionalIntFields):
+            if fieldName in _declaredFields:
+                setattr(contextSym, fieldName, None if noneMask & (1 << i) else optionalInts[i])
+        for i, fieldName in enumerate(_boolFields):
+            if fieldName in _declaredFields:
+                setattr(contextSym, fieldName, bool(flags & (1 << i)))
+        for fieldName, stringIndex in zip(_stringFields, stringIndices):
+            if fieldName in _declaredFields:
+                setattr(contextSym, fieldName, self._getString(stringIndex))
+
+        contextSym.userDeclaredType = self._getType(userTypeIndex, bool(flags & _FLAG_USER_TYPE_SPECIAL))
+
+    def _resolveReferences(self) -> None:
+        for contextSym, parentFunction, autoCreatedPadMainSymbol, references in self._pendingReferences:
+            if parentFunction != _NONE_SYMBOL:
+                contextSym.parentFunction = self._symbols[parentFunction]
+            if autoCreatedPadMainSymbol != _NONE_SYMBOL:
+                contextSym.autoCreatedPadMainSymbol = self._symbols[autoCreatedPadMainSymbol]
+
+            referenceFunctionsCount, referenceSymbolsCount, branchLabelsCount, jumpTablesCount = references[0:4]
+            offset = 4
+            for index in references[offset:offset+referenceFunctionsCount]:
+                contextSym.referenceFunctions.add(self._symbols[index])
+            offset += referenceFunctionsCount
+            for index in references[offset:offset+referenceSymbolsCount]:
+                contextSym.referenceSymbols.add(self._symbols[index])
+            offset += referenceSymbolsCount
+            if branchLabelsCount > 0:
+                contextSym.branchLabels.bulkLoad((self._symbols[index].vram, self._symbols[index]) for index in references[offset:offset+branchLabelsCount])
+            offset += branchLabelsCount
+            if jumpTablesCount > 0:
+                contextSym.jumpTables.bulkLoad((self._symbols[index].vram, self._symbols[index]) for index in references[offset:offset+jumpTablesCount])
+
+    def _readRelocs(self) -> None:
+        (relocCount,) = self._unpackArray("I", 1)
+        for _ in range(relocCount):
+            vrom, relocTypeValue, flags, symbolIndex, addend, sectionType, sectionVram = self._unpack(_relocStruct)
+            if self.onlyDeclared:
+                continue
+
+            relocType = RelocType.fromValue(relocTypeValue)
+            if relocType is None:
+                raise RuntimeError(f"Invalid relocation type {relocTypeValue} for the relocation at vrom 0x{vrom:X}")
+            symbol: ContextSymbol|str
+            if flags & _RELOC_FLAG_SYMBOL_IS_STRING:
+                symbol = self._strings[symbolIndex]
+            else:
+                symbol = self._symbols[symbolIndex]
+            staticReference = None
+            if flags & _RELOC_FLAG_HAS_STATIC_REFERENCE:
+                staticReference = RelocationStaticReference(FileSectionType.fromId(sectionType), sectionVram)
+            self.context.globalRelocationOverrides[vrom] = RelocationInfo(relocType, symbol, addend, staticReference, bool(flags & _RELOC_FLAG_GLOBAL))
+
+    def _readGpAccesses(self) -> None:
+        hasTable, tableAddress, localsCount, globalsCount, smallSectionsCount = self._unpack(_gotStruct)
+        localsTable = self._unpackArray("q", localsCount)
+        globalsTable = self._unpackArray("q", globalsCount)
+        smallSections = self._unpackArray("q", 2*smallSectionsCount)
+        if self.onlyDeclared:
+            return
+
+        if hasTable:
+            self.context.gpAccesses.got.initTables(tableAddress, list(localsTable), list(globalsTable))
+        for address, size in zip(smallSections[0::2], smallSections[1::2]):
+            self.context.gpAccesses.addSmallSection(address, size)
+
+    def read(self) -> None:
+        magic, version, stringCount, segmentCount = self._unpack(_headerStruct)
+        if magic != CONTEXT_BINARY_MAGIC:
+            raise RuntimeError("Not a binary context file: wrong magic")
+        if version != CONTEXT_BINARY_VERSION:
+            raise RuntimeError(f"Unsupported binary context file version: {version} (expected {CONTEXT_BINARY_VERSION})")
+
+        stringLengths = self._unpackArray("I", stringCount)
+        for length in stringLengths:
+            self._strings.append(self.data[self.offset:self.offset+length].decode("utf-8"))
+            self.offset += length
+
+        bannedSymbolsCount, bannedRangesCount = self._unpack(_bannedStruct)
+        self.context.bannedSymbols.update(self._unpackArray("q", bannedSymbolsCount))
+        bannedRanges = self._unpackArray("q", 2*bannedRangesCount)
+        self.context.addBannedSymbolRanges(zip(bannedRanges[0::2], bannedRanges[1::2]))
+
+        for _ in range(segmentCount):
+            kind, hasVrom, segmentVrom, vromStart, vromEnd, vramStart, vramEnd, overlayCategoryIndex, symbolCount, constantCount, pointerCount = self._unpack(_segmentStruct)
+            segment = self._getSegment(kind, segmentVrom, bool(hasVrom), vromStart, vromEnd, vramStart, vramEnd, self._getString(overlayCategoryIndex))
+
+            for _ in range(symbolCount):
+                self._readSymbol(segment.symbols)
+            for _ in range(constantCount):
+                self._readSymbol(segment.constants)
+            pointers = self._unpackArray("q", pointerCount)
+            if not self.onlyDeclared:
+                for pointer in pointers:
+                    segment.addPointerInDataReference(pointer)
+
+        self._resolveReferences()
+
+        self._readRelocs()
+        self._readGpAccesses()
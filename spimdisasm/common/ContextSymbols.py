@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import dataclasses
 import enum
-from typing import Callable
+from typing import Any, Callable, ClassVar, TypeVar
 import rabbitizer
 
 from .GlobalConfig import GlobalConfig, Compiler
@@ -97,6 +97,62 @@ for kind in gAccessKinds.values():
     gKnownTypes |= kind.getAllTypes()
 
 
+_T = TypeVar("_T")
+
+def _lazyField(factory: Callable[[], Any]) -> Any:
+    """Declares a dataclass field whose default value is only created by `factory` when the field is read for the first
+    time, instead of when the instance is created.
+
+    Only supported on classes decorated with `_slottedDataclass`."""
+    return dataclasses.field(default=None, metadata={"lazyFactory": factory})
+
+def _makeLazyProperty(slot: Any, factory: Callable[[], Any]) -> property:
+    getSlot = slot.__get__
+    setSlot = slot.__set__
+
+    def getter(self: Any) -> Any:
+        value = getSlot(self)
+        if value is None:
+            value = factory()
+            setSlot(self, value)
+        return value
+
+    def setter(self: Any, value: Any) -> None:
+        setSlot(self, value)
+
+    return property(getter, setter)
+
+def _slottedDataclass(cls: type[_T]) -> type[_T]:
+    """Rebuilds a dataclass so its instances use `__slots__` instead of a `__dict__`.
+
+    Equivalent to `@dataclasses.dataclass(slots=True)`, which is not available before Python 3.10.
+
+    Fields declared with `_lazyField` are stored in a slot with the same name prefixed by an underscore, and exposed
+    through a property which creates their value on first use.
+    """
+    fields = dataclasses.fields(cls) # type: ignore[arg-type]
+    lazyFields = {field.name: field.metadata["lazyFactory"] for field in fields if "lazyFactory" in field.metadata}
+    slotNames = tuple(f"_{field.name}" if field.name in lazyFields else field.name for field in fields)
+
+    clsDict = dict(cls.__dict__)
+    clsDict["__slots__"] = slotNames
+    for field in fields:
+        # Default values are already baked into the generated `__init__`, and
+        # class attributes with the same name as a slot are not allowed
+        clsDict.pop(field.name, None)
+    clsDict.pop("__dict__", None)
+    clsDict.pop("__weakref__", None)
+
+    newCls: type[_T] = type(cls.__name__, cls.__bases__, clsDict)
+    newCls.__qualname__ = cls.__qualname__
+
+    for fieldName, factory in lazyFields.items():
+        # The generated `__init__` assigns the field by its public name, which goes through the property's setter
+        setattr(newCls, fieldName, _makeLazyProperty(newCls.__dict__[f"_{fieldName}"], factory))
+    return newCls
+
+
+@_slottedDataclass
 @dataclasses.dataclass
 class ContextSymbol:
     address: int
@@ -130,16 +186,16 @@ class ContextSymbol:
     referenceCounter: int = 0
     "How much this symbol is referenced by something else"
 
-    referenceFunctions: set[ContextSymbol] = dataclasses.field(default_factory=set)
+    referenceFunctions: set[ContextSymbol] = _lazyField(set)
     "Which functions reference this symbol"
-    referenceSymbols: set[ContextSymbol] = dataclasses.field(default_factory=set)
+    referenceSymbols: set[ContextSymbol] = _lazyField(set)
     "Which symbols reference this symbol"
 
     parentFunction: ContextSymbol|None = None
     "Parent function for branch labels, jump tables, and jump table labels"
-    branchLabels: SortedDict[ContextSymbol] = dataclasses.field(default_factory=SortedDict)
+    branchLabels: SortedDict[ContextSymbol] = _lazyField(SortedDict)
     "For functions, the branch and jump table labels which are contained in this function"
-    jumpTables: SortedDict[ContextSymbol] = dataclasses.field(default_factory=SortedDict)
+    jumpTables: SortedDict[ContextSymbol] = _lazyField(SortedDict)
     "For functions, the jump tables which are contained in this function"
 
     parentFileName: str|None = None
@@ -205,6 +261,27 @@ class ContextSymbol:
     def vram(self) -> int:
         return self.address
 
+    # The reference sets, `branchLabels` and `jumpTables` are only allocated
+    # when they are used for the first time, since most symbols (branch labels,
+    # autogenerated data symbols, etc) never need all of them.
+    # Their slots are only read directly to avoid allocating them.
+    _referenceFunctions: ClassVar[set[ContextSymbol]|None]
+    _referenceSymbols: ClassVar[set[ContextSymbol]|None]
+    _branchLabels: ClassVar[SortedDict[ContextSymbol]|None]
+    _jumpTables: ClassVar[SortedDict[ContextSymbol]|None]
+
+    def hasReferenceFunctions(self) -> bool:
+        return self._referenceFunctions is not None and len(self._referenceFunctions) > 0
+
+    def hasReferenceSymbols(self) -> bool:
+        return self._referenceSymbols is not None and len(self._referenceSymbols) > 0
+
+    def hasBranchLabels(self) -> bool:
+        return self._branchLabels is not None and len(self._branchLabels) > 0
+
+    def hasJumpTables(self) -> bool:
+        return self._jumpTables is not None and len(self._jumpTables) > 0
+
     #! @deprecated
     @property
     def size(self) -> int|None:
@@ -626,13 +703,13 @@ class ContextSymbol:
         if not GlobalConfig.ASM_COMMENT or not GlobalConfig.ASM_REFERENCEE_SYMBOLS:
             return ""
 
-        if len(self.referenceFunctions):
+        if self.hasReferenceFunctions():
             output = "# Functions referencing this symbol:"
             for sym in self.referenceFunctions:
                 output += f" {sym.getName()}"
             return f"{output}{GlobalConfig.LINE_ENDS}"
 
-        if len(self.referenceSymbols):
+        if self.hasReferenceSymbols():
             output = "# Symbols referencing this symbol:"
             for sym in self.referenceSymbols:
                 output += f" {sym.getName()}"
@@ -5,7 +5,8 @@
 
 from __future__ import annotations
 
-from typing import Generator
+import io
+from typing import Generator, TextIO
 
 from .GlobalConfig import GlobalConfig
 from .ContextSymbols import ContextSymbol
@@ -122,14 +123,23 @@ class ElementBase:
         return f"/* Generated by spimdisasm {__version__} */{GlobalConfig.LINE_ENDS}{GlobalConfig.LINE_ENDS}"
 
 
-    def disassemble(self, migrate: bool=False, useGlobalLabel: bool=True) -> str:
-        """Produces a disassembly of this element.
+    def disassembleTo(self, writer: TextIO, migrate: bool=False, useGlobalLabel: bool=True) -> None:
+        """Writes the disassembly of this element to `writer`, piece by piece.
 
         Elements assume the `analyze` method was already called at this point.
 
         This method can be called as many times as the user wants to.
         """
-        return ""
+        pass
+
+    def disassemble(self, migrate: bool=False, useGlobalLabel: bool=True) -> str:
+        """Produces a disassembly of this element.
+
+        Wrapper around `disassembleTo`, subclasses should override that method instead.
+        """
+        writer = io.StringIO()
+        self.disassembleTo(writer, migrate=migrate, useGlobalLabel=useGlobalLabel)
+        return writer.getvalue()
 
 
     def getSegment(self) -> SymbolsSegment:
@@ -196,16 +206,38 @@ class ElementBase:
                         return overlaySegment
 
             # If the vrom was not part of that segment, then check for every other overlay category
-            for overlayCategory, segmentsPerVrom in self.context.overlaySegments.items():
-                if self.overlayCategory != overlayCategory:
-                    for segmentVrom, overlaySegment in segmentsPerVrom.items():
-                        if vrom < segmentVrom:
-                            continue
-                        if overlaySegment.isVromInRange(vrom):
-                            return overlaySegment
+            for overlaySegment in self.context.getOverlaySegmentsByVrom(vrom):
+                if self.overlayCategory != overlaySegment.overlayCategory:
+                    return overlaySegment
 
         return self.context.unknownSegment
 
+    def getSegmentForVromRange(self, vromStart: int, vromEnd: int) -> SymbolsSegment|None:
+        """Returns the segment `getSegmentForVrom` returns for every vrom of the [`vromStart`, `vromEnd`) range, or
+        None if it may not be the same one for the whole range"""
+        segment = self.getSegmentForVrom(vromStart)
+        if vromEnd - vromStart <= 1:
+            return segment
+
+        globalSegment = self.context.globalSegment
+        if segment is globalSegment:
+            if globalSegment.isVromInRange(vromEnd - 1):
+                return segment
+            return None
+
+        if self.overlayCategory is None:
+            return None
+        segmentsPerVrom = self.context.overlaySegments.get(self.overlayCategory, None)
+        if segmentsPerVrom is None or segmentsPerVrom.get(self.segmentVromStart, None) is not segment:
+            return None
+        if not segment.isVromInRange(vromEnd - 1):
+            return None
+        if globalSegment.vromStart is not None and globalSegment.vromEnd is not None:
+            if globalSegment.vromStart < vromEnd and vromStart < globalSegment.vromEnd:
+                # Part of the range belongs to the global segment
+                return None
+        return segment
+
 
     def getSymbol(self, vramAddress: int, *, vromAddress: int|None=None, tryPlusOffset: bool=True, checkUpperLimit: bool=True, checkGlobalSegment: bool=True) -> ContextSymbol|None:
         "Searches symbol or a symbol with an addend if `tryPlusOffset` is True"
@@ -232,16 +264,13 @@ class ElementBase:
                         return contextSym
 
             # If the vram was not part of that segment, then check for every other overlay category
-            for overlayCategory, segmentsPerVrom in self.context.overlaySegments.items():
-                if self.overlayCategory != overlayCategory:
-                    for overlaySegment in segmentsPerVrom.values():
-                        if not overlaySegment.isVramInRange(vramAddress):
-                            continue
-                        contextSym = overlaySegment.getSymbol(vramAddress, tryPlusOffset=tryPlusOffset, checkUpperLimit=checkUpperLimit)
-                        if contextSym is not None:
-                            return contextSym
-
-        if not checkGlobalSegment:
+            for overlaySegment in self.context.getOverlaySegmentsByVram(vramAddress):
+                if self.overlayCategory != overlaySegment.overlayCategory:
+                    contextSym = overlaySegment.getSymbol(vramAddress, tryPlusOffset=tryPlusOffset, checkUpperLimit=checkUpperLimit)
+                    if contextSym is not None:
+                        return contextSym
+
+        if not checkGlobalSegment or not GlobalConfig.ALLOW_UNKSEGMENT:
             return None
 
         contextSym = self.context.unknownSegment.getSymbol(vramAddress, tryPlusOffset=tryPlusOffset, checkUpperLimit=checkUpperLimit)
@@ -249,8 +278,6 @@ class ElementBase:
             if contextSym is not None and contextSym.vromAddress is not None:
                 if not self._ownSegmentReference.isVromInRange(contextSym.getVrom()):
                     return None
-        if not GlobalConfig.ALLOW_UNKSEGMENT:
-            return None
         return contextSym
 
     def getSymbolByVrom(self, vromAddress: int, *, tryPlusOffset: bool = True, checkUpperLimit: bool = True) -> ContextSymbol|None:
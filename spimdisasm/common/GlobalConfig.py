@@ -6,9 +6,13 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import contextvars
+import copy
 import dataclasses
 import enum
 import os
+from typing import Any, Generator, cast
 
 from . import Utils
 from .OrderedEnum import OrderedEnum
@@ -440,6 +444,23 @@ A C string must start at a 0x4-aligned region, which is '\\0' terminated and pad
 
             setattr(self, attr, environmentValue)
 
+    def copy(self) -> GlobalConfigType:
+        "Returns an independent copy of this configuration"
+        return copy.deepcopy(self)
+
+    @contextlib.contextmanager
+    def activate(self) -> Generator[GlobalConfigType, None, None]:
+        """Makes `GlobalConfig` refer to this configuration until the `with` block ends.
+
+        Only affects the current thread (or asyncio task), so each thread can disassemble using its own configuration.
+        Threads started inside the block do not inherit it unless they run on a copy of the current
+        `contextvars.Context`."""
+        token = _activeGlobalConfig.set(self)
+        try:
+            yield self
+        finally:
+            _activeGlobalConfig.reset(token)
+
     def parseArgs(self, args: argparse.Namespace):
         if args.disasm_unknown is not None:
             self.DISASSEMBLE_UNKNOWN_INSTRUCTIONS = args.disasm_unknown
@@ -582,6 +603,36 @@ A C string must start at a 0x4-aligned region, which is '\\0' terminated and pad
         if args.debug_unpaired_luis is not None:
             self.PRINT_UNPAIRED_LUIS_DEBUG_INFO = args.debug_unpaired_luis
 
-GlobalConfig = GlobalConfigType()
+_defaultGlobalConfig = GlobalConfigType()
+"Used when no other configuration has been activated on the current thread"
+
+_activeGlobalConfig: contextvars.ContextVar[GlobalConfigType] = contextvars.ContextVar("activeGlobalConfig", default=_defaultGlobalConfig)
+
+
+def getActiveGlobalConfig() -> GlobalConfigType:
+    "Returns the configuration `GlobalConfig` currently refers to"
+    return _activeGlobalConfig.get()
+
+
+class _GlobalConfigProxy:
+    "Forwards every attribute access to the active configuration, see `GlobalConfigType.activate`"
+
+    __slots__ = ()
+
+    def __getattribute__(self, name: str) -> Any:
+        return getattr(_activeGlobalConfig.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(getActiveGlobalConfig(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(getActiveGlobalConfig())
+
+
+GlobalConfig = cast(GlobalConfigType, _GlobalConfigProxy())
+"""The configuration used by the whole library.
+
+Reading or writing its attributes uses the configuration activated on the current thread with
+`GlobalConfigType.activate`, or the process-wide default configuration if none is active."""
 
-GlobalConfig.processEnvironmentVariables()
+_defaultGlobalConfig.processEnvironmentVariables()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import collections
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .ElementBase import ElementBase
+
+
+class RunStats:
+    """Wall times and counters gathered while disassembling with a `Context`.
+
+    Recording is cheap enough to be always performed. Use `Context.getStatsReport` to get everything recorded by a
+    context, including the symbol lookup counters of each of its segments.
+    """
+
+    def __init__(self):
+        self.phaseTimes: dict[str, float] = dict()
+        "Seconds spent on each phase of a run, in the order the phases were started. key: phase name"
+
+        self.sectionTimes: dict[tuple[str, str, int], dict[str, float]] = dict()
+        "Seconds spent on each stage of every section. key: (section name, section type, vrom)"
+
+        self.counters: collections.Counter[str] = collections.Counter()
+
+        self._currentPhase: str|None = None
+        self._currentPhaseStart: float = 0.0
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> RunStats:
+        # A copied context starts its own run
+        return RunStats()
+
+
+    def startPhase(self, name: str) -> None:
+        "Starts timing a new phase, finishing the current one if there's any"
+        self.endPhase()
+        self._currentPhase = name
+        self._currentPhaseStart = time.perf_counter()
+
+    def endPhase(self) -> None:
+        if self._currentPhase is None:
+            return
+        elapsed = time.perf_counter() - self._currentPhaseStart
+        self.phaseTimes[self._currentPhase] = self.phaseTimes.get(self._currentPhase, 0.0) + elapsed
+        self._currentPhase = None
+
+    def addSectionTime(self, section: ElementBase, stage: str, seconds: float) -> None:
+        key = (section.getName(), section.sectionType.toStr(), section.vromStart)
+        stages = self.sectionTimes.setdefault(key, dict())
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def addCount(self, name: str, amount: int=1) -> None:
+        self.counters[name] += amount
+
+
+    def toDict(self) -> dict[str, Any]:
+        sections: list[dict[str, Any]] = []
+        for (name, sectionType, vrom), stages in self.sectionTimes.items():
+            sections.append({"name": name, "type": sectionType, "vrom": vrom, **stages})
+
+        return {
+            "phases": dict(self.phaseTimes),
+            "sections": sections,
+            "counters": dict(self.counters),
+        }
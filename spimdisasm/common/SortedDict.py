@@ -7,7 +7,8 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 import bisect
-from typing import Any, Generator, TypeVar
+import warnings
+from typing import Any, Generator, Iterable, TypeVar, overload
 
 # typing.Mapping and typing.MutableMapping are deprecated since Python 3.9.
 # Using collections.abc is encouraged instead, but 3.7 and 3.8 will to run this file
@@ -21,27 +22,175 @@ except:
     from typing import Mapping, MutableMapping
 
 ValueType = TypeVar("ValueType")
+DefaultType = TypeVar("DefaultType")
 
 
 class SortedDict(MutableMapping[int, ValueType]):
+    """A dictionary which keeps its integer keys sorted.
+
+    The keys are stored on a list of sorted chunks, each one holding at most `2*_chunkLoad` keys. Inserting or removing
+    a key only needs to shift the contents of a single chunk, instead of the whole list of keys.
+    """
+
+    _chunkLoad: int = 1000
+
     def __init__(self, other: Mapping[int, ValueType]|None=None):
         self.map: dict[int, ValueType] = dict()
-        self.sortedKeys: list[int] = list()
+        self._chunks: list[list[int]] = list()
+        "Sorted keys, split in chunks"
+        self._maxes: list[int] = list()
+        "The biggest key of each chunk"
+        self._removedCount: int = 0
+        "Amount of keys ever removed. Together with the amount of keys, it changes every time the keys change"
+        self._sortedKeysCache: tuple[int, int, list[int]]|None = None
+        "The amount of keys and `_removedCount` when `sortedKeys` was last built, and the built list"
 
         if other is not None:
-            for key, value in other.items():
-                self.add(key, value)
+            self.bulkLoad(other.items())
+
+
+    #! @deprecated: Use iteration or `getRange` instead.
+    @property
+    def sortedKeys(self) -> list[int]:
+        """Every key of the dictionary, sorted. The returned list must not be modified.
+
+        Deprecated, iterate the dictionary or use `getRange` instead."""
+        warnings.warn("`SortedDict.sortedKeys` is deprecated, iterate the dictionary or use `getRange` instead", DeprecationWarning, stacklevel=2)
+        cache = self._sortedKeysCache
+        if cache is None or cache[0] != len(self.map) or cache[1] != self._removedCount:
+            cache = (len(self.map), self._removedCount, [key for chunk in self._chunks for key in chunk])
+            self._sortedKeysCache = cache
+        return cache[2]
 
 
     def add(self, key: int, value: ValueType) -> None:
-        if key not in self.map:
+        keysMap = self.map
+        if key not in keysMap:
             # Avoid adding the key twice if it is already on the map
-            bisect.insort(self.sortedKeys, key)
-        self.map[key] = value
+            maxes = self._maxes
+            if maxes and key > maxes[-1]:
+                # Bigger than every key, which is the usual case when adding sorted keys
+                chunk = self._chunks[-1]
+                chunk.append(key)
+                maxes[-1] = key
+                if len(chunk) > 2 * self._chunkLoad:
+                    self._splitChunk(len(maxes) - 1)
+            else:
+                self._insertKey(key)
+        keysMap[key] = value
 
     def remove(self, key: int) -> None:
         del self.map[key]
-        self.sortedKeys.remove(key)
+        self._removedCount += 1
+
+        chunkIndex = bisect.bisect_left(self._maxes, key)
+        chunk = self._chunks[chunkIndex]
+        del chunk[bisect.bisect_left(chunk, key)]
+        if len(chunk) > 0:
+            self._maxes[chunkIndex] = chunk[-1]
+        else:
+            del self._chunks[chunkIndex]
+            del self._maxes[chunkIndex]
+
+    def bulkLoad(self, pairs: Iterable[tuple[int, ValueType]]) -> None:
+        """Adds every (key, value) pair from `pairs`. If a key is repeated then the last value is kept.
+
+        This is faster than calling `add` for each pair, specially if the pairs are already sorted by key."""
+        newKeys: list[int] = []
+        for key, value in pairs:
+            if key not in self.map:
+                newKeys.append(key)
+            self.map[key] = value
+
+        if len(newKeys) == 0:
+            return
+
+        newKeys.sort()
+        chunkLoad = self._chunkLoad
+        if len(self._maxes) > 0 and newKeys[0] <= self._maxes[-1]:
+            # Merge the new keys into the chunks which they fall in, leaving the other chunks untouched.
+            # The keys bigger than every current key are left for the end.
+            newChunks: list[list[int]] = []
+            start = 0
+            for chunkIndex, chunk in enumerate(self._chunks):
+                end = bisect.bisect_right(newKeys, self._maxes[chunkIndex], start)
+                if start == end:
+                    newChunks.append(chunk)
+                    continue
+
+                # Timsort merges already sorted runs in linear time
+                merged = chunk + newKeys[start:end]
+                merged.sort()
+                if len(merged) > 2 * chunkLoad:
+                    newChunks.extend(merged[i:i+chunkLoad] for i in range(0, len(merged), chunkLoad))
+                else:
+                    newChunks.append(merged)
+                start = end
+
+            self._chunks = newChunks
+            newKeys = newKeys[start:]
+
+        if len(newKeys) > 0:
+            # Every remaining key is bigger than the current ones
+            if len(self._chunks) > 0 and len(self._chunks[-1]) < chunkLoad:
+                lastChunk = self._chunks[-1]
+                fill = chunkLoad - len(lastChunk)
+                lastChunk.extend(newKeys[:fill])
+                newKeys = newKeys[fill:]
+            self._chunks.extend(newKeys[i:i+chunkLoad] for i in range(0, len(newKeys), chunkLoad))
+
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+
+
+    def _insertKey(self, key: int) -> None:
+        if len(self._chunks) == 0:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            return
+
+        chunkIndex = bisect.bisect_left(self._maxes, key)
+        if chunkIndex == len(self._maxes):
+            chunkIndex -= 1
+            chunk = self._chunks[chunkIndex]
+            chunk.append(key)
+            self._maxes[chunkIndex] = key
+        else:
+            chunk = self._chunks[chunkIndex]
+            bisect.insort(chunk, key)
+
+        if len(chunk) > 2 * self._chunkLoad:
+            self._splitChunk(chunkIndex)
+
+    def _splitChunk(self, chunkIndex: int) -> None:
+        "Splits the chunk in two halves"
+        chunk = self._chunks[chunkIndex]
+        self._chunks.insert(chunkIndex + 1, chunk[self._chunkLoad:])
+        del chunk[self._chunkLoad:]
+        self._maxes.insert(chunkIndex, chunk[-1])
+
+    def _bisectLeft(self, key: int) -> tuple[int, int]:
+        "Like `bisect.bisect_left`, but returns the index of the chunk and the index inside that chunk"
+        chunkIndex = bisect.bisect_left(self._maxes, key)
+        if chunkIndex == len(self._maxes):
+            return chunkIndex, 0
+        return chunkIndex, bisect.bisect_left(self._chunks[chunkIndex], key)
+
+    def _bisectRight(self, key: int) -> tuple[int, int]:
+        "Like `bisect.bisect_right`, but returns the index of the chunk and the index inside that chunk"
+        chunkIndex = bisect.bisect_right(self._maxes, key)
+        if chunkIndex == len(self._maxes):
+            return chunkIndex, 0
+        return chunkIndex, bisect.bisect_right(self._chunks[chunkIndex], key)
+
+    def _keysBetween(self, start: tuple[int, int], end: tuple[int, int]) -> Generator[int, None, None]:
+        startChunk, startIndex = start
+        endChunk, endIndex = end
+        for chunkIndex in range(startChunk, min(endChunk + 1, len(self._chunks))):
+            chunk = self._chunks[chunkIndex]
+            first = startIndex if chunkIndex == startChunk else 0
+            last = endIndex if chunkIndex == endChunk else len(chunk)
+            for i in range(first, last):
+                yield chunk[i]
 
 
     def getKeyRight(self, key: int, inclusive: bool=True) -> tuple[int, ValueType]|None:
@@ -50,12 +199,15 @@ class SortedDict(MutableMapping[int, ValueType]):
         If `inclusive` is `False`, then the returned pair will be strictly less than the passed `key`.
         """
         if inclusive:
-            index = bisect.bisect_right(self.sortedKeys, key)
+            chunkIndex, index = self._bisectRight(key)
+        else:
+            chunkIndex, index = self._bisectLeft(key)
+        if index > 0:
+            currentKey = self._chunks[chunkIndex][index - 1]
+        elif chunkIndex > 0:
+            currentKey = self._chunks[chunkIndex - 1][-1]
         else:
-            index = bisect.bisect_left(self.sortedKeys, key)
-        if index == 0:
             return None
-        currentKey = self.sortedKeys[index - 1]
         return currentKey, self.map[currentKey]
 
     def getKeyLeft(self, key: int, inclusive: bool=True) -> tuple[int, ValueType]|None:
@@ -64,12 +216,12 @@ class SortedDict(MutableMapping[int, ValueType]):
         If `inclusive` is `False`, then the returned pair will be strictly greater than the passed `key`.
         """
         if inclusive:
-            index = bisect.bisect_left(self.sortedKeys, key)
+            chunkIndex, index = self._bisectLeft(key)
         else:
-            index = bisect.bisect_right(self.sortedKeys, key)
-        if index == len(self.sortedKeys):
+            chunkIndex, index = self._bisectRight(key)
+        if chunkIndex == len(self._chunks):
             return None
-        key = self.sortedKeys[index]
+        key = self._chunks[chunkIndex][index]
         return key, self.map[key]
 
 
@@ -78,17 +230,16 @@ class SortedDict(MutableMapping[int, ValueType]):
 
         By default the `startKey` is inclusive but the `endKey` isn't, this can be changed with the `startInclusive` and `endInclusive` parameters"""
         if startInclusive:
-            keyIndexStart = bisect.bisect_left(self.sortedKeys, startKey)
+            start = self._bisectLeft(startKey)
         else:
-            keyIndexStart = bisect.bisect_right(self.sortedKeys, startKey)
+            start = self._bisectRight(startKey)
 
         if endInclusive:
-            keyIndexEnd = bisect.bisect_right(self.sortedKeys, endKey)
+            end = self._bisectRight(endKey)
         else:
-            keyIndexEnd = bisect.bisect_left(self.sortedKeys, endKey)
+            end = self._bisectLeft(endKey)
 
-        for index in range(keyIndexStart, keyIndexEnd):
-            key = self.sortedKeys[index]
+        for key in self._keysBetween(start, end):
             yield (key, self.map[key])
 
     def getRangeAndPop(self, startKey: int, endKey: int, startInclusive: bool=True, endInclusive: bool=False) -> Generator[tuple[int, ValueType], None, None]:
@@ -96,17 +247,17 @@ class SortedDict(MutableMapping[int, ValueType]):
 
         Please note this generator iterates in reverse/descending order"""
         if startInclusive:
-            keyIndexStart = bisect.bisect_left(self.sortedKeys, startKey)
+            start = self._bisectLeft(startKey)
         else:
-            keyIndexStart = bisect.bisect_right(self.sortedKeys, startKey)
+            start = self._bisectRight(startKey)
 
         if endInclusive:
-            keyIndexEnd = bisect.bisect_right(self.sortedKeys, endKey)
+            end = self._bisectRight(endKey)
         else:
-            keyIndexEnd = bisect.bisect_left(self.sortedKeys, endKey)
+            end = self._bisectLeft(endKey)
 
-        for index in range(keyIndexEnd-1, keyIndexStart-1, -1):
-            key = self.sortedKeys[index]
+        keys = list(self._keysBetween(start, end))
+        for key in reversed(keys):
             value = self.map[key]
             self.remove(key)
             yield (key, value)
@@ -115,7 +266,18 @@ class SortedDict(MutableMapping[int, ValueType]):
         """Returns the index of the passed `key` in the sorted dictionary, or None if the key is not present."""
         if key not in self.map:
             return None
-        return bisect.bisect_left(self.sortedKeys, key)
+        chunkIndex, index = self._bisectLeft(key)
+        for chunk in self._chunks[:chunkIndex]:
+            index += len(chunk)
+        return index
+
+    @overload
+    def get(self, key: int) -> ValueType|None: ...
+    @overload
+    def get(self, key: int, default: ValueType|DefaultType) -> ValueType|DefaultType: ...
+    def get(self, key: int, default: Any=None) -> Any:
+        # Avoid the exception handling of `Mapping.get`, since this is used on every symbol lookup
+        return self.map.get(key, default)
 
     def __getitem__(self, key: int) -> ValueType:
         return self.map[key]
@@ -128,8 +290,9 @@ class SortedDict(MutableMapping[int, ValueType]):
 
     def __iter__(self) -> Generator[int, None, None]:
         "Iteration is sorted by keys"
-        for key in self.sortedKeys:
-            yield key
+        for chunk in self._chunks:
+            for key in chunk:
+                yield key
 
     def __len__(self) -> int:
         return len(self.map)
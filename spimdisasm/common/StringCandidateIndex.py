@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import array
+import bisect
+import re
+
+from . import Utils
+
+
+def _makeBytesPattern(values: set[int]) -> re.Pattern[bytes]:
+    return re.compile(b"[" + b"".join(re.escape(bytes([x])) for x in sorted(values)) + b"]")
+
+# The C string terminator is checked before looking for banned characters, so it is not part of this set
+_bannedInCStringPattern = _makeBytesPattern(Utils.bannedEscapeCharacters - {0x00})
+_bannedInPascalStringPattern = _makeBytesPattern(Utils.bannedEscapeCharacters)
+_nonAsciiPattern = re.compile(rb"[\x80-\xFF]")
+_cStringEndPattern = re.compile(rb"\x00")
+_pascalStringEndPattern = re.compile(rb"(?=  )")
+
+
+class StringCandidateIndex:
+    """Answers which offsets of a buffer may start a string, as `Utils.decodeBytesToStrings` and
+    `Utils.decodeBytesToPascalStrings` would decode them, without walking the bytes of every candidate.
+
+    The buffer is scanned once for string terminators, banned escape characters and non-ASCII bytes. Most candidates
+    are then resolved with a couple of binary searches, only strings containing non-ASCII characters still need to be
+    decoded, and their result is cached.
+    """
+
+    def __init__(self, buf: bytes, stringEncoding: str):
+        self.buf = buf
+        self.stringEncoding = stringEncoding
+
+        self._cStringEnds = self._findAll(_cStringEndPattern, buf)
+        self._pascalStringEnds = self._findAll(_pascalStringEndPattern, buf)
+        self._bannedInCString = self._findAll(_bannedInCStringPattern, buf)
+        self._bannedInPascalString = self._findAll(_bannedInPascalStringPattern, buf)
+        self._nonAscii = self._findAll(_nonAsciiPattern, buf)
+
+        try:
+            bytes(range(0x80)).decode(stringEncoding)
+            self._asciiDecodes = True
+        except (UnicodeDecodeError, LookupError):
+            self._asciiDecodes = False
+
+        self._decodedCStrings: dict[int, int] = dict()
+        self._decodedPascalStrings: dict[int, int] = dict()
+
+    @staticmethod
+    def _findAll(pattern: re.Pattern[bytes], buf: bytes) -> array.array[int]:
+        # Data sections are usually full of zeroes, so the positions are kept packed
+        return array.array("I", [m.start() for m in pattern.finditer(buf)])
+
+    @staticmethod
+    def _findNext(positions: array.array[int], offset: int) -> int:
+        "Returns the first position which is greater or equal to `offset`, or -1 if there's none"
+        i = bisect.bisect_left(positions, offset)
+        if i < len(positions):
+            return positions[i]
+        return -1
+
+    def getCStringSize(self, offset: int) -> int:
+        "Returns the size of the string starting at `offset`, without the terminator, or a negative value if it can't be decoded"
+        end = self._findNext(self._cStringEnds, offset)
+        if end < 0:
+            # Reached the end of the buffer without finding an 0
+            return -80
+
+        banned = self._findNext(self._bannedInCString, offset)
+        if 0 <= banned < end:
+            return -10
+
+        # To be a valid aligned string, the next word-aligned bytes needs to be zero
+        paddingEnd = min((end & ~3) + 4, len(self.buf))
+        if self.buf.count(0, end, paddingEnd) != paddingEnd - end:
+            return -100
+
+        nonAscii = self._findNext(self._nonAscii, offset)
+        if self._asciiDecodes and not (0 <= nonAscii < end):
+            return end - offset
+
+        rawStringSize = self._decodedCStrings.get(offset)
+        if rawStringSize is None:
+            _, rawStringSize = Utils.decodeBytesToStrings(self.buf, offset, self.stringEncoding)
+            self._decodedCStrings[offset] = rawStringSize
+        return rawStringSize
+
+    def getPascalStringSize(self, offset: int) -> int:
+        "Returns the size of the space-padded string starting at `offset`, including its padding, or a negative value if it can't be decoded"
+        end = self._findNext(self._pascalStringEnds, offset)
+        if end < 0:
+            return -1
+
+        banned = self._findNext(self._bannedInPascalString, offset)
+        if 0 <= banned < end:
+            return -1
+
+        rawStringSize = self._decodedPascalStrings.get(offset)
+        if rawStringSize is None:
+            _, rawStringSize = Utils.decodeBytesToPascalStrings(self.buf, offset, self.stringEncoding, terminator=0x20)
+            self._decodedPascalStrings[offset] = rawStringSize
+        return rawStringSize
@@ -42,6 +42,11 @@ class SymbolsSegment:
 
         self._isTheUnknownSegment: bool = False
 
+        self.getSymbolCalls: int = 0
+        self.getSymbolMisses: int = 0
+        "Amount of `getSymbol` calls which did not find a symbol"
+        self.addSymbolCalls: int = 0
+
 
     @property
     def vromSize(self) -> int|None:
@@ -76,6 +81,8 @@ class SymbolsSegment:
         self.vramStart = vramStart
         self.vramEnd = vramEnd
 
+        self.context.invalidateSegmentsIndex()
+
 
     def vromToVram(self, vrom: int) -> int|None:
         if self.vromStart is None:
@@ -84,6 +91,7 @@ class SymbolsSegment:
 
 
     def addSymbol(self, address: int, sectionType: FileSectionType=FileSectionType.Unknown, isAutogenerated: bool=False, vromAddress: int|None=None) -> ContextSymbol:
+        self.addSymbolCalls += 1
         contextSym = self.symbols.get(address, None)
         if contextSym is None:
             contextSym = ContextSymbol(address)
@@ -149,17 +157,23 @@ class SymbolsSegment:
 
     def getSymbol(self, address: int, tryPlusOffset: bool = True, checkUpperLimit: bool = True) -> ContextSymbol|None:
         "Searches symbol or a symbol with an addend if `tryPlusOffset` is True"
-        if GlobalConfig.PRODUCE_SYMBOLS_PLUS_OFFSET and tryPlusOffset:
+        self.getSymbolCalls += 1
+        if tryPlusOffset and GlobalConfig.PRODUCE_SYMBOLS_PLUS_OFFSET:
             pair = self.symbols.getKeyRight(address, inclusive=True)
             if pair is None:
+                self.getSymbolMisses += 1
                 return None
 
             symVram, contextSym = pair
             if checkUpperLimit and address >= symVram + contextSym.getSize():
+                self.getSymbolMisses += 1
                 return None
             return contextSym
 
-        return self.symbols.get(address, None)
+        exactSym = self.symbols.get(address)
+        if exactSym is None:
+            self.getSymbolMisses += 1
+        return exactSym
 
     def getSymbolsRange(self, addressStart: int, addressEnd: int) -> Generator[tuple[int, ContextSymbol], None, None]:
         return self.symbols.getRange(addressStart, addressEnd, startInclusive=True, endInclusive=False)
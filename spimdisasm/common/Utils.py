@@ -6,9 +6,11 @@
 from __future__ import annotations
 
 import argparse
+import array
 import csv
 import hashlib
 import json
+import mmap
 from pathlib import Path
 import rabbitizer
 import struct
@@ -59,6 +61,17 @@ def readFileAsBytearray(filepath: Path) -> bytearray:
     with filepath.open(mode="rb") as f:
         return bytearray(f.read())
 
+def readFileAsMemoryView(filepath: Path) -> memoryview:
+    """Maps the file into memory and returns a read-only view of it, so its contents are paged in by the OS when they
+    are used instead of being copied into the process.
+
+    Returns an empty view if the file does not exist or is empty."""
+    if not filepath.exists() or filepath.stat().st_size == 0:
+        return memoryview(b"")
+    with filepath.open(mode="rb") as f:
+        # The mapping stays valid after closing the file
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
 def readFile(filepath: Path) -> list[str]:
     with filepath.open() as f:
         return [x.strip() for x in f.readlines()]
@@ -70,6 +83,13 @@ def readJson(filepath: Path):
 def removeExtraWhitespace(line: str) -> str:
     return " ".join(line.split())
 
+_wordsArrayTypeCode: str|None = None
+"Type code of the `array.array`s used to convert bytes into words, if this platform has a 4 bytes unsigned type"
+for _typeCode in ("I", "L"):
+    if array.array(_typeCode).itemsize == 4:
+        _wordsArrayTypeCode = _typeCode
+        break
+
 def endianessBytesToWords(endian: InputEndian, array_of_bytes: bytes, offset: int=0, offsetEnd: int|None=None) -> list[int]:
     totalBytesCount = len(array_of_bytes)
     if totalBytesCount == 0:
@@ -91,11 +111,20 @@ def endianessBytesToWords(endian: InputEndian, array_of_bytes: bytes, offset: in
         little_byte_format = f"<{halfwords}H"
         big_byte_format = f">{halfwords}H"
         tmp = struct.unpack_from(little_byte_format, array_of_bytes, offset)
-        newBytes = bytearray(array_of_bytes)
-        struct.pack_into(big_byte_format, newBytes, offset, *tmp)
+        # Only the requested range is converted, instead of copying the whole input
+        newBytes = bytearray(halfwords*2)
+        struct.pack_into(big_byte_format, newBytes, 0, *tmp)
         array_of_bytes = bytes(newBytes)
+        offset = 0
 
     words = bytesCount//4
+    if _wordsArrayTypeCode is not None:
+        wordsArray = array.array(_wordsArrayTypeCode)
+        wordsArray.frombytes(memoryview(array_of_bytes)[offset:offset+words*4])
+        if (endian == InputEndian.LITTLE) != (sys.byteorder == "little"):
+            wordsArray.byteswap()
+        return wordsArray.tolist()
+
     endian_format = f">{words}I"
     if endian == InputEndian.LITTLE:
         endian_format = f"<{words}I"
@@ -4,7 +4,10 @@
 from . import Utils
 
 from .SortedDict import SortedDict as SortedDict
+from .StringCandidateIndex import StringCandidateIndex as StringCandidateIndex
 from .GlobalConfig import GlobalConfig as GlobalConfig
+from .GlobalConfig import GlobalConfigType as GlobalConfigType
+from .GlobalConfig import getActiveGlobalConfig as getActiveGlobalConfig
 from .GlobalConfig import InputEndian as InputEndian
 from .GlobalConfig import Compiler as Compiler
 from .GlobalConfig import Abi as Abi
@@ -17,6 +20,7 @@ from .ContextSymbols import SymbolSpecialType as SymbolSpecialType
 from .ContextSymbols import ContextSymbol as ContextSymbol
 from .ContextSymbols import gKnownTypes as gKnownTypes
 from .SymbolsSegment import SymbolsSegment as SymbolsSegment
+from .RunStats import RunStats as RunStats
 from .Context import Context as Context
 from .FileSplitFormat import FileSplitFormat as FileSplitFormat
 from .FileSplitFormat import FileSplitEntry as FileSplitEntry
@@ -6,6 +6,7 @@
 from __future__ import annotations
 
 import dataclasses
+import itertools
 import struct
 
 from .. import common
@@ -32,18 +33,22 @@ class Elf32RelEntry:
 
         return Elf32RelEntry(*unpacked)
 
+    @staticmethod
+    def listFromBytearray(array_of_bytes: bytes, offset: int, count: int) -> list[Elf32RelEntry]:
+        "Parses `count` consecutive entries at once"
+        entryFormat = common.GlobalConfig.ENDIAN.toFormatString() + "II"
+        buffer = memoryview(array_of_bytes)[offset:offset + count * 0x08]
+
+        return list(itertools.starmap(Elf32RelEntry, struct.iter_unpack(entryFormat, buffer)))
+
 
 class Elf32Rels:
     def __init__(self, sectionName: str, array_of_bytes: bytes, offset: int, rawSize: int):
         self.sectionName = sectionName
-        self.relocations: list[Elf32RelEntry] = list()
+        self.relocations: list[Elf32RelEntry] = Elf32RelEntry.listFromBytearray(array_of_bytes, offset, rawSize // 0x08)
         self.offset: int = offset
         self.rawSize: int = rawSize
 
-        for i in range(rawSize // 0x08):
-            entry = Elf32RelEntry.fromBytearray(array_of_bytes, offset + i*0x08)
-            self.relocations.append(entry)
-
     def __iter__(self):
         for entry in self.relocations:
             yield entry
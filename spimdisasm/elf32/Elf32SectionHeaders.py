@@ -6,6 +6,7 @@
 from __future__ import annotations
 
 import dataclasses
+import itertools
 import struct
 
 from .. import common
@@ -35,21 +36,24 @@ class Elf32SectionHeaderEntry:
 
         return Elf32SectionHeaderEntry(*unpacked)
 
+    @staticmethod
+    def listFromBytearray(array_of_bytes: bytes, offset: int, count: int) -> list[Elf32SectionHeaderEntry]:
+        "Parses `count` consecutive entries at once"
+        headerFormat = common.GlobalConfig.ENDIAN.toFormatString() + "10I"
+        buffer = memoryview(array_of_bytes)[offset:offset + count * 0x28]
+
+        return list(itertools.starmap(Elf32SectionHeaderEntry, struct.iter_unpack(headerFormat, buffer)))
+
 
 class Elf32SectionHeaders:
     def __init__(self, array_of_bytes: bytes, shoff: int, shnum: int):
-        self.sections: list[Elf32SectionHeaderEntry] = list()
+        self.sections: list[Elf32SectionHeaderEntry] = Elf32SectionHeaderEntry.listFromBytearray(array_of_bytes, shoff, shnum)
         self.shoff: int = shoff
         self.shnum: int = shnum
 
         self.mipsText: Elf32SectionHeaderEntry | None = None
         self.mipsData: Elf32SectionHeaderEntry | None = None
 
-        for i in range(shnum):
-            sectionHeaderEntry = Elf32SectionHeaderEntry.fromBytearray(array_of_bytes, shoff + i * 0x28)
-            self.sections.append(sectionHeaderEntry)
-            # print(sectionHeaderEntry)
-
     def __getitem__(self, key: int) -> Elf32SectionHeaderEntry | None:
         if key == Elf32SectionHeaderNumber.UNDEF.value:
             return None
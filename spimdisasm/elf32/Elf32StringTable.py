@@ -5,27 +5,32 @@
 
 from __future__ import annotations
 
+import sys
+
 
 # a.k.a. strtab (string table)
 class Elf32StringTable:
     def __init__(self, array_of_bytes: bytes, offset: int, rawsize: int):
-        self.strings: bytes = array_of_bytes[offset:offset+rawsize]
+        self.strings: bytes = bytes(array_of_bytes[offset:offset+rawsize])
         self.offset: int = offset
         self.rawsize: int = rawsize
 
-    def __getitem__(self, key: int) -> str:
-        buffer = bytearray()
-
-        i = key
-        while self.strings[i] != 0:
-            buffer.append(self.strings[i])
-            i += 1
+        self._decodedStrings: dict[int, str] = dict()
+        "key: offset of the string in the table. The same names are usually requested once per symbol and relocation"
 
-        return buffer.decode()
+    def __getitem__(self, key: int) -> str:
+        string = self._decodedStrings.get(key)
+        if string is None:
+            end = self.strings.find(0, key)
+            if end < 0:
+                raise IndexError(f"Unterminated string at offset 0x{key:X} of the string table")
+            string = sys.intern(self.strings[key:end].decode())
+            self._decodedStrings[key] = string
+        return string
 
     def __iter__(self):
-        i = 0
-        while i < self.rawsize:
-            string = self[i]
-            yield string
-            i += len(string.encode()) + 1
+        *strings, tail = self.strings.split(b"\0")
+        for rawString in strings:
+            yield rawString.decode()
+        if len(tail) != 0:
+            raise IndexError("Unterminated string at the end of the string table")
@@ -6,6 +6,7 @@
 from __future__ import annotations
 
 import dataclasses
+import itertools
 import struct
 
 from .. import common
@@ -37,6 +38,14 @@ class Elf32SymEntry:
 
         return Elf32SymEntry(*unpacked)
 
+    @staticmethod
+    def listFromBytearray(array_of_bytes: bytes, offset: int, count: int) -> list[Elf32SymEntry]:
+        "Parses `count` consecutive entries at once"
+        entryFormat = common.GlobalConfig.ENDIAN.toFormatString() + "IIIBBH"
+        buffer = memoryview(array_of_bytes)[offset:offset + count * Elf32SymEntry.structSize()]
+
+        return list(itertools.starmap(Elf32SymEntry, struct.iter_unpack(entryFormat, buffer)))
+
     @staticmethod
     def structSize() -> int:
         return 0x10
@@ -44,14 +53,10 @@ class Elf32SymEntry:
 
 class Elf32Syms:
     def __init__(self, array_of_bytes: bytes, offset: int, rawSize: int):
-        self.symbols: list[Elf32SymEntry] = list()
+        self.symbols: list[Elf32SymEntry] = Elf32SymEntry.listFromBytearray(array_of_bytes, offset, rawSize // Elf32SymEntry.structSize())
         self.offset: int = offset
         self.rawSize: int = rawSize
 
-        for i in range(rawSize // Elf32SymEntry.structSize()):
-            entry = Elf32SymEntry.fromBytearray(array_of_bytes, offset + i*Elf32SymEntry.structSize())
-            self.symbols.append(entry)
-
     def __getitem__(self, key: int) -> Elf32SymEntry:
         return self.symbols[key]
 
@@ -6,6 +6,7 @@
 from __future__ import annotations
 
 import argparse
+import copy
 from pathlib import Path
 import rabbitizer
 
@@ -25,8 +26,8 @@ def getToolDescription() -> str:
 def addOptionsToParser(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
     parser.add_argument("-V", "--version", action="version", version=f"%(prog)s {__version__}")
 
-    parser.add_argument("binary", help="Path to input elf binary file")
-    parser.add_argument("output", help="Path to output. Use '-' to print to stdout instead")
+    parser.add_argument("binary", help="Path to input elf binary file. If --batch is used then this is the path to the batch csv instead")
+    parser.add_argument("output", help="Path to output. Use '-' to print to stdout instead. Required unless --batch is used", nargs="?")
 
     parser.add_argument("--data-output", help="Path to output the data and rodata disassembly")
 
@@ -38,6 +39,11 @@ def addOptionsToParser(parser: argparse.ArgumentParser) -> argparse.ArgumentPars
 
     parser.add_argument("--function-info", help="Specifies a path where to output a csvs sumary file of every analyzed function", metavar="PATH")
 
+    parser.add_argument("--incremental-cache", help="Enables skipping the whole run when nothing changed since the previous one, using the given directory to store the cache. Nothing is analyzed nor written if the input binary, every file read into the context and every other option are the same as in the previous run and every file it generated still exists. Otherwise every section is analyzed and written again. Can't be used when printing to stdout", metavar="PATH")
+    parser.add_argument("--stats", help="Write a json report to the given path when the run finishes, containing the time spent on each phase and section and internal counters (symbol lookups and misses per segment, added symbols, analyzed instructions, emitted bytes)", metavar="PATH")
+    parser.add_argument("--timings", help="Print the time spent on each phase to stderr when the run finishes", action="store_true")
+    parser.add_argument("--batch", help="Disassemble many elf files in a single run. `binary` is read as a csv where each row is `input,output` or `input,output,data output`, and `output` is not used. Every file starts from a copy of the context built from the context options, instead of building it again for each one. Options which write a single file (--save-context, --save-context-binary, --function-info and --stats) get the name of each input appended to their filename, and the directories of --split-functions and --incremental-cache get a subdirectory per input. Each input is named after its path relative to the batch csv with its suffix removed and with `_` instead of path separators, or after its stem if it is not inside the directory of the batch csv. Files which fail to be disassembled are reported and skipped", action="store_true")
+
 
     readelfOptions = parser.add_argument_group("readelf-like flags")
 
@@ -109,9 +115,6 @@ def applyReadelfLikeFlags(elfFile: elf32.Elf32File, args: argparse.Namespace) ->
         if args.display_got:
             elfFile.readelf_displayGot()
 
-    if args.readelf_only:
-        exit(0)
-
 SpecialSectionNames = {".text", ".data", ".rodata", ".bss"}
 
 def getOutputPath(inputPath: Path, textOutput: Path, dataOutput: Path, sectionType: common.FileSectionType, sectionName: str) -> Path:
@@ -381,16 +384,128 @@ def processGlobalOffsetTable(context: common.Context, elfFile: elf32.Elf32File)
     return
 
 
+def readBatchFile(batchPath: Path) -> list[tuple[Path, Path, Path|None]]:
+    "Returns the input, output and data output paths of each row of a batch csv"
+    entries: list[tuple[Path, Path, Path|None]] = []
+    for row in common.Utils.readCsv(batchPath):
+        row = [x.strip() for x in row]
+        if len(row) == 0 or row[0] == "":
+            continue
+        if len(row) == 2:
+            entries.append((Path(row[0]), Path(row[1]), None))
+        elif len(row) == 3:
+            entries.append((Path(row[0]), Path(row[1]), None if row[2] == "" else Path(row[2])))
+        else:
+            raise RuntimeError(f"Invalid row in batch file '{batchPath}': {row}")
+    return entries
+
+def getBatchEntryNames(batchPath: Path, inputPaths: list[Path]) -> list[str]:
+    """Returns the name used for the files generated by each entry of a batch.
+
+    Inputs inside the directory of the batch csv are named after their path relative to it, so `a/foo.o` and `b/foo.o`
+    become `a_foo` and `b_foo`, and any other input is named after its stem."""
+    batchDirectory = batchPath.resolve().parent
+    names: list[str] = []
+    for inputPath in inputPaths:
+        resolvedPath = inputPath.resolve()
+        if batchDirectory in resolvedPath.parents:
+            names.append("_".join(resolvedPath.relative_to(batchDirectory).with_suffix("").parts))
+        else:
+            names.append(inputPath.stem)
+
+    seenNames: dict[str, Path] = dict()
+    for inputPath, name in zip(inputPaths, names):
+        otherPath = seenNames.get(name)
+        if otherPath is not None:
+            raise RuntimeError(f"Batch file '{batchPath}' has more than one input named '{name}' ('{otherPath}' and '{inputPath}'), the files generated for them would overwrite each other")
+        seenNames[name] = inputPath
+    return names
+
+def getBatchEntryArgs(args: argparse.Namespace, entryName: str, inputPath: Path, textOutput: Path, dataOutput: Path|None) -> argparse.Namespace:
+    "Returns a copy of `args` for a single entry of a batch, so files generated by different entries do not collide"
+    entryArgs = argparse.Namespace(**vars(args))
+    entryArgs.binary = str(inputPath)
+    entryArgs.output = str(textOutput)
+    entryArgs.data_output = None if dataOutput is None else str(dataOutput)
+    entryArgs.batch = False
+
+    for fileOption in ("save_context", "save_context_binary", "function_info", "stats"):
+        optionPath = getattr(args, fileOption)
+        if optionPath is not None:
+            optionPath = Path(optionPath)
+            setattr(entryArgs, fileOption, str(optionPath.with_name(f"{optionPath.stem}_{entryName}{optionPath.suffix}")))
+    for directoryOption in ("split_functions", "incremental_cache"):
+        optionPath = getattr(args, directoryOption)
+        if optionPath is not None:
+            setattr(entryArgs, directoryOption, str(Path(optionPath) / entryName))
+    return entryArgs
+
+def processBatch(args: argparse.Namespace) -> int:
+    """Disassembles every elf file listed on the batch csv.
+
+    The context options are parsed only once. Each file is processed with a copy of that context and of its
+    configuration as it was before processing any file, since reading an elf file changes it (endianness, abi, $gp
+    value, etc).
+
+    A file which fails to be disassembled is reported and the rest of the batch is still processed."""
+    batchPath = Path(args.binary)
+    entries = readBatchFile(batchPath)
+    entryNames = getBatchEntryNames(batchPath, [inputPath for inputPath, _, _ in entries])
+
+    contextTemplate = common.Context()
+    contextTemplate.parseArgs(args)
+
+    common.Utils.printQuietless(f"{PROGNAME} (spimdisasm {__version__})")
+
+    result = 0
+    failedInputs: list[Path] = []
+    for (inputPath, textOutput, dataOutput), entryName in zip(entries, entryNames):
+        # The copy includes the context's own copy of the configuration
+        context = copy.deepcopy(contextTemplate)
+        entryArgs = getBatchEntryArgs(args, entryName, inputPath, textOutput, dataOutput)
+        with context.activate():
+            try:
+                entryResult = processElfFile(entryArgs, context)
+            except Exception as e:
+                common.Utils.eprint(f"{PROGNAME}: error: failed to disassemble '{inputPath}': {type(e).__name__}: {e}")
+                entryResult = 1
+            finally:
+                fec.FrontendUtilities.reportStats(context, entryArgs.binary, entryArgs.stats, entryArgs.timings)
+        if entryResult != 0:
+            result = entryResult
+            failedInputs.append(inputPath)
+
+    if len(failedInputs) != 0:
+        common.Utils.eprint(f"{PROGNAME}: {len(failedInputs)} of {len(entries)} files failed: {', '.join(str(x) for x in failedInputs)}")
+    return result
+
 def processArguments(args: argparse.Namespace) -> int:
     applyArgs(args)
 
     applyGlobalConfigurations()
 
+    if args.batch:
+        return processBatch(args)
+
+    if args.output is None:
+        common.Utils.eprint(f"{PROGNAME}: error: the following arguments are required: output")
+        return 2
+
     context = common.Context()
+    context.stats.startPhase("load_context")
     context.parseArgs(args)
 
     common.Utils.printQuietless(f"{PROGNAME} (spimdisasm {__version__})")
 
+    # Reading the elf file changes the configuration (endianness, abi, $gp value, etc)
+    with context.activate():
+        try:
+            return processElfFile(args, context)
+        finally:
+            fec.FrontendUtilities.reportStats(context, args.binary, args.stats, args.timings)
+
+def processElfFile(args: argparse.Namespace, context: common.Context) -> int:
+    context.stats.startPhase("read")
     inputPath = Path(args.binary)
     array_of_bytes = common.Utils.readFileAsBytearray(inputPath)
     elfFile = elf32.Elf32File(array_of_bytes)
@@ -407,6 +522,8 @@ def processArguments(args: argparse.Namespace) -> int:
     processGlobalOffsetTable(context, elfFile)
 
     applyReadelfLikeFlags(elfFile, args)
+    if args.readelf_only:
+        return 0
 
     textOutput = Path(args.output)
     if args.data_output is None:
@@ -445,13 +562,27 @@ def processArguments(args: argparse.Namespace) -> int:
     for sect in processedSegments.values():
         processedFilesCount += len(sect)
 
+    incrementalCache: fec.IncrementalCache|None = None
+    if args.incremental_cache is not None:
+        if str(textOutput) == "-" or str(dataOutput) == "-":
+            common.Utils.eprint("Warning: --incremental-cache can't be used when printing to stdout. Ignoring it")
+        else:
+            incrementalCache = fec.IncrementalCache(Path(args.incremental_cache), args, {"incremental_cache", "verbose", "quiet", "stats", "timings"})
+            incrementalCache.computeInputDigest(processedSegments, segmentPaths, context, inputPath)
+            if incrementalCache.isUpToDate():
+                common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Nothing changed since the previous run")
+                return 0
+
+    context.stats.startPhase("analyze")
     common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Analyzing sections...")
     fec.FrontendUtilities.analyzeProcessedFiles(processedSegments, segmentPaths, processedFilesCount)
 
+    context.stats.startPhase("write")
     common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Writing files...")
     fec.FrontendUtilities.writeProcessedFiles(processedSegments, segmentPaths, processedFilesCount)
 
     if args.split_functions is not None:
+        context.stats.startPhase("migrate")
         common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Migrating functions and rodata...")
         functionMigrationPath = Path(args.split_functions)
         fec.FrontendUtilities.migrateFunctions(processedSegments, functionMigrationPath)
@@ -459,14 +590,32 @@ def processArguments(args: argparse.Namespace) -> int:
         common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Generating functions list...")
         mips.FilesHandlers.writeMigratedFunctionsList(processedSegments, functionMigrationPath, inputPath.stem)
 
+    # Files generated besides the sections, recorded by the incremental cache
+    otherOutputs: list[Path] = []
+    if args.split_functions is not None:
+        otherOutputs.append(Path(args.split_functions))
+
+    context.stats.startPhase("save_context")
     if args.save_context is not None:
         common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Writing context...")
         contextPath = Path(args.save_context)
         contextPath.parent.mkdir(parents=True, exist_ok=True)
-        context.saveContextToFile(contextPath)
+        otherOutputs.extend(context.saveContextToFile(contextPath))
 
+    if args.save_context_binary is not None:
+        common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Writing binary context...")
+        binaryContextPath = Path(args.save_context_binary)
+        binaryContextPath.parent.mkdir(parents=True, exist_ok=True)
+        context.saveContextToBinaryFile(binaryContextPath)
+        otherOutputs.append(binaryContextPath)
+
+    context.stats.startPhase("function_info")
     if args.function_info is not None:
         fec.FrontendUtilities.writeFunctionInfoCsv(processedSegments, Path(args.function_info))
+        otherOutputs.append(Path(args.function_info))
+
+    if incrementalCache is not None:
+        incrementalCache.saveManifest(processedSegments, segmentPaths, otherOutputs)
 
     common.Utils.printQuietless(f"{PROGNAME} {inputPath}: Done!")
 
@@ -6,6 +6,8 @@
 from __future__ import annotations
 
 import argparse
+import json
+import time
 from pathlib import Path
 from typing import Callable
 
@@ -92,6 +94,12 @@ def configureProcessedFiles(processedFiles: dict[common.FileSectionType, list[mi
 
 
 def analyzeProcessedFiles(processedFiles: dict[common.FileSectionType, list[mips.sections.SectionBase]], processedFilesOutputPaths: dict[common.FileSectionType, list[Path]], processedFilesCount: int, progressCallback: ProgressCallbackType|None=None):
+    """Analyzes every section, in order.
+
+    The analysis of each section may depend on the symbols found by every previously analyzed section (function starts
+    found by `jal`s, symbols referenced by `%hi`/`%lo` pairs, sizes of data symbols, etc), so the order in which sections
+    are analyzed changes the produced disassembly.
+    """
     i = 0
     for sectionType, filesInSection in sorted(processedFiles.items()):
         pathLists = processedFilesOutputPaths[sectionType]
@@ -99,8 +107,10 @@ def analyzeProcessedFiles(processedFiles: dict[common.FileSectionType, list[mips
             if progressCallback is not None:
                 filePath = pathLists[fileIndex]
                 progressCallback(i, str(filePath), processedFilesCount)
+            start = time.perf_counter()
             f.analyze()
             f.printAnalyzisResults()
+            f.context.stats.addSectionTime(f, "analyze", time.perf_counter() - start)
 
             i += 1
     return
@@ -123,7 +133,9 @@ def nukePointers(processedFiles: dict[common.FileSectionType, list[mips.sections
             if progressCallback is not None:
                 filePath = pathLists[fileIndex]
                 progressCallback(i, str(filePath), processedFilesCount)
+            start = time.perf_counter()
             f.removePointers()
+            f.context.stats.addSectionTime(f, "nuke_pointers", time.perf_counter() - start)
             i += 1
     return
 
@@ -137,6 +149,11 @@ def progressCallback_nukePointers(i: int, filePath: str, processedFilesCount: in
     common.Utils.printQuietless(progressStr, end="")
 
 
+def _writeSection(filePath: Path, section: mips.sections.SectionBase) -> None:
+    start = time.perf_counter()
+    mips.FilesHandlers.writeSection(filePath, section)
+    section.context.stats.addSectionTime(section, "write", time.perf_counter() - start)
+
 def writeProcessedFiles(processedFiles: dict[common.FileSectionType, list[mips.sections.SectionBase]], processedFilesOutputPaths: dict[common.FileSectionType, list[Path]], processedFilesCount: int, progressCallback: ProgressCallbackType|None=None):
     common.Utils.printVerbose("Writing files...")
     i = 0
@@ -148,7 +165,7 @@ def writeProcessedFiles(processedFiles: dict[common.FileSectionType, list[mips.s
                 progressCallback(i, str(filePath), processedFilesCount)
 
             common.Utils.printVerbose(f"Writing {filePath}")
-            mips.FilesHandlers.writeSection(filePath, f)
+            _writeSection(filePath, f)
             i += 1
     return
 
@@ -165,9 +182,20 @@ def progressCallback_writeProcessedFiles(i: int, filePath: str, processedFilesCo
         common.Utils.printQuietless()
 
 
+def _writeMigratedFunction(funcPath: Path, entry: mips.FunctionRodataEntry, textFile: mips.sections.SectionBase) -> None:
+    start = time.perf_counter()
+    with funcPath.open("w") as f:
+        entry.writeToFile(f, writeFunction=True)
+        writtenBytes = f.tell()
+    textFile.context.stats.addCount("migratedBytesEmitted", writtenBytes)
+    textFile.context.stats.addSectionTime(textFile, "migrate", time.perf_counter() - start)
+
 def migrateFunctions(processedFiles: dict[common.FileSectionType, list[mips.sections.SectionBase]], functionMigrationPath: Path, progressCallback: ProgressCallbackType|None=None):
     funcTotal = sum(len(x.symbolList) for x in processedFiles.get(common.FileSectionType.Text, []))
     rodataFileList = processedFiles.get(common.FileSectionType.Rodata, [])
+
+    rodataIndex = mips.RodataSymbolsIndex(rodataFileList)
+
     i = 0
     for textFile in processedFiles.get(common.FileSectionType.Text, []):
         filePath = functionMigrationPath / textFile.getName()
@@ -177,14 +205,14 @@ def migrateFunctions(processedFiles: dict[common.FileSectionType, list[mips.sect
                 progressCallback(i, func.getName(), funcTotal)
 
             assert isinstance(func, mips.symbols.SymbolFunction)
-            entry = mips.FunctionRodataEntry.getEntryForFuncFromPossibleRodataSections(func, rodataFileList)
+            entry = rodataIndex.getEntryForFunc(func)
 
             funcPath = filePath / (func.getName()+ ".s")
             common.Utils.printVerbose(f"Writing function {funcPath}")
-            with funcPath.open("w") as f:
-                entry.writeToFile(f, writeFunction=True)
+            _writeMigratedFunction(funcPath, entry, textFile)
 
             i += 1
+
     mips.FilesHandlers.writeOtherRodata(functionMigrationPath, rodataFileList)
 
 def progressCallback_migrateFunctions(i: int, funcName: str, funcTotal: int) -> None:
@@ -198,6 +226,29 @@ def progressCallback_migrateFunctions(i: int, funcName: str, funcTotal: int) ->
     common.Utils.printQuietless(progressStr, end="")
 
 
+def reportStats(context: common.Context, label: str, statsPath: str|None, printTimings: bool) -> None:
+    """Finishes the current phase of `context.stats` and reports what was recorded.
+
+    The full report is written as json to `statsPath` if it is not `None`, while `printTimings` prints the time spent
+    on each phase to stderr."""
+    context.stats.endPhase()
+
+    if printTimings:
+        phaseTimes = context.stats.phaseTimes
+        common.Utils.eprint(f"Timings of {label}:")
+        for phase, seconds in phaseTimes.items():
+            common.Utils.eprint(f"    {phase:<14} {seconds:10.3f}s")
+        common.Utils.eprint(f"    {'total':<14} {sum(phaseTimes.values()):10.3f}s")
+
+    if statsPath is not None:
+        report = {"version": __version__, "input": label, **context.getStatsReport()}
+        path = Path(statsPath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump(report, f, indent=4)
+            f.write("\n")
+
+
 def writeFunctionInfoCsv(processedFiles: dict[common.FileSectionType, list[mips.sections.SectionBase]], csvPath: Path):
     csvPath.parent.mkdir(parents=True, exist_ok=True)
 
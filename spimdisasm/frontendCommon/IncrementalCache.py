@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from .. import common
+from .. import mips
+
+from .. import __version__
+
+
+class IncrementalCache:
+    """On-disk cache used to skip the whole run when nothing changed since the previous one.
+
+    This is a whole-run up-to-date check, not a per-section cache. A single input digest is computed before the
+    analysis, covering the command line arguments, the contents of the input binary, the split entry and output path
+    of every section and the parsed context (segments, symbols and constants declared by the user or injected by the
+    frontend, banned addresses, relocation overrides and gp accesses).
+
+    If the input digest matches the one of the previous run and every file generated by the previous run still exists
+    then nothing is analyzed nor written. Otherwise every section is analyzed and written again, since the analysis of
+    each section depends on the symbols found by the others.
+    """
+
+    VERSION: int = 3
+    "Bump when the contents of the digest change"
+
+    MANIFEST_FILENAME: str = "manifest.json"
+
+    def __init__(self, cacheDir: Path, args: argparse.Namespace, ignoredArgs: set[str]):
+        self.cacheDir = cacheDir
+
+        self.argsDigest: str = self._digestArgs(args, ignoredArgs)
+
+        self._previousInputDigest: str|None = None
+        self._previousOutputs: list[str] = []
+
+        self.inputDigest: str|None = None
+
+        self._loadManifest()
+
+
+    @staticmethod
+    def _digestArgs(args: argparse.Namespace, ignoredArgs: set[str]) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(f"{IncrementalCache.VERSION},{__version__}\n".encode())
+        for key, value in sorted(vars(args).items()):
+            if key in ignoredArgs or callable(value):
+                continue
+            hasher.update(f"{key}={value!r}\n".encode())
+        return hasher.hexdigest()
+
+    def _loadManifest(self) -> None:
+        manifestPath = self.cacheDir / self.MANIFEST_FILENAME
+        if not manifestPath.exists():
+            return
+
+        try:
+            with manifestPath.open() as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            common.Utils.eprint(f"Warning: Unable to read incremental cache manifest '{manifestPath}', ignoring it")
+            return
+
+        if manifest.get("version") != self.VERSION or manifest.get("argsDigest") != self.argsDigest:
+            return
+
+        self._previousInputDigest = manifest.get("inputDigest")
+        self._previousOutputs = manifest.get("outputs", [])
+
+    def saveManifest(self, processedFiles: dict[common.FileSectionType, list[mips.sections.SectionBase]], processedFilesOutputPaths: dict[common.FileSectionType, list[Path]], otherOutputs: list[Path]) -> None:
+        """Writes the input digest of this run and the list of every file it generated.
+
+        `otherOutputs` are the files generated by the run besides the sections, like context files or function info
+        csvs. Directories are recorded with every file they contain."""
+        outputs: set[str] = set()
+        for _, _, outputFilePath in self._iterSections(processedFiles, processedFilesOutputPaths):
+            if outputFilePath.exists():
+                outputs.add(str(outputFilePath))
+        for path in otherOutputs:
+            if path.is_dir():
+                outputs.update(str(x) for x in path.rglob("*") if x.is_file())
+            elif path.exists():
+                outputs.add(str(path))
+
+        manifest = {
+            "version": self.VERSION,
+            "argsDigest": self.argsDigest,
+            "inputDigest": self.inputDigest,
+            "outputs": sorted(outputs),
+        }
+
+        self.cacheDir.mkdir(parents=True, exist_ok=True)
+        manifestPath = self.cacheDir / self.MANIFEST_FILENAME
+        tempPath = manifestPath.with_name(manifestPath.name + ".tmp")
+        with tempPath.open("w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        tempPath.replace(manifestPath)
+
+
+    @staticmethod
+    def getOutputFilePath(path: Path, section: mips.sections.SectionBase) -> Path:
+        "The file written by `FilesHandlers.writeSection` for the given section and path"
+        return Path(str(path) + section.sectionType.toStr() + ".s")
+
+    @staticmethod
+    def _iterSections(processedFiles: dict[common.FileSectionType, list[mips.sections.SectionBase]], processedFilesOutputPaths: dict[common.FileSectionType, list[Path]]):
+        for sectionType, filesInSection in processedFiles.items():
+            pathLists = processedFilesOutputPaths[sectionType]
+            for fileIndex, section in enumerate(filesInSection):
+                outputFilePath = IncrementalCache.getOutputFilePath(pathLists[fileIndex], section)
+                yield f"{sectionType.toStr()}:{pathLists[fileIndex]}", section, outputFilePath
+
+    @staticmethod
+    def _digestSymbols(hasher: hashlib._Hash, symbols: list[common.ContextSymbol]) -> None:
+        for contextSym in symbols:
+            hasher.update(contextSym.toCsv().encode())
+            hasher.update(b"\n")
+
+
+    @staticmethod
+    def _digestSegment(hasher: hashlib._Hash, segment: common.SymbolsSegment) -> None:
+        hasher.update(f"segment,{segment.vromStart},{segment.vromEnd},{segment.vramStart},{segment.vramEnd},{segment.overlayCategory}\n".encode())
+        IncrementalCache._digestSymbols(hasher, [contextSym for _, contextSym in segment.symbols.items()])
+        hasher.update(b"constants\n")
+        IncrementalCache._digestSymbols(hasher, [segment.constants[value] for value in sorted(segment.constants)])
+        hasher.update(f"pointers,{list(segment.newPointersInData)}\n".encode())
+
+    @staticmethod
+    def _digestContext(context: common.Context) -> str:
+        "Digest of everything the analysis reads from the context"
+        hasher = hashlib.sha256()
+
+        IncrementalCache._digestSegment(hasher, context.globalSegment)
+        IncrementalCache._digestSegment(hasher, context.unknownSegment)
+        for overlayCategory, segmentsPerVrom in sorted(context.overlaySegments.items()):
+            for segmentVrom, overlaySegment in sorted(segmentsPerVrom.items()):
+                hasher.update(f"overlay,{overlayCategory},{segmentVrom}\n".encode())
+                IncrementalCache._digestSegment(hasher, overlaySegment)
+
+        hasher.update(f"banned,{sorted(context.bannedSymbols)}\n".encode())
+        hasher.update(f"bannedRanges,{[(x.start, x.end) for x in context.bannedRangedSymbols]}\n".encode())
+
+        for vrom, reloc in sorted(context.globalRelocationOverrides.items()):
+            staticReference = None if reloc.staticReference is None else (reloc.staticReference.sectionType.value, reloc.staticReference.sectionVram)
+            hasher.update(f"reloc,{vrom},{reloc.relocType.name},{reloc.getName()},{reloc.addend},{staticReference},{reloc.globalReloc}\n".encode())
+
+        got = context.gpAccesses.got
+        hasher.update(f"got,{got.tableAddress},{got.localsTable},{got.globalsTable}\n".encode())
+        hasher.update(f"smallSections,{[(x.address, x.size) for x in context.gpAccesses.smallSections.values()]}\n".encode())
+
+        return hasher.hexdigest()
+
+    def computeInputDigest(self, processedFiles: dict[common.FileSectionType, list[mips.sections.SectionBase]], processedFilesOutputPaths: dict[common.FileSectionType, list[Path]], context: common.Context, inputPath: Path) -> None:
+        """Must be called before analyzing any section, after every symbol has been added to the context.
+
+        `inputPath` is the binary being disassembled, its whole contents are part of the digest."""
+        hasher = hashlib.sha256()
+        hasher.update(self.argsDigest.encode())
+        hasher.update(hashlib.sha256(inputPath.read_bytes()).hexdigest().encode())
+        for key, section, _ in self._iterSections(processedFiles, processedFilesOutputPaths):
+            splitEntry = (key, section.vromStart, section.vromEnd, section.vram, section.vramEnd, section.getName(), section.isHandwritten, section.overlayCategory)
+            hasher.update(f"{splitEntry!r}\n".encode())
+        hasher.update(self._digestContext(context).encode())
+        self.inputDigest = hasher.hexdigest()
+
+    def isUpToDate(self) -> bool:
+        """Checks if the inputs of the whole run are the same as in the previous run and that every file generated by
+        the previous run still exists.
+
+        Must be called after `computeInputDigest`."""
+        if self.inputDigest is None or self.inputDigest != self._previousInputDigest:
+            return False
+        return all(Path(outputFilePath).exists() for outputFilePath in self._previousOutputs)
@@ -7,3 +7,4 @@ from __future__ import annotations
 
 
 from . import FrontendUtilities as FrontendUtilities
+from .IncrementalCache import IncrementalCache as IncrementalCache
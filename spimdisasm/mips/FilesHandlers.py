@@ -61,7 +61,8 @@ def createSectionFromSplitEntry(splitEntry: common.FileSplitEntry, array_of_byte
 
 def writeSection(path: Path, fileSection: sections.SectionBase):
     path.parent.mkdir(parents=True, exist_ok=True)
-    fileSection.saveToFile(str(path))
+    writtenBytes = fileSection.saveToFile(str(path))
+    fileSection.context.stats.addCount("bytesEmitted", writtenBytes)
     return path
 
 
@@ -115,7 +116,7 @@ def writeOtherRodata(path: Path, rodataFileList: list[sections.SectionBase]):
 
             with rodataSymbolPath.open("w") as f:
                 f.write(".section .rodata" + common.GlobalConfig.LINE_ENDS)
-                f.write(rodataSym.disassemble(migrate=True))
+                rodataSym.disassembleTo(f, migrate=True)
 
 
 def writeMigratedFunctionsList(processedSegments: dict[common.FileSectionType, list[sections.SectionBase]], functionMigrationPath: Path, name: str) -> None:
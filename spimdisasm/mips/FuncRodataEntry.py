@@ -32,7 +32,7 @@ class FunctionRodataEntry:
             # Write the rdata
             f.write(f".section {self.sectionRodata}{common.GlobalConfig.LINE_ENDS}")
             for sym in self.rodataSyms:
-                f.write(sym.disassemble(migrate=True, useGlobalLabel=True, isSplittedSymbol=True))
+                sym.disassembleTo(f, migrate=True, useGlobalLabel=True, isSplittedSymbol=True)
                 f.write(common.GlobalConfig.LINE_ENDS)
 
         if len(self.lateRodataSyms) > 0:
@@ -51,7 +51,7 @@ class FunctionRodataEntry:
                     align = 8
                 f.write(f".late_rodata_alignment {align}{common.GlobalConfig.LINE_ENDS}")
             for sym in self.lateRodataSyms:
-                f.write(sym.disassemble(migrate=True, useGlobalLabel=True, isSplittedSymbol=True))
+                sym.disassembleTo(f, migrate=True, useGlobalLabel=True, isSplittedSymbol=True)
                 f.write(common.GlobalConfig.LINE_ENDS)
 
         if self.function is not None:
@@ -60,7 +60,7 @@ class FunctionRodataEntry:
 
             if writeFunction:
                 # Write the function itself
-                f.write(self.function.disassemble(migrate=self.hasRodataSyms(), isSplittedSymbol=True))
+                self.function.disassembleTo(f, migrate=self.hasRodataSyms(), isSplittedSymbol=True)
 
     @staticmethod
     def getEntryForFuncFromSection(func: symbols.SymbolFunction|None, rodataSection: sections.SectionRodata|None) -> FunctionRodataEntry:
@@ -109,31 +109,101 @@ class FunctionRodataEntry:
                 # We only care for the symbols which will not be migrated
                 allUnmigratedRodataSymbols.append(rodataSym)
 
+        rodataIndex = RodataSymbolsIndex([rodataSection] if rodataSection is not None else [])
+
         allEntries: list[FunctionRodataEntry] = []
+        unmigratedIndex = 0
 
         textSymbols = textSection.symbolList if textSection is not None else []
         for func in textSymbols:
             assert isinstance(func, symbols.SymbolFunction)
 
-            entry = FunctionRodataEntry.getEntryForFuncFromSection(func, rodataSection)
+            entry = rodataIndex.getEntryForFunc(func)
 
             if len(entry.rodataSyms) > 0:
                 firstFuncRodataSym = entry.rodataSyms[0]
 
-                while len(allUnmigratedRodataSymbols) > 0:
-                    rodataSym = allUnmigratedRodataSymbols[0]
+                while unmigratedIndex < len(allUnmigratedRodataSymbols):
+                    rodataSym = allUnmigratedRodataSymbols[unmigratedIndex]
 
                     if rodataSym.vram >= firstFuncRodataSym.vram:
                         # Take all the symbols up to the first rodata sym referenced by the current function
                         break
 
                     allEntries.append(FunctionRodataEntry(rodataSyms=[rodataSym]))
-                    del allUnmigratedRodataSymbols[0]
+                    unmigratedIndex += 1
 
             allEntries.append(entry)
 
         # Check if there's any rodata symbol remaining and add it to the list
-        for rodataSym in allUnmigratedRodataSymbols:
+        for rodataSym in allUnmigratedRodataSymbols[unmigratedIndex:]:
             allEntries.append(FunctionRodataEntry(rodataSyms=[rodataSym]))
 
         return allEntries
+
+
+class RodataSymbolsIndex:
+    """Maps the vram of every symbol of a list of rodata sections to the symbol itself, allowing to find the rodata
+    referenced by a function without going through every rodata symbol.
+
+    Must be built after analyzing every section. Querying it gives the same entries as
+    `FunctionRodataEntry.getEntryForFuncFromPossibleRodataSections` with the same list of sections.
+    """
+
+    def __init__(self, rodataFileList: list[sections.SectionBase]):
+        self._symbolsByVram: dict[int, list[tuple[int, int, symbols.SymbolBase]]] = dict()
+        "key: vram of the symbol, value: list of (index of the section, index of the symbol in the section, symbol)"
+
+        for sectionIndex, rodataSection in enumerate(rodataFileList):
+            assert isinstance(rodataSection, sections.SectionRodata)
+
+            for symbolIndex, rodataSym in enumerate(rodataSection.symbolList):
+                if rodataSym.vram not in rodataSection.symbolsVRams:
+                    continue
+
+                symbolsList = self._symbolsByVram.get(rodataSym.vram)
+                if symbolsList is None:
+                    symbolsList = []
+                    self._symbolsByVram[rodataSym.vram] = symbolsList
+                symbolsList.append((sectionIndex, symbolIndex, rodataSym))
+
+    def getEntryForFunc(self, func: symbols.SymbolFunction|None) -> FunctionRodataEntry:
+        "Rodata referenced by the function, all of it coming from the first section which has any rodata to migrate"
+        if func is None:
+            return FunctionRodataEntry(func)
+
+        bestSectionIndex: int|None = None
+        referencedSymbols: list[tuple[int, symbols.SymbolBase]] = []
+
+        for vram in func.instrAnalyzer.referencedVrams:
+            symbolsList = self._symbolsByVram.get(vram)
+            if symbolsList is None:
+                continue
+
+            for sectionIndex, symbolIndex, rodataSym in symbolsList:
+                if bestSectionIndex is not None and sectionIndex > bestSectionIndex:
+                    continue
+
+                if not rodataSym.shouldMigrate():
+                    continue
+
+                if bestSectionIndex is None or sectionIndex < bestSectionIndex:
+                    bestSectionIndex = sectionIndex
+                    referencedSymbols = []
+                referencedSymbols.append((symbolIndex, rodataSym))
+
+        if len(referencedSymbols) == 0:
+            return FunctionRodataEntry(func)
+
+        # Keep the same order the symbols have in the section
+        referencedSymbols.sort(key=lambda x: x[0])
+
+        rodataList: list[symbols.SymbolBase] = []
+        lateRodataList: list[symbols.SymbolBase] = []
+        for _, rodataSym in referencedSymbols:
+            if rodataSym.contextSym.isLateRodata():
+                lateRodataList.append(rodataSym)
+            else:
+                rodataList.append(rodataSym)
+
+        return FunctionRodataEntry(func, rodataList, lateRodataList)
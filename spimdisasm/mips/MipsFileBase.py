@@ -31,7 +31,20 @@ class FileBase(common.ElementBase):
 
         self.stringEncoding: str = "ASCII"
 
-        self.bytes: bytes = common.Utils.wordsToBytes(self.words)
+        self._bytes: bytes|None = None
+
+        self._stringCandidateIndex: common.StringCandidateIndex|None = None
+
+    @property
+    def bytes(self) -> bytes:
+        "The words of this file packed as bytes. Packed on first access, since most sections never need them"
+        if self._bytes is None:
+            self._bytes = common.Utils.wordsToBytes(self.words)
+        return self._bytes
+
+    @bytes.setter
+    def bytes(self, value: bytes) -> None:
+        self._bytes = value
 
 
     def setCommentOffset(self, commentOffset: int):
@@ -156,38 +169,38 @@ class FileBase(common.ElementBase):
         return False
 
 
-    def disassemble(self, migrate: bool=False, useGlobalLabel: bool=True) -> str:
-        output = ""
-
+    def disassembleTo(self, writer: TextIO, migrate: bool=False, useGlobalLabel: bool=True) -> None:
         if not migrate:
-            output += self.getSpimdisasmVersionString()
+            writer.write(self.getSpimdisasmVersionString())
 
         for i, sym in enumerate(self.symbolList):
-            output += sym.disassemble(migrate=migrate, useGlobalLabel=useGlobalLabel, isSplittedSymbol=False)
+            sym.disassembleTo(writer, migrate=migrate, useGlobalLabel=useGlobalLabel, isSplittedSymbol=False)
             if i + 1 < len(self.symbolList):
-                output += common.GlobalConfig.LINE_ENDS
-        return output
+                writer.write(common.GlobalConfig.LINE_ENDS)
 
     def disassembleToFile(self, f: TextIO):
         if common.GlobalConfig.ASM_USE_PRELUDE:
             f.write(self.getAsmPrelude())
             f.write(common.GlobalConfig.LINE_ENDS)
-        f.write(self.disassemble())
+        self.disassembleTo(f)
 
 
-    def saveToFile(self, filepath: str):
+    def saveToFile(self, filepath: str) -> int:
+        "Returns the size in bytes of the written assembly file, or 0 if nothing was written or it was printed to stdout"
         if len(self.symbolList) == 0:
-            return
+            return 0
 
         if filepath == "-":
             self.disassembleToFile(sys.stdout)
-        else:
-            if common.GlobalConfig.WRITE_BINARY:
-                if self.sizew > 0:
-                    buffer = common.Utils.wordsToBytes(self.words)
-                    common.Utils.writeBytesToFile(Path(filepath + self.sectionType.toStr()), buffer)
-            with open(filepath + self.sectionType.toStr() + ".s", "w", encoding="utf-8") as f:
-                self.disassembleToFile(f)
+            return 0
+
+        if common.GlobalConfig.WRITE_BINARY:
+            if self.sizew > 0:
+                buffer = common.Utils.wordsToBytes(self.words)
+                common.Utils.writeBytesToFile(Path(filepath + self.sectionType.toStr()), buffer)
+        with open(filepath + self.sectionType.toStr() + ".s", "w", encoding="utf-8") as f:
+            self.disassembleToFile(f)
+            return f.tell()
 
 
 def createEmptyFile() -> FileBase:
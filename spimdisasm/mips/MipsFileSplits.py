@@ -178,9 +178,11 @@ class FileSplits(FileBase):
 
         return was_updated
 
-    def saveToFile(self, filepath: str):
+    def saveToFile(self, filepath: str) -> int:
+        writtenBytes = 0
         for sectDict in self.sectionsDict.values():
             for name, section in sectDict.items():
                 if name != "" and not filepath.endswith("/"):
                     name = " " + name
-                section.saveToFile(filepath + name)
+                writtenBytes += section.saveToFile(filepath + name)
+        return writtenBytes
@@ -9,6 +9,7 @@ from . import sections as sections
 from . import symbols as symbols
 
 from .FuncRodataEntry import FunctionRodataEntry as FunctionRodataEntry
+from .FuncRodataEntry import RodataSymbolsIndex as RodataSymbolsIndex
 
 from . import FilesHandlers as FilesHandlers
 
@@ -10,6 +10,15 @@ from ... import common
 from ..MipsFileBase import FileBase
 
 class SectionBase(FileBase):
+    def getStringCandidateIndex(self) -> common.StringCandidateIndex:
+        "Index of the string candidates of this section, built on first use and rebuilt if the bytes or the encoding change"
+        index = self._stringCandidateIndex
+        buf = self.bytes
+        if index is None or index.buf is not buf or index.stringEncoding != self.stringEncoding:
+            index = common.StringCandidateIndex(buf, self.stringEncoding)
+            self._stringCandidateIndex = index
+        return index
+
     def checkWordIsASymbolReference(self, word: int) -> bool:
         if not self.context.totalVramRange.isInRange(word):
             return False
@@ -73,7 +82,7 @@ class SectionBase(FileBase):
 
         currentVram = self.getVramOffset(localOffset)
         currentVrom = self.getVromOffset(localOffset)
-        _, rawStringSize = common.Utils.decodeBytesToStrings(self.bytes, localOffset, self.stringEncoding)
+        rawStringSize = self.getStringCandidateIndex().getCStringSize(localOffset)
         if rawStringSize < 0:
             # String can't be decoded
             return False
@@ -113,7 +122,7 @@ class SectionBase(FileBase):
 
         currentVram = self.getVramOffset(localOffset)
         currentVrom = self.getVromOffset(localOffset)
-        _, rawStringSize = common.Utils.decodeBytesToPascalStrings(self.bytes, localOffset, self.stringEncoding, terminator=0x20)
+        rawStringSize = self.getStringCandidateIndex().getPascalStringSize(localOffset)
         if rawStringSize < 0:
             # String can't be decoded
             return False
@@ -30,11 +30,21 @@ class SectionData(SectionBase):
 
         needsFurtherAnalyzis = False
 
+        # If every word belongs to the same segment then look up the symbols directly on it, instead of going through
+        # every segment for each word
+        segment = self.getSegmentForVromRange(self.vromStart, self.vromEnd)
+
+        # Most words can't be pointers, skip them without going through `checkWordIsASymbolReference`
+        pointerCandidates = self.context.getPointerCandidates(self.words)
+
         for w in self.words:
             currentVram = self.getVramOffset(localOffset)
             currentVrom = self.getVromOffset(localOffset)
 
-            contextSym = self.getSymbol(currentVram, vromAddress=currentVrom, tryPlusOffset=False)
+            if segment is not None:
+                contextSym = segment.getSymbol(currentVram, tryPlusOffset=False)
+            else:
+                contextSym = self.getSymbol(currentVram, vromAddress=currentVrom, tryPlusOffset=False)
             if contextSym is not None:
                 symbolList.append((localOffset, contextSym))
                 localOffsetsWithSymbols.add(localOffset)
@@ -55,7 +65,7 @@ class SectionData(SectionBase):
                 symbolList.append((localOffset, contextSym))
                 localOffsetsWithSymbols.add(localOffset)
 
-            if self.checkWordIsASymbolReference(w):
+            if w in pointerCandidates and self.checkWordIsASymbolReference(w):
                 if w < currentVram and self.containsVram(w):
                     # References a data symbol from this section and it is behind this current symbol
                     needsFurtherAnalyzis = True
@@ -36,10 +36,18 @@ class SectionRodata(SectionBase):
         jumpTableSym: common.ContextSymbol|None = None
         firstJumptableWord = -1
 
+        # Skip the segment resolution of every lookup when the whole section is on a single segment
+        segment = self.getSegmentForVromRange(self.vromStart, self.vromEnd)
+
+        pointerCandidates = self.context.getPointerCandidates(self.words)
+
         for w in self.words:
             currentVram = self.getVramOffset(localOffset)
             currentVrom = self.getVromOffset(localOffset)
-            contextSym = self.getSymbol(currentVram, vromAddress=currentVrom, tryPlusOffset=False)
+            if segment is not None:
+                contextSym = segment.getSymbol(currentVram, tryPlusOffset=False)
+            else:
+                contextSym = self.getSymbol(currentVram, vromAddress=currentVrom, tryPlusOffset=False)
 
             if contextSym is not None:
                 lastVramSymbol = contextSym
@@ -100,7 +108,8 @@ class SectionRodata(SectionBase):
                     contextSym.isMaybePascalString = self._pascalStringGuesser(contextSym, localOffset)
                     lastVramSymbol = contextSym
 
-                self.checkWordIsASymbolReference(w)
+                if w in pointerCandidates:
+                    self.checkWordIsASymbolReference(w)
 
             if contextSym is not None:
                 self.symbolsVRams.add(currentVram)
@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+import array
 import rabbitizer
 
 from ... import common
@@ -15,6 +16,105 @@ from ..MipsFileBase import FileBase
 from . import SectionBase
 
 
+class _InstrFlags:
+    """Bit flags describing the properties of an instruction which are used by the function finder.
+
+    None of these properties depend on the vram of the instruction, so they can be computed once per distinct word.
+    """
+
+    NOP                 = 1 << 0
+    IMPLEMENTED         = 1 << 1
+    "The instruction is both implemented and valid"
+    LIKELY_HANDWRITTEN  = 1 << 2
+    BRANCH              = 1 << 3
+    "Either a branch or an unconditional branch"
+    JUMP                = 1 << 4
+    RETURN              = 1 << 5
+    JUMPTABLE_JUMP      = 1 << 6
+    LINKS               = 1 << 7
+    JUMP_WITH_ADDRESS   = 1 << 8
+
+    @staticmethod
+    def classify(instr: rabbitizer.Instruction) -> int:
+        flags = 0
+        if instr.isNop():
+            flags |= _InstrFlags.NOP
+        if instr.isImplemented() and instr.isValid():
+            flags |= _InstrFlags.IMPLEMENTED
+        if instr.isLikelyHandwritten():
+            flags |= _InstrFlags.LIKELY_HANDWRITTEN
+        if instr.isBranch() or instr.isUnconditionalBranch():
+            flags |= _InstrFlags.BRANCH
+        if instr.isJump():
+            flags |= _InstrFlags.JUMP
+        if instr.isReturn():
+            flags |= _InstrFlags.RETURN
+        if instr.isJumptableJump():
+            flags |= _InstrFlags.JUMPTABLE_JUMP
+        if instr.doesLink():
+            flags |= _InstrFlags.LINKS
+        if instr.isJumpWithAddress():
+            flags |= _InstrFlags.JUMP_WITH_ADDRESS
+        return flags
+
+    @staticmethod
+    def classifyWords(words: list[int], instrCat: rabbitizer.Enum) -> array.array[int]:
+        "Returns the flags of every word of the list, decoding each distinct word only once"
+        flagsPerWord: dict[int, int] = dict()
+        for word in set(words):
+            flagsPerWord[word] = _InstrFlags.classify(rabbitizer.Instruction(word, category=instrCat))
+        return array.array("H", [flagsPerWord[word] for word in words])
+
+
+class _SymbolsByOffset:
+    """Exact symbol lookups by offset inside a text section, as done by `SectionText._findFunctions`.
+
+    If every offset of the section belongs to a single segment then the symbols of the section's range are fetched
+    once, avoiding resolving the segment and symbol on each lookup. Otherwise every lookup goes through `getSymbol`.
+    """
+
+    def __init__(self, section: SectionText, endOffset: int):
+        self.section = section
+        self.symbols: dict[int, common.ContextSymbol]|None = None
+        "key: offset relative to the start of the section"
+
+        segment = self._getSingleSegment(endOffset)
+        if segment is not None:
+            self.symbols = dict()
+            vramStart = section.getVramOffset(0)
+            for vram, contextSym in segment.getSymbolsRange(vramStart, section.getVramOffset(endOffset)):
+                self.symbols[vram - vramStart] = contextSym
+
+    def _getSingleSegment(self, endOffset: int) -> common.SymbolsSegment|None:
+        section = self.section
+        vromStart = section.getVromOffset(0)
+        vromLast = section.getVromOffset(endOffset) - 1
+        globalSegment = section.context.globalSegment
+        segment = section.getSegmentForVrom(vromStart)
+        if segment is not section.getSegmentForVrom(vromLast):
+            return None
+        if segment is globalSegment:
+            return segment
+        if globalSegment.isVromInRange(vromStart) or globalSegment.isVromInRange(vromLast):
+            return None
+        if globalSegment.vromStart is not None and vromStart <= globalSegment.vromStart <= vromLast:
+            return None
+        if section.overlayCategory is None or segment.overlayCategory != section.overlayCategory:
+            return None
+        return segment
+
+    def get(self, offset: int) -> common.ContextSymbol|None:
+        if self.symbols is not None:
+            return self.symbols.get(offset)
+        return self.section.getSymbol(self.section.getVramOffset(offset), vromAddress=self.section.getVromOffset(offset), tryPlusOffset=False, checkGlobalSegment=False)
+
+    def addFunction(self, offset: int) -> common.ContextSymbol:
+        contextSym = self.section.addFunction(self.section.getVramOffset(offset), isAutogenerated=True, symbolVrom=self.section.getVromOffset(offset))
+        if self.symbols is not None:
+            self.symbols[offset] = contextSym
+        return contextSym
+
+
 class SectionText(SectionBase):
     def __init__(self, context: common.Context, vromStart: int, vromEnd: int, vram: int, filename: str, array_of_bytes: bytes, segmentVromStart: int, overlayCategory: str|None):
         super().__init__(context, vromStart, vromEnd, vram, filename, common.Utils.bytesToWords(array_of_bytes, vromStart, vromEnd), common.FileSectionType.Text, segmentVromStart, overlayCategory)
@@ -50,10 +150,10 @@ class SectionText(SectionBase):
         return self.detectRedundantFunctionEnd
 
 
-    def _findFunctions_branchChecker(self, instructionOffset: int, instr: rabbitizer.Instruction, funcsStartsList: list[int], unimplementedInstructionsFuncList: list[bool], farthestBranch: int, isLikelyHandwritten: bool, isInstrImplemented: bool) -> tuple[int, bool]:
+    def _findFunctions_branchChecker(self, instructionOffset: int, instr: rabbitizer.Instruction, instrFlags: int, funcsStartsList: list[int], unimplementedInstructionsFuncList: list[bool], farthestBranch: int, isLikelyHandwritten: bool, isInstrImplemented: bool, symbolsByOffset: _SymbolsByOffset) -> tuple[int, bool]:
         haltFunctionSearching = False
 
-        if instr.isJumpWithAddress():
+        if instrFlags & _InstrFlags.JUMP_WITH_ADDRESS:
             # If this instruction is a jump and it is jumping to a function then
             # don't treat it as a branch, it is probably actually being used as
             # a jump
@@ -70,7 +170,7 @@ class SectionText(SectionBase):
         if branchOffset < 0:
             if branchOffset + instructionOffset < 0:
                 # Whatever we are reading is not a valid instruction
-                if not instr.isJump(): # Make an exception for `j`
+                if not instrFlags & _InstrFlags.JUMP: # Make an exception for `j`
                     haltFunctionSearching = True
             # make sure to not branch outside of the current function
             if not isLikelyHandwritten and isInstrImplemented:
@@ -80,9 +180,7 @@ class SectionText(SectionBase):
                         break
                     otherFuncStartOffset = funcsStartsList[j] * 4
                     if (branchOffset + instructionOffset) < otherFuncStartOffset:
-                        vram = self.getVramOffset(otherFuncStartOffset)
-                        vromAddress = self.getVromOffset(otherFuncStartOffset)
-                        funcSymbol = self.getSymbol(vram, vromAddress=vromAddress, tryPlusOffset=False, checkGlobalSegment=False)
+                        funcSymbol = symbolsByOffset.get(otherFuncStartOffset)
                         if funcSymbol is not None and funcSymbol.isTrustableFunction(self.instrCat == rabbitizer.InstrCategory.RSP):
                             j -= 1
                             continue
@@ -93,7 +191,7 @@ class SectionText(SectionBase):
                     j -= 1
         return farthestBranch, haltFunctionSearching
 
-    def _findFunctions_checkFunctionEnded(self, instructionOffset: int, instr: rabbitizer.Instruction, index: int, currentVrom: int, currentVram: int, currentFunctionSym: common.ContextSymbol|None, farthestBranch: int, currentInstructionStart: int, isLikelyHandwritten: bool, instrsList: list[rabbitizer.Instruction], nInstr: int) -> tuple[bool, bool]:
+    def _findFunctions_checkFunctionEnded(self, instructionOffset: int, instr: rabbitizer.Instruction, instrFlags: int, index: int, currentVrom: int, currentFunctionSym: common.ContextSymbol|None, farthestBranch: int, currentInstructionStart: int, isLikelyHandwritten: bool, flagsList: array.array[int], nInstr: int, symbolsByOffset: _SymbolsByOffset) -> tuple[bool, bool]:
         functionEnded = False
         prevFuncHadUserDeclaredSize = False
 
@@ -104,14 +202,14 @@ class SectionText(SectionBase):
                 functionEnded = True
                 prevFuncHadUserDeclaredSize = True
         else:
-            funcSymbol = self.getSymbol(currentVram + 8, vromAddress=currentVrom + 8, tryPlusOffset=False, checkGlobalSegment=False)
+            funcSymbol = symbolsByOffset.get(instructionOffset + 8)
             # If there's another function after this then the current function has ended
             if funcSymbol is not None and funcSymbol.isTrustableFunction(self.instrCat == rabbitizer.InstrCategory.RSP):
                 if funcSymbol.vromAddress is None or currentVrom + 8 == funcSymbol.vromAddress:
                     functionEnded = True
 
-            if not functionEnded and not (farthestBranch > 0) and instr.isJump():
-                if instr.isReturn():
+            if not functionEnded and not (farthestBranch > 0) and instrFlags & _InstrFlags.JUMP:
+                if instrFlags & _InstrFlags.RETURN:
                     # Found a jr $ra and there are no branches outside of this function
                     if self.tryDetectRedundantFunctionEnd():
                         # IDO -g, -g1 and -g2 can generate a redundant and unused `jr $ra; nop`. In normal conditions this would be detected
@@ -124,23 +222,23 @@ class SectionText(SectionBase):
                         #  nop
                         redundantPatternDetected = False
                         if index + 3 < nInstr:
-                            instr1 = instrsList[index+1]
-                            instr2 = instrsList[index+2]
-                            instr3 = instrsList[index+3]
-                            if funcSymbol is None and instr1.isNop() and instr2.isReturn() and instr3.isNop():
+                            flags1 = flagsList[index+1]
+                            flags2 = flagsList[index+2]
+                            flags3 = flagsList[index+3]
+                            if funcSymbol is None and flags1 & _InstrFlags.NOP and flags2 & _InstrFlags.RETURN and flags3 & _InstrFlags.NOP:
                                 redundantPatternDetected = True
                         if not redundantPatternDetected:
                             functionEnded = True
                     else:
                         functionEnded = True
-                elif instr.isJumptableJump():
+                elif instrFlags & _InstrFlags.JUMPTABLE_JUMP:
                     # Usually jumptables, ignore
                     pass
-                elif not instr.doesLink():
+                elif not instrFlags & _InstrFlags.LINKS:
                     if isLikelyHandwritten or self.instrCat == rabbitizer.InstrCategory.RSP:
                         # I don't remember the reasoning of this condition...
                         functionEnded = True
-                    elif instr.isJumpWithAddress():
+                    elif instrFlags & _InstrFlags.JUMP_WITH_ADDRESS:
                         # If this instruction is a jump and it is jumping to a function then
                         # we can consider this as a function end. This can happen as a
                         # tail-optimization in modern compilers
@@ -160,6 +258,11 @@ class SectionText(SectionBase):
         if nInstr == 0:
             return [0], [False]
 
+        # Pre-pass: classify every instruction and fetch the symbols of this section once, instead of querying the
+        # instruction objects and resolving symbols through the context on every step of the loop
+        flagsList = _InstrFlags.classifyWords(list(map(rabbitizer.Instruction.getRaw, instrsList)), self.instrCat)
+        symbolsByOffset = _SymbolsByOffset(self, nInstr*4 + 8)
+
         functionEnded = False
         farthestBranch = 0
         funcsStartsList: list[int] = [0]
@@ -167,22 +270,21 @@ class SectionText(SectionBase):
 
         instructionOffset = 0
         currentInstructionStart = 0
-        currentFunctionSym = self.getSymbol(self.getVramOffset(instructionOffset), vromAddress=self.getVromOffset(instructionOffset), tryPlusOffset=False, checkGlobalSegment=False)
+        currentFunctionSym = symbolsByOffset.get(instructionOffset)
 
         isLikelyHandwritten = self.isHandwritten
 
         isInstrImplemented = True
         index = 0
 
-        if instrsList[0].isNop():
+        if flagsList[0] & _InstrFlags.NOP:
             isboundary = False
             # Loop over until we find a instruction that isn't a nop
             while index < nInstr:
                 if currentFunctionSym is not None:
                     break
 
-                instr = instrsList[index]
-                if not instr.isNop():
+                if not flagsList[index] & _InstrFlags.NOP:
                     if isboundary:
                         self.fileBoundaries.append(self.inFileOffset + index*4)
                     break
@@ -191,7 +293,7 @@ class SectionText(SectionBase):
                 isboundary |= ((instructionOffset % 16) == 0)
 
                 currentInstructionStart = instructionOffset
-                currentFunctionSym = self.getSymbol(self.getVramOffset(instructionOffset), vromAddress=self.getVromOffset(instructionOffset), tryPlusOffset=False, checkGlobalSegment=False)
+                currentFunctionSym = symbolsByOffset.get(instructionOffset)
 
             if index != 0:
                 funcsStartsList.append(index)
@@ -201,7 +303,8 @@ class SectionText(SectionBase):
 
         while index < nInstr:
             instr = instrsList[index]
-            if not instr.isImplemented() or not instr.isValid():
+            instrFlags = flagsList[index]
+            if not instrFlags & _InstrFlags.IMPLEMENTED:
                 isInstrImplemented = False
 
             if functionEnded:
@@ -211,7 +314,7 @@ class SectionText(SectionBase):
                 index += 1
                 instructionOffset += 4
 
-                auxSym = self.getSymbol(self.getVramOffset(instructionOffset), vromAddress=self.getVromOffset(instructionOffset), tryPlusOffset=False, checkGlobalSegment=False)
+                auxSym = symbolsByOffset.get(instructionOffset)
 
                 isboundary = False
                 # Loop over until we find a instruction that isn't a nop
@@ -219,8 +322,7 @@ class SectionText(SectionBase):
                     if auxSym is not None:
                         break
 
-                    instr = instrsList[index]
-                    if not instr.isNop():
+                    if not flagsList[index] & _InstrFlags.NOP:
                         if isboundary:
                             self.fileBoundaries.append(self.inFileOffset + index*4)
                         break
@@ -228,7 +330,7 @@ class SectionText(SectionBase):
                     instructionOffset += 4
                     isboundary |= ((instructionOffset % 16) == 0)
 
-                    auxSym = self.getSymbol(self.getVramOffset(instructionOffset), vromAddress=self.getVromOffset(instructionOffset), tryPlusOffset=False, checkGlobalSegment=False)
+                    auxSym = symbolsByOffset.get(instructionOffset)
 
                 currentInstructionStart = instructionOffset
                 currentFunctionSym = auxSym
@@ -238,24 +340,24 @@ class SectionText(SectionBase):
                 if index >= nInstr:
                     break
                 if prevFuncHadUserDeclaredSize:
-                    auxSym = self.addFunction(self.getVramOffset(instructionOffset), isAutogenerated=True, symbolVrom=self.getVromOffset(instructionOffset))
+                    auxSym = symbolsByOffset.addFunction(instructionOffset)
                     auxSym.isAutocreatedSymFromOtherSizedSym = True
                 prevFuncHadUserDeclaredSize = False
                 instr = instrsList[index]
-                isInstrImplemented = instr.isImplemented() and instr.isValid()
+                instrFlags = flagsList[index]
+                isInstrImplemented = bool(instrFlags & _InstrFlags.IMPLEMENTED)
 
-            currentVram = self.getVramOffset(instructionOffset)
             currentVrom = self.getVromOffset(instructionOffset)
 
             if self.instrCat != rabbitizer.InstrCategory.RSP and not isLikelyHandwritten:
-                isLikelyHandwritten = instr.isLikelyHandwritten()
+                isLikelyHandwritten = bool(instrFlags & _InstrFlags.LIKELY_HANDWRITTEN)
 
-            if instr.isBranch() or instr.isUnconditionalBranch():
-                farthestBranch, haltFunctionSearching = self._findFunctions_branchChecker(instructionOffset, instr, funcsStartsList, unimplementedInstructionsFuncList, farthestBranch, isLikelyHandwritten, isInstrImplemented)
+            if instrFlags & _InstrFlags.BRANCH:
+                farthestBranch, haltFunctionSearching = self._findFunctions_branchChecker(instructionOffset, instr, instrFlags, funcsStartsList, unimplementedInstructionsFuncList, farthestBranch, isLikelyHandwritten, isInstrImplemented, symbolsByOffset)
                 if haltFunctionSearching:
                     break
 
-            functionEnded, prevFuncHadUserDeclaredSize = self._findFunctions_checkFunctionEnded(instructionOffset, instr, index, currentVrom, currentVram, currentFunctionSym, farthestBranch, currentInstructionStart, isLikelyHandwritten, instrsList, nInstr)
+            functionEnded, prevFuncHadUserDeclaredSize = self._findFunctions_checkFunctionEnded(instructionOffset, instr, instrFlags, index, currentVrom, currentFunctionSym, farthestBranch, currentInstructionStart, isLikelyHandwritten, flagsList, nInstr, symbolsByOffset)
 
             index += 1
             farthestBranch -= 4
@@ -5,7 +5,8 @@
 
 from __future__ import annotations
 
-from typing import Callable
+import io
+from typing import Callable, TextIO
 import rabbitizer
 
 from ... import common
@@ -194,27 +195,30 @@ class SymbolBase(common.ElementBase):
         isWordSized = not self.contextSym.isByte() and not self.contextSym.isShort()
 
         if self.sectionType != common.FileSectionType.Bss:
-            for i in range(0, self.sizew):
-                localOffset = 4*i
-                for j in range(0, 4):
-                    if i == 0 and j == 0:
-                        continue
-
-                    # Possible symbols in the middle of words
-                    currentVram = self.getVramOffset(localOffset+j)
-                    currentVrom = self.getVromOffset(localOffset+j)
-                    contextSym = self.getSymbol(currentVram, vromAddress=currentVrom, tryPlusOffset=False)
+            # Possible symbols in the middle of words
+            segment = self.getSegmentForVromRange(self.vromStart, self.vromStart + 4*self.sizew)
+            if segment is not None:
+                # Every byte of this symbol belongs to the same segment, so go through the symbols of that range instead
+                # of looking up every byte
+                innerSymbols = [(vram - self.vram, contextSym) for vram, contextSym in segment.getSymbolsRange(self.vram + 1, self.vram + 4*self.sizew)]
+            else:
+                innerSymbols = []
+                for localOffset in range(1, 4*self.sizew):
+                    contextSym = self.getSymbol(self.getVramOffset(localOffset), vromAddress=self.getVromOffset(localOffset), tryPlusOffset=False)
                     if contextSym is not None:
-                        contextSym.vromAddress = self.getVromOffset(localOffset+j)
-                        contextSym.isDefined = True
-                        contextSym.sectionType = self.sectionType
-                        contextSym.setTypeIfUnset(self.contextSym.getTypeSpecial(), self.contextSym.isAutogenerated)
-                        contextSym.inFileOffset = self.inFileOffset + localOffset+j
-                        if self.parent is not None:
-                            contextSym.parentFileName = self.parent.getName()
-
-                if isWordSized:
-                    word = self.words[i]
+                        innerSymbols.append((localOffset, contextSym))
+
+            for localOffset, contextSym in innerSymbols:
+                contextSym.vromAddress = self.getVromOffset(localOffset)
+                contextSym.isDefined = True
+                contextSym.sectionType = self.sectionType
+                contextSym.setTypeIfUnset(self.contextSym.getTypeSpecial(), self.contextSym.isAutogenerated)
+                contextSym.inFileOffset = self.inFileOffset + localOffset
+                if self.parent is not None:
+                    contextSym.parentFileName = self.parent.getName()
+
+            if isWordSized:
+                for word in self.words:
                     referencedSym = self.getSymbol(word, tryPlusOffset=False)
                     if referencedSym is not None:
                         referencedSym.referenceSymbols.add(self.contextSym)
@@ -521,12 +525,12 @@ class SymbolBase(common.ElementBase):
 
         return ""
 
-    def disassembleAsData(self, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> str:
-        output = self.contextSym.getReferenceeSymbols()
-        output += self.getPrevAlignDirective(0)
+    def disassembleAsDataTo(self, writer: TextIO, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> None:
+        writer.write(self.contextSym.getReferenceeSymbols())
+        writer.write(self.getPrevAlignDirective(0))
 
         symName = self.getName()
-        output += self.getSymbolAsmDeclaration(symName, useGlobalLabel)
+        writer.write(self.getSymbolAsmDeclaration(symName, useGlobalLabel))
 
         lastSymName = symName
 
@@ -572,23 +576,32 @@ class SymbolBase(common.ElementBase):
                 data, skip = self.getNthWord(i, isSplittedSymbol=isSplittedSymbol, canReferenceSymbolsWithAddends=canReferenceSymbolsWithAddends, canReferenceConstants=canReferenceConstants)
 
             if i != 0:
-                output += self.getPrevAlignDirective(i)
-            output += data
+                writer.write(self.getPrevAlignDirective(i))
+            writer.write(data)
             if common.GlobalConfig.EMIT_INLINE_RELOC:
                 relocInfo = self.getReloc(i*4, None)
-                output += self.relocToInlineStr(relocInfo, isSplittedSymbol)
-            output += self.getPostAlignDirective(i)
+                writer.write(self.relocToInlineStr(relocInfo, isSplittedSymbol))
+            writer.write(self.getPostAlignDirective(i))
 
             i += skip
             i += 1
 
-        output += self.getSizeDirective(lastSymName)
+        writer.write(self.getSizeDirective(lastSymName))
 
         nameEnd = self.getNameEnd()
         if nameEnd is not None:
-            output += self.getSymbolAsmDeclaration(nameEnd, useGlobalLabel)
+            writer.write(self.getSymbolAsmDeclaration(nameEnd, useGlobalLabel))
 
-        return output
+    def disassembleAsData(self, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> str:
+        writer = io.StringIO()
+        self.disassembleAsDataTo(writer, useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
+        return writer.getvalue()
+
+    def disassembleTo(self, writer: TextIO, migrate: bool=False, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> None:
+        self.disassembleAsDataTo(writer, useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
 
     def disassemble(self, migrate: bool=False, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> str:
-        return self.disassembleAsData(useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
+        "Wrapper around `disassembleTo`, subclasses should override that method instead"
+        writer = io.StringIO()
+        self.disassembleTo(writer, migrate=migrate, useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
+        return writer.getvalue()
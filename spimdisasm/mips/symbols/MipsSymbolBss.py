@@ -5,6 +5,9 @@
 
 from __future__ import annotations
 
+import io
+from typing import TextIO
+
 from ... import common
 
 from . import SymbolBase
@@ -34,19 +37,22 @@ class SymbolBss(SymbolBase):
                 else:
                     common.Utils.eprint(f"\n\n{warningMessage}\n")
 
-    def disassembleAsBss(self, useGlobalLabel: bool=True) -> str:
-        output = self.contextSym.getReferenceeSymbols()
-        output += self.getPrevAlignDirective(0)
+    def disassembleAsBssTo(self, writer: TextIO, useGlobalLabel: bool=True) -> None:
+        writer.write(self.contextSym.getReferenceeSymbols())
+        writer.write(self.getPrevAlignDirective(0))
 
-        output += self.getSymbolAsmDeclaration(self.getName(), useGlobalLabel)
-        output += self.generateAsmLineComment(0)
-        output += f" .space 0x{self.spaceSize:02X}{common.GlobalConfig.LINE_ENDS}"
+        writer.write(self.getSymbolAsmDeclaration(self.getName(), useGlobalLabel))
+        writer.write(self.generateAsmLineComment(0))
+        writer.write(f" .space 0x{self.spaceSize:02X}{common.GlobalConfig.LINE_ENDS}")
 
         nameEnd = self.getNameEnd()
         if nameEnd is not None:
-            output += self.getSymbolAsmDeclaration(nameEnd, useGlobalLabel)
+            writer.write(self.getSymbolAsmDeclaration(nameEnd, useGlobalLabel))
 
-        return output
+    def disassembleAsBss(self, useGlobalLabel: bool=True) -> str:
+        writer = io.StringIO()
+        self.disassembleAsBssTo(writer, useGlobalLabel=useGlobalLabel)
+        return writer.getvalue()
 
-    def disassemble(self, migrate: bool=False, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> str:
-        return self.disassembleAsBss()
+    def disassembleTo(self, writer: TextIO, migrate: bool=False, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> None:
+        self.disassembleAsBssTo(writer)
@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+from typing import TextIO
 import rabbitizer
 
 from ... import common
@@ -13,6 +14,13 @@ from . import SymbolText, analysis
 
 
 class SymbolFunction(SymbolText):
+    LOOK_AHEAD_MEMO_THRESHOLD: int = 0x10000
+    """Estimated amount of instructions walked by the look-ahead symbol finder above which the visited states are
+    remembered.
+
+    Tracking the registers state has a cost on every instruction, so it is only worth it for functions with many
+    branches into long paths."""
+
     def __init__(self, context: common.Context, vromStart: int, vromEnd: int, inFileOffset: int, vram: int, instrsList: list[rabbitizer.Instruction], segmentVromStart: int, overlayCategory: str|None):
         super().__init__(context, vromStart, vromEnd, inFileOffset, vram, list(), segmentVromStart, overlayCategory)
         self.instructions = list(instrsList)
@@ -20,6 +28,8 @@ class SymbolFunction(SymbolText):
         self.instrAnalyzer = analysis.InstrAnalyzer(self.vram, context)
 
         self.branchesTaken: set[int] = set()
+        self._lookAheadStates: set[tuple[int, tuple[int, ...], tuple[int, int]]] = set()
+        "States of the look-ahead symbol finder from which processing the rest of the path does not change the analysis"
 
         self.pointersOffsets: set[int] = set()
         self.pointersRemoved: bool = False
@@ -37,6 +47,29 @@ class SymbolFunction(SymbolText):
         return self.nInstr
 
 
+    def _estimateLookAheadWalk(self) -> int:
+        "Amount of instructions the look-ahead symbol finder would walk if every path was processed once"
+        nInstr = len(self.instructions)
+        if nInstr * nInstr <= self.LOOK_AHEAD_MEMO_THRESHOLD:
+            # Can't walk more than the whole function per instruction
+            return nInstr * nInstr
+
+        # Length of the path walked when starting at each instruction
+        pathLengths = [0] * (nInstr + 1)
+        walked = 0
+        for i in range(nInstr - 1, 0, -1):
+            prevInstr = self.instructions[i - 1]
+            if prevInstr.isUnconditionalBranch() or (prevInstr.isJump() and not prevInstr.doesLink()):
+                pathLengths[i] = 1
+            else:
+                pathLengths[i] = pathLengths[i + 1] + 1
+
+            if prevInstr.isBranch() or prevInstr.isUnconditionalBranch():
+                branch = i - 1 + prevInstr.getBranchOffsetGeneric() // 4
+                if 0 <= branch < nInstr:
+                    walked += pathLengths[branch] if branch >= i else nInstr - branch
+        return walked
+
     def _lookAheadSymbolFinder(self, instr: rabbitizer.Instruction, prevInstr: rabbitizer.Instruction, instructionOffset: int, trackedRegistersOriginal: rabbitizer.RegistersTracker):
         if not prevInstr.isBranch() and not prevInstr.isUnconditionalBranch():
             return
@@ -52,7 +85,12 @@ class SymbolFunction(SymbolText):
             # Avoid jumping outside of the function
             return
 
-        regsTracker = rabbitizer.RegistersTracker(trackedRegistersOriginal)
+        statefulTracker: analysis.StatefulRegistersTracker|None = None
+        if isinstance(trackedRegistersOriginal, analysis.StatefulRegistersTracker):
+            statefulTracker = analysis.StatefulRegistersTracker(trackedRegistersOriginal)
+            regsTracker: rabbitizer.RegistersTracker = statefulTracker
+        else:
+            regsTracker = rabbitizer.RegistersTracker(trackedRegistersOriginal)
 
         self.instrAnalyzer.processInstr(regsTracker, instr, instructionOffset, currentVram, None)
 
@@ -60,23 +98,43 @@ class SymbolFunction(SymbolText):
             return
         self.branchesTaken.add(instructionOffset)
 
+        visitedStates: list[tuple[int, tuple[int, ...], tuple[int, int]]] = []
         sizew = len(self.instructions)*4
         while branch < sizew:
+            if statefulTracker is not None:
+                stateKey = (branch, statefulTracker.getStateKey(), self.instrAnalyzer.getStateKey())
+                if stateKey in self._lookAheadStates:
+                    # The rest of this path has been processed already from this same state without changing anything
+                    break
+                visitedStates.append(stateKey)
+
             prevTargetInstr = self.instructions[branch//4 - 1]
             targetInstr = self.instructions[branch//4]
 
             self.instrAnalyzer.processInstr(regsTracker, targetInstr, branch, self.getVramOffset(branch), prevTargetInstr)
 
             if prevTargetInstr.isUnconditionalBranch():
-                return
+                break
             if prevTargetInstr.isJump() and not prevTargetInstr.doesLink():
-                return
+                break
 
             self.instrAnalyzer.processPrevFuncCall(regsTracker, targetInstr, prevTargetInstr)
             branch += 4
 
+        # Processing again the rest of the path from a visited state is only pointless if doing so did not change the
+        # analysis state, even if the registers state is the same
+        finalAnalysisState = self.instrAnalyzer.getStateKey()
+        for stateKey in visitedStates:
+            if stateKey[2] == finalAnalysisState:
+                self._lookAheadStates.add(stateKey)
+
     def _runInstructionAnalyzer(self):
-        regsTracker = rabbitizer.RegistersTracker()
+        regsTracker: rabbitizer.RegistersTracker
+        if analysis.StatefulRegistersTracker.isSupported() and self._estimateLookAheadWalk() > self.LOOK_AHEAD_MEMO_THRESHOLD:
+            # Remember the states visited by the look-ahead symbol finder to avoid walking the same paths again
+            regsTracker = analysis.StatefulRegistersTracker()
+        else:
+            regsTracker = rabbitizer.RegistersTracker()
 
         instructionOffset = 0
         for instr in self.instructions:
@@ -400,6 +458,7 @@ class SymbolFunction(SymbolText):
                 offset += 4
             return
 
+        self.context.stats.addCount("instructionsAnalyzed", len(self.instructions))
         self._runInstructionAnalyzer()
 
         self._postProcessGotAccesses()
@@ -731,28 +790,27 @@ class SymbolFunction(SymbolText):
             # don't emit the other instructions which are part of .cpload if the directive was emitted
         return output
 
-    def disassemble(self, migrate: bool=False, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> str:
-        output = ""
-
+    def disassembleTo(self, writer: TextIO, migrate: bool=False, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> None:
         if migrate:
-            output += self.getSpimdisasmVersionString()
+            writer.write(self.getSpimdisasmVersionString())
 
         if not common.GlobalConfig.DISASSEMBLE_UNKNOWN_INSTRUCTIONS:
             if self.hasUnimplementedIntrs:
-                return self.disassembleAsData(useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
+                self.disassembleAsDataTo(writer, useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
+                return
 
-        output += self.contextSym.getReferenceeSymbols()
+        writer.write(self.contextSym.getReferenceeSymbols())
 
         if self.isLikelyHandwritten:
             if not self.isRsp:
                 # RSP functions are always handwritten, so this is redundant
-                output += "# Handwritten function" + common.GlobalConfig.LINE_ENDS
+                writer.write("# Handwritten function" + common.GlobalConfig.LINE_ENDS)
 
         self._generateRelocsFromInstructionAnalyzer()
 
         symName = self.getName()
         symSize = self.contextSym.getSize()
-        output += self.getSymbolAsmDeclaration(symName, useGlobalLabel)
+        writer.write(self.getSymbolAsmDeclaration(symName, useGlobalLabel))
 
         wasLastInstABranch = False
         instructionOffset = 0
@@ -773,27 +831,25 @@ class SymbolFunction(SymbolText):
                 relocInfo = self.getReloc(instructionOffset, instr)
                 currentLine += self.relocToInlineStr(relocInfo, isSplittedSymbol=isSplittedSymbol)
 
-            output += currentLine
+            writer.write(currentLine)
 
             wasLastInstABranch = instr.hasDelaySlot()
             instructionOffset += 4
 
             if instructionOffset == symSize:
                 if common.GlobalConfig.ASM_TEXT_END_LABEL:
-                    output += f"{common.GlobalConfig.ASM_TEXT_END_LABEL} {self.getName()}" + common.GlobalConfig.LINE_ENDS
+                    writer.write(f"{common.GlobalConfig.ASM_TEXT_END_LABEL} {self.getName()}" + common.GlobalConfig.LINE_ENDS)
 
-                output += self.getSizeDirective(symName)
+                writer.write(self.getSizeDirective(symName))
 
         nameEnd = self.getNameEnd()
         if nameEnd is not None:
-            output += self.getSymbolAsmDeclaration(nameEnd, useGlobalLabel)
-
-        return output
+            writer.write(self.getSymbolAsmDeclaration(nameEnd, useGlobalLabel))
 
-    def disassembleAsData(self, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> str:
+    def disassembleAsDataTo(self, writer: TextIO, useGlobalLabel: bool=True, isSplittedSymbol: bool=False) -> None:
         self.words = []
         for i, instr in enumerate(self.instructions):
             if not instr.isImplemented() or not instr.isValid():
                 self.endOfLineComment[i] = " # invalid instruction"
             self.words.append(instr.getRaw())
-        return super().disassembleAsData(useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
+        super().disassembleAsDataTo(writer, useGlobalLabel=useGlobalLabel, isSplittedSymbol=isSplittedSymbol)
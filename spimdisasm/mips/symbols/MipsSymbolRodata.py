@@ -53,7 +53,7 @@ class SymbolRodata(SymbolBase):
             return True
 
         # This symbol could be an unreferenced non-const variable
-        if len(self.contextSym.referenceFunctions) == 1:
+        if self.contextSym.hasReferenceFunctions() and len(self.contextSym.referenceFunctions) == 1:
             # This const variable was already used in a function
             return False
 
@@ -124,6 +124,27 @@ class InstrAnalyzer:
         self.gpSets: dict[int, GpSetInfo] = dict()
         "Instructions setting the $gp register, key: offset of the low instruction"
 
+        self._offsetsFingerprint: int = 0
+        "Combined hash of every entry of the offset dictionaries which may be overwritten with a different value"
+        self._stateChanges: int = 0
+        "Number of changes to the rest of the state which is read while processing an instruction"
+
+    def getStateKey(self) -> tuple[int, int]:
+        """Summary of the analysis state which affects the outcome of processing an instruction.
+
+        Processing again an instruction with the same registers state and the same state key does not change the
+        analysis results."""
+        return (self._stateChanges, self._offsetsFingerprint)
+
+    def _setOffsetValue(self, offsetsDict: dict[int, int], offset: int, value: int) -> None:
+        oldValue = offsetsDict.get(offset, None)
+        if oldValue == value:
+            return
+        if oldValue is not None:
+            self._offsetsFingerprint ^= hash((id(offsetsDict), offset, oldValue))
+        self._offsetsFingerprint ^= hash((id(offsetsDict), offset, value))
+        offsetsDict[offset] = value
+
 
     def processBranch(self, instr: rabbitizer.Instruction, instrOffset: int, currentVram: int) -> None:
         if instrOffset in self.branchInstrOffsets:
@@ -152,7 +173,7 @@ class InstrAnalyzer:
 
         if not common.GlobalConfig.PIC:
             self.referencedVrams.add(target)
-        self.referencedVramsInstrOffset[instrOffset] = target
+        self._setOffsetValue(self.referencedVramsInstrOffset, instrOffset, target)
 
         self.funcCallInstrOffsets[instrOffset] = target
 
@@ -164,13 +185,13 @@ class InstrAnalyzer:
 
         self.referencedConstants.add(constant)
 
-        self.constantHiInstrOffset[luiOffset] = constant
-        self.constantLoInstrOffset[lowerOffset] = constant
-        self.constantInstrOffset[luiOffset] = constant
-        self.constantInstrOffset[lowerOffset] = constant
+        self._setOffsetValue(self.constantHiInstrOffset, luiOffset, constant)
+        self._setOffsetValue(self.constantLoInstrOffset, lowerOffset, constant)
+        self._setOffsetValue(self.constantInstrOffset, luiOffset, constant)
+        self._setOffsetValue(self.constantInstrOffset, lowerOffset, constant)
 
-        self.hiToLowDict[luiOffset] = lowerOffset
-        self.lowToHiDict[lowerOffset] = luiOffset
+        self._setOffsetValue(self.hiToLowDict, luiOffset, lowerOffset)
+        self._setOffsetValue(self.lowToHiDict, lowerOffset, luiOffset)
 
         regsTracker.processConstant(lowerInstr, constant, lowerOffset)
 
@@ -182,6 +203,7 @@ class InstrAnalyzer:
         assert (hiValue is None and luiOffset is None) or (hiValue is not None and luiOffset is not None)
 
         lowerHalf = lowerInstr.getProcessedImmediate()
+        config = common.getActiveGlobalConfig()
 
         if lowerOffset in self.symbolLoInstrOffset:
             # This %lo has been processed already
@@ -195,11 +217,11 @@ class InstrAnalyzer:
                         if hiValue != otherLuiInstr.getProcessedImmediate() << 16:
                             return None
 
-            if common.GlobalConfig.COMPILER == common.Compiler.IDO:
+            if config.COMPILER == common.Compiler.IDO:
                 # IDO does not pair multiples %hi to the same %lo
                 return self.symbolLoInstrOffset[lowerOffset]
 
-            elif common.GlobalConfig.COMPILER in {common.Compiler.GCC, common.Compiler.SN64, common.Compiler.PSYQ, common.Compiler.EGCS}:
+            elif config.COMPILER in {common.Compiler.GCC, common.Compiler.SN64, common.Compiler.PSYQ, common.Compiler.EGCS}:
                 if luiOffset is None or hiValue is None:
                     return None
 
@@ -228,69 +250,72 @@ class InstrAnalyzer:
                     else:
                         return self.symbolLoInstrOffset[lowerOffset]
 
-        if hiValue is None and common.GlobalConfig.GP_VALUE is None:
+        if hiValue is None and config.GP_VALUE is None:
             # Trying to pair a gp relative offset, but we don't know the gp address
             return None
 
         if hiValue is not None:
             upperHalf = hiValue
         else:
-            assert common.GlobalConfig.GP_VALUE is not None
-            upperHalf = common.GlobalConfig.GP_VALUE
+            assert config.GP_VALUE is not None
+            upperHalf = config.GP_VALUE
 
         return upperHalf + lowerHalf
 
 
     def processSymbol(self, address: int, luiOffset: int|None, lowerInstr: rabbitizer.Instruction, lowerOffset: int) -> int|None:
+        # Called for every paired instruction, avoid going through `GlobalConfig` on each access
+        config = common.getActiveGlobalConfig()
+
         if address <= 0:
             # PS2 seems to do LUI/ADDIU pairs for 0 and -1 for some reason, filter them out
-            if not common.GlobalConfig.PIC:
+            if not config.PIC:
                 return None
 
         # filter out stuff that may not be a real symbol
         filterOut = False
         if not self.context.totalVramRange.isInRange(address):
-            if common.GlobalConfig.SYMBOL_FINDER_FILTER_LOW_ADDRESSES or common.GlobalConfig.SYMBOL_FINDER_FILTER_HIGH_ADDRESSES:
-                filterOut |= common.GlobalConfig.SYMBOL_FINDER_FILTER_LOW_ADDRESSES and address < common.GlobalConfig.SYMBOL_FINDER_FILTER_ADDRESSES_ADDR_LOW
-                filterOut |= common.GlobalConfig.SYMBOL_FINDER_FILTER_HIGH_ADDRESSES and address >= common.GlobalConfig.SYMBOL_FINDER_FILTER_ADDRESSES_ADDR_HIGH
+            if config.SYMBOL_FINDER_FILTER_LOW_ADDRESSES or config.SYMBOL_FINDER_FILTER_HIGH_ADDRESSES:
+                filterOut |= config.SYMBOL_FINDER_FILTER_LOW_ADDRESSES and address < config.SYMBOL_FINDER_FILTER_ADDRESSES_ADDR_LOW
+                filterOut |= config.SYMBOL_FINDER_FILTER_HIGH_ADDRESSES and address >= config.SYMBOL_FINDER_FILTER_ADDRESSES_ADDR_HIGH
             else:
                 filterOut |= True
 
         if address > 0 and filterOut and lowerInstr.uniqueId != rabbitizer.InstrId.cpu_addiu:
-            if common.GlobalConfig.SYMBOL_FINDER_FILTERED_ADDRESSES_AS_CONSTANTS:
+            if config.SYMBOL_FINDER_FILTERED_ADDRESSES_AS_CONSTANTS:
                 # Let's pretend this value is a constant
                 constant = address
                 self.referencedConstants.add(constant)
 
-                self.constantLoInstrOffset[lowerOffset] = constant
-                self.constantInstrOffset[lowerOffset] = constant
+                self._setOffsetValue(self.constantLoInstrOffset, lowerOffset, constant)
+                self._setOffsetValue(self.constantInstrOffset, lowerOffset, constant)
                 if luiOffset is not None:
-                    self.constantHiInstrOffset[luiOffset] = constant
-                    self.constantInstrOffset[luiOffset] = constant
+                    self._setOffsetValue(self.constantHiInstrOffset, luiOffset, constant)
+                    self._setOffsetValue(self.constantInstrOffset, luiOffset, constant)
 
-                    self.hiToLowDict[luiOffset] = lowerOffset
-                    self.lowToHiDict[lowerOffset] = luiOffset
+                    self._setOffsetValue(self.hiToLowDict, luiOffset, lowerOffset)
+                    self._setOffsetValue(self.lowToHiDict, lowerOffset, luiOffset)
             return None
 
-        if not common.GlobalConfig.PIC:
+        if not config.PIC:
             self.referencedVrams.add(address)
 
         if lowerOffset not in self.symbolLoInstrOffset:
-            self.symbolLoInstrOffset[lowerOffset] = address
-            self.symbolInstrOffset[lowerOffset] = address
-            self.referencedVramsInstrOffset[lowerOffset] = address
+            self._setOffsetValue(self.symbolLoInstrOffset, lowerOffset, address)
+            self._setOffsetValue(self.symbolInstrOffset, lowerOffset, address)
+            self._setOffsetValue(self.referencedVramsInstrOffset, lowerOffset, address)
         if luiOffset is not None:
             if luiOffset not in self.symbolHiInstrOffset:
                 self.symbolHiInstrOffset[luiOffset] = address
-                self.symbolInstrOffset[luiOffset] = address
-                self.referencedVramsInstrOffset[luiOffset] = address
+                self._setOffsetValue(self.symbolInstrOffset, luiOffset, address)
+                self._setOffsetValue(self.referencedVramsInstrOffset, luiOffset, address)
 
-            self.hiToLowDict[luiOffset] = lowerOffset
-            self.lowToHiDict[lowerOffset] = luiOffset
+            self._setOffsetValue(self.hiToLowDict, luiOffset, lowerOffset)
+            self._setOffsetValue(self.lowToHiDict, lowerOffset, luiOffset)
         else:
-            self.symbolGpInstrOffset[lowerOffset] = address
-            self.symbolInstrOffset[lowerOffset] = address
-            self.referencedVramsInstrOffset[lowerOffset] = address
+            self._setOffsetValue(self.symbolGpInstrOffset, lowerOffset, address)
+            self._setOffsetValue(self.symbolInstrOffset, lowerOffset, address)
+            self._setOffsetValue(self.referencedVramsInstrOffset, lowerOffset, address)
 
         self.processSymbolType(address, lowerInstr, lowerOffset)
 
@@ -300,7 +325,7 @@ class InstrAnalyzer:
         if address <= 0:
             return
 
-        self.gotAccessAddresses[instrOffset] = address
+        self._setOffsetValue(self.gotAccessAddresses, instrOffset, address)
         return
 
     def processSymbolType(self, address: int, instr: rabbitizer.Instruction, instrOffset: int) -> None:
@@ -359,6 +384,7 @@ class InstrAnalyzer:
         if not pairingInfo.shouldProcess:
             if regsTracker.hasLoButNoHi(instr):
                 self.nonLoInstrOffsets.add(instrOffset)
+                self._stateChanges += 1
             return
 
         if pairingInfo.isGpGot and not common.GlobalConfig.PIC:
@@ -377,10 +403,12 @@ class InstrAnalyzer:
                     if common.GlobalConfig.PIC:
                         # cpload
                         self.unpairedCploads.append(CploadInfo(luiOffset, instrOffset))
+                        self._stateChanges += 1
                     else:
                         hiGpValue = luiInstr.getProcessedImmediate() << 16
                         loGpValue = instr.getProcessedImmediate()
                         self.gpSets[instrOffset] = GpSetInfo(luiOffset, instrOffset, hiGpValue+loGpValue)
+                        self._stateChanges += 1
                         self.gpSetsOffsets.add(luiOffset)
                         self.gpSetsOffsets.add(instrOffset)
                     # early return to avoid counting this pairing as a normal symbol
@@ -406,8 +434,8 @@ class InstrAnalyzer:
         if jrInfo is not None:
             offset, address = jrInfo
 
-            self.referencedJumpTableOffsets[offset] = address
-            self.jumpRegisterIntrOffset[instrOffset] = address
+            self._setOffsetValue(self.referencedJumpTableOffsets, offset, address)
+            self._setOffsetValue(self.jumpRegisterIntrOffset, instrOffset, address)
             if not common.GlobalConfig.PIC:
                 self.referencedVrams.add(address)
 
@@ -416,8 +444,8 @@ class InstrAnalyzer:
         if jrInfo is not None:
             offset, address = jrInfo
 
-            self.indirectFunctionCallOffsets[offset] = address
-            self.indirectFunctionCallIntrOffset[instrOffset] = address
+            self._setOffsetValue(self.indirectFunctionCallOffsets, offset, address)
+            self._setOffsetValue(self.indirectFunctionCallIntrOffset, instrOffset, address)
             if not common.GlobalConfig.PIC:
                 self.referencedVrams.add(address)
 
@@ -445,6 +473,7 @@ class InstrAnalyzer:
             if len(self.unpairedCploads) > 0:
                 if instr.rd in {rabbitizer.RegGprO32.gp, rabbitizer.RegGprN32.gp} and instr.rs in {rabbitizer.RegGprO32.gp, rabbitizer.RegGprN32.gp}:
                     cpload = self.unpairedCploads.pop()
+                    self._stateChanges += 1
                     cpload.adduOffset = instrOffset
                     cpload.reg = instr.rt
                     self.cploadOffsets.add(cpload.hiOffset)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: © 2024 Decompollaborate
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import rabbitizer
+
+
+# Fields of each tracked register state, in the same order as rabbitizer's `TrackedRegisterState`
+_HAS_LUI_VALUE = 0
+_LUI_OFFSET = 1
+_LUI_SET_ON_BRANCH_LIKELY = 2
+_HAS_GP_GOT = 3
+_GP_GOT_OFFSET = 4
+_HAS_LO_VALUE = 5
+_LO_OFFSET = 6
+_DEREFERENCED = 7
+_DEREFERENCE_OFFSET = 8
+_CHECKED_FOR_BRANCHING = 9
+_LAST_BRANCH_OFFSET = 10
+_VALUE = 11
+
+_MIRRORED_RABBITIZER_VERSION = (1, 16)
+"Version of rabbitizer whose `RegistersTracker` implementation is mirrored here"
+
+_EMPTY_STATE = (False, 0, False, False, 0, False, 0, False, 0, False, 0, 0)
+
+_GP_REGISTER = 28
+_CLOBBERED_BY_FUNC_CALL = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 24, 25, 31)
+"Same registers for every ABI supported by rabbitizer"
+
+_MOVE_TO_COPROCESSOR_1 = {rabbitizer.InstrId.cpu_mtc1, rabbitizer.InstrId.cpu_dmtc1, rabbitizer.InstrId.cpu_ctc1}
+
+
+class StatefulRegistersTracker(rabbitizer.RegistersTracker):
+    """A `rabbitizer.RegistersTracker` which can be compared against other trackers.
+
+    `rabbitizer.RegistersTracker` does not expose the state of its registers, so every method that changes it is
+    mirrored here on a Python copy of that state, following rabbitizer's own implementation. `getStateKey` returns a
+    hashable summary of the whole state, two trackers with the same key behave the same way from then on.
+
+    Other rabbitizer versions may track the registers differently, check `isSupported` before relying on the keys.
+    `benchmarks/lookAheadMemoCheck.py` checks the keys against rabbitizer's results and must be run again when
+    updating the mirrored version.
+    """
+
+    @staticmethod
+    def isSupported() -> bool:
+        "Whether the installed rabbitizer is the version whose implementation is mirrored by this class"
+        versionInfo = getattr(rabbitizer, "__version_info__", (0, 0, 0))
+        return tuple(versionInfo[:2]) == _MIRRORED_RABBITIZER_VERSION
+
+    def __init__(self, other: StatefulRegistersTracker|None=None):
+        super().__init__(other)
+        if other is None:
+            self._internedStates: dict[tuple, int] = {_EMPTY_STATE: 0}
+            self._states: list[list] = [list(_EMPTY_STATE) for _ in range(32)]
+            self._stateIds: list[int] = [0] * 32
+        else:
+            # The interning table is shared so the keys of related trackers can be compared
+            self._internedStates = other._internedStates
+            self._states = [list(state) for state in other._states]
+            self._stateIds = list(other._stateIds)
+
+    def getStateKey(self) -> tuple[int, ...]:
+        return tuple(self._stateIds)
+
+    def _updated(self, reg: int) -> None:
+        state = tuple(self._states[reg])
+        stateId = self._internedStates.get(state)
+        if stateId is None:
+            stateId = len(self._internedStates)
+            self._internedStates[state] = stateId
+        self._stateIds[reg] = stateId
+
+
+    @staticmethod
+    def _clear(state: list) -> None:
+        state[:] = _EMPTY_STATE
+
+    @staticmethod
+    def _clearHi(state: list) -> None:
+        state[_HAS_LUI_VALUE] = False
+        state[_LUI_OFFSET] = 0
+        state[_LUI_SET_ON_BRANCH_LIKELY] = False
+
+    @staticmethod
+    def _clearGp(state: list) -> None:
+        state[_HAS_GP_GOT] = False
+        state[_GP_GOT_OFFSET] = 0
+
+    @staticmethod
+    def _clearLo(state: list) -> None:
+        state[_HAS_LO_VALUE] = False
+        state[_LO_OFFSET] = 0
+        state[_DEREFERENCED] = False
+        state[_DEREFERENCE_OFFSET] = 0
+
+    @staticmethod
+    def _clearBranch(state: list) -> None:
+        state[_CHECKED_FOR_BRANCHING] = False
+        state[_LAST_BRANCH_OFFSET] = 0
+
+    @staticmethod
+    def _setLo(state: list, value: int, offset: int) -> None:
+        state[_VALUE] = value & 0xFFFFFFFF
+        state[_LO_OFFSET] = offset
+        state[_HAS_LO_VALUE] = True
+        state[_DEREFERENCED] = False
+        state[_DEREFERENCE_OFFSET] = 0
+
+    @staticmethod
+    def _deref(state: list, offset: int) -> None:
+        state[_DEREFERENCED] = True
+        state[_DEREFERENCE_OFFSET] = offset
+
+    @staticmethod
+    def _hasAnyValue(state: list) -> bool:
+        return state[_HAS_LUI_VALUE] or state[_HAS_LO_VALUE] or state[_HAS_GP_GOT]
+
+    def _simulateDereference(self, instr: rabbitizer.Instruction, instrOffset: int, rs: int) -> None:
+        if instr.modifiesRt() and instr.doesDereference():
+            state = self._states[rs]
+            if state[_HAS_LO_VALUE] and not state[_DEREFERENCED]:
+                rt = (instr.getRaw() >> 16) & 0x1F
+                dstState = self._states[rt]
+                dstState[:] = state
+                self._deref(dstState, instrOffset)
+                self._clearBranch(dstState)
+                self._updated(rt)
+
+    def _mirrorMoveRegisters(self, instr: rabbitizer.Instruction) -> bool:
+        if not instr.maybeIsMove():
+            return False
+
+        word = instr.getRaw()
+        rs = (word >> 21) & 0x1F
+        rt = (word >> 16) & 0x1F
+        rd = (word >> 11) & 0x1F
+        states = self._states
+
+        if rt == 0 and rs == 0:
+            return False
+
+        if rt == 0:
+            reg = rs
+        elif rs == 0:
+            reg = rt
+        else:
+            if self._hasAnyValue(states[rs]) and not self._hasAnyValue(states[rt]):
+                reg = rs
+            elif self._hasAnyValue(states[rt]) and not self._hasAnyValue(states[rs]):
+                reg = rt
+            elif rd == rs:
+                reg = rt
+                if states[rs][_HAS_LUI_VALUE] or states[rs][_HAS_GP_GOT]:
+                    reg = rs
+            elif rd == rt:
+                reg = rs
+                if states[rt][_HAS_LUI_VALUE] or states[rt][_HAS_GP_GOT]:
+                    reg = rt
+            else:
+                return False
+
+            states[rd][:] = states[reg]
+            self._clearBranch(states[rd])
+            self._updated(rd)
+            return True
+
+        if self._hasAnyValue(states[reg]):
+            states[rd][:] = states[reg]
+            self._clearBranch(states[rd])
+            self._updated(rd)
+            return True
+
+        self._clear(states[rd])
+        self._updated(rd)
+        return False
+
+
+    def moveRegisters(self, instr: rabbitizer.Instruction) -> bool:
+        result = super().moveRegisters(instr)
+        self._mirrorMoveRegisters(instr)
+        return result
+
+    def overwriteRegisters(self, instr: rabbitizer.Instruction, instructionOffset: int) -> None:
+        super().overwriteRegisters(instr, instructionOffset)
+
+        if self._mirrorMoveRegisters(instr):
+            return
+
+        word = instr.getRaw()
+        shouldRemove = False
+        reg = 0
+
+        if instr.isFloat() and instr.uniqueId in _MOVE_TO_COPROCESSOR_1:
+            shouldRemove = True
+            reg = (word >> 16) & 0x1F
+
+        if instr.modifiesRt():
+            shouldRemove = True
+            reg = (word >> 16) & 0x1F
+            if instr.canBeHi():
+                self._clearLo(self._states[reg])
+                self._updated(reg)
+                shouldRemove = False
+        if instr.modifiesRd():
+            shouldRemove = True
+            reg = (word >> 11) & 0x1F
+
+        if shouldRemove:
+            state = self._states[reg]
+            self._clearHi(state)
+            if state[_LO_OFFSET] != instructionOffset and state[_DEREFERENCE_OFFSET] != instructionOffset:
+                self._clearGp(state)
+                self._clearLo(state)
+            self._clearBranch(state)
+            self._updated(reg)
+
+    def unsetRegistersAfterFuncCall(self, instr: rabbitizer.Instruction, prevInstr: rabbitizer.Instruction) -> None:
+        super().unsetRegistersAfterFuncCall(instr, prevInstr)
+
+        if not prevInstr.isFunctionCall():
+            return
+        for reg in _CLOBBERED_BY_FUNC_CALL:
+            self._clear(self._states[reg])
+            self._updated(reg)
+
+    def processLui(self, instr: rabbitizer.Instruction, instrOffset: int, prevInstr: rabbitizer.Instruction|None=None) -> None:
+        super().processLui(instr, instrOffset, prevInstr)
+
+        rt = (instr.getRaw() >> 16) & 0x1F
+        state = self._states[rt]
+        self._clear(state)
+        state[_HAS_LUI_VALUE] = True
+        state[_LUI_OFFSET] = instrOffset
+        state[_VALUE] = (instr.getProcessedImmediate() << 16) & 0xFFFFFFFF
+        if prevInstr is not None:
+            state[_LUI_SET_ON_BRANCH_LIKELY] = prevInstr.isBranchLikely() or prevInstr.isUnconditionalBranch()
+        self._updated(rt)
+
+    def processGpLoad(self, instr: rabbitizer.Instruction, instrOffset: int) -> None:
+        super().processGpLoad(instr, instrOffset)
+
+        rt = (instr.getRaw() >> 16) & 0x1F
+        state = self._states[rt]
+        self._clear(state)
+        state[_HAS_GP_GOT] = True
+        state[_GP_GOT_OFFSET] = instrOffset
+        state[_VALUE] = instr.getProcessedImmediate() & 0xFFFFFFFF
+        self._updated(rt)
+
+    def processConstant(self, instr: rabbitizer.Instruction, value: int, offset: int) -> None:
+        super().processConstant(instr, value, offset)
+
+        rt = (instr.getRaw() >> 16) & 0x1F
+        self._setLo(self._states[rt], value, offset)
+        self._updated(rt)
+
+    def getLuiOffsetForLo(self, instr: rabbitizer.Instruction, instrOffset: int) -> tuple[int, bool, bool]:
+        result = super().getLuiOffsetForLo(instr, instrOffset)
+
+        rs = (instr.getRaw() >> 21) & 0x1F
+        state = self._states[rs]
+        if state[_HAS_LUI_VALUE] and not state[_LUI_SET_ON_BRANCH_LIKELY]:
+            return result
+        if rs == _GP_REGISTER:
+            return result
+        self._simulateDereference(instr, instrOffset, rs)
+        return result
+
+    def preprocessLoAndGetInfo(self, instr: rabbitizer.Instruction, instrOffset: int) -> rabbitizer.LoPairingInfo.LoPairingInfo:
+        result = super().preprocessLoAndGetInfo(instr, instrOffset)
+
+        rs = (instr.getRaw() >> 21) & 0x1F
+        state = self._states[rs]
+        if state[_CHECKED_FOR_BRANCHING]:
+            return result
+        if state[_HAS_LUI_VALUE] and not state[_LUI_SET_ON_BRANCH_LIKELY]:
+            return result
+        if rs == _GP_REGISTER:
+            return result
+        if state[_HAS_GP_GOT]:
+            return result
+        self._simulateDereference(instr, instrOffset, rs)
+        return result
+
+    def processLo(self, instr: rabbitizer.Instruction, value: int, offset: int) -> None:
+        super().processLo(instr, value, offset)
+
+        if not instr.modifiesRt():
+            return
+
+        word = instr.getRaw()
+        rs = (word >> 21) & 0x1F
+        rt = (word >> 16) & 0x1F
+        state = self._states[rt]
+        self._setLo(state, value, offset)
+        if instr.doesDereference():
+            self._deref(state, offset)
+        if rt == rs:
+            self._clearHi(state)
+            self._clearGp(state)
+        self._clearBranch(state)
+        self._updated(rt)
+
+    def processBranch(self, instr: rabbitizer.Instruction, instrOffset: int) -> None:
+        super().processBranch(instr, instrOffset)
+
+        if not instr.isBranch() and not instr.isUnconditionalBranch():
+            return
+
+        word = instr.getRaw()
+        registers: list[int] = []
+        if instr.readsRs():
+            registers.append((word >> 21) & 0x1F)
+        if instr.readsRt():
+            registers.append((word >> 16) & 0x1F)
+        if instr.readsRd():
+            registers.append((word >> 11) & 0x1F)
+        for reg in registers:
+            state = self._states[reg]
+            state[_CHECKED_FOR_BRANCHING] = True
+            state[_LAST_BRANCH_OFFSET] = instrOffset
+            self._updated(reg)
@@ -75,7 +75,7 @@ def processArguments(args: argparse.Namespace) -> int:
     applyGlobalConfigurations()
 
     binaryPath = Path(args.binary)
-    array_of_bytes = common.Utils.readFileAsBytearray(binaryPath)
+    array_of_bytes = common.Utils.readFileAsMemoryView(binaryPath)
     inputName = binaryPath.stem
 
     start = int(args.start, 16)
@@ -99,6 +99,11 @@ def processArguments(args: argparse.Namespace) -> int:
         contextPath.parent.mkdir(parents=True, exist_ok=True)
         context.saveContextToFile(contextPath)
 
+    if args.save_context_binary is not None:
+        binaryContextPath = Path(args.save_context_binary)
+        binaryContextPath.parent.mkdir(parents=True, exist_ok=True)
+        context.saveContextToBinaryFile(binaryContextPath)
+
     return 0
 
 def addSubparser(subparser: argparse._SubParsersAction[argparse.ArgumentParser]):
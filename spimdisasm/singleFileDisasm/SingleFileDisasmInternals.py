@@ -51,6 +51,10 @@ def addOptionsToParser(parser: argparse.ArgumentParser) -> argparse.ArgumentPars
 
     parser.add_argument("--function-info", help="Specifies a path where to output a csvs sumary file of every analyzed function", metavar="PATH")
 
+    parser.add_argument("--incremental-cache", help="Enables skipping the whole run when nothing changed since the previous one, using the given directory to store the cache. Nothing is analyzed nor written if the input binary, every file read into the context and every other option are the same as in the previous run and every file it generated still exists. Otherwise every section is analyzed and written again. Can't be used when printing to stdout", metavar="PATH")
+    parser.add_argument("--stats", help="Write a json report to the given path when the run finishes, containing the time spent on each phase and section and internal counters (symbol lookups and misses per segment, added symbols, analyzed instructions, emitted bytes)", metavar="PATH")
+    parser.add_argument("--timings", help="Print the time spent on each phase to stderr when the run finishes", action="store_true")
+
 
     common.Context.addParametersToArgParse(parser)
 
@@ -140,10 +144,19 @@ def processArguments(args: argparse.Namespace) -> int:
     applyGlobalConfigurations()
 
     context = common.Context()
+    context.stats.startPhase("load_context")
     context.parseArgs(args)
 
+    with context.activate():
+        try:
+            return processFile(args, context)
+        finally:
+            fec.FrontendUtilities.reportStats(context, args.binary, args.stats, args.timings)
+
+def processFile(args: argparse.Namespace, context: common.Context) -> int:
+    context.stats.startPhase("read")
     inputPath = Path(args.binary)
-    array_of_bytes = common.Utils.readFileAsBytearray(inputPath)
+    array_of_bytes = common.Utils.readFileAsMemoryView(inputPath)
 
     fileSplitsPath = None
     if args.file_splits is not None:
@@ -174,29 +187,61 @@ def processArguments(args: argparse.Namespace) -> int:
 
     progressCallback: fec.FrontendUtilities.ProgressCallbackType
 
+    incrementalCache: fec.IncrementalCache|None = None
+    if args.incremental_cache is not None:
+        if str(textOutput) == "-" or str(dataOutput) == "-":
+            common.Utils.eprint("Warning: --incremental-cache can't be used when printing to stdout. Ignoring it")
+        else:
+            incrementalCache = fec.IncrementalCache(Path(args.incremental_cache), args, {"incremental_cache", "verbose", "quiet", "stats", "timings"})
+            incrementalCache.computeInputDigest(processedFiles, processedFilesOutputPaths, context, Path(args.binary))
+            if incrementalCache.isUpToDate():
+                common.Utils.printQuietless("Nothing changed since the previous run")
+                return 0
+
+    context.stats.startPhase("analyze")
     progressCallback = fec.FrontendUtilities.progressCallback_analyzeProcessedFiles
     fec.FrontendUtilities.analyzeProcessedFiles(processedFiles, processedFilesOutputPaths, processedFilesCount, progressCallback)
 
     if args.nuke_pointers:
+        context.stats.startPhase("nuke_pointers")
         common.Utils.printVerbose("Nuking pointers...")
         progressCallback = fec.FrontendUtilities.progressCallback_nukePointers
         fec.FrontendUtilities.nukePointers(processedFiles, processedFilesOutputPaths, processedFilesCount, progressCallback)
 
+    context.stats.startPhase("write")
     progressCallback = fec.FrontendUtilities.progressCallback_writeProcessedFiles
     fec.FrontendUtilities.writeProcessedFiles(processedFiles, processedFilesOutputPaths, processedFilesCount, progressCallback)
 
     if args.split_functions is not None:
+        context.stats.startPhase("migrate")
         common.Utils.printVerbose("\nSpliting functions...")
         progressCallback = fec.FrontendUtilities.progressCallback_migrateFunctions
         fec.FrontendUtilities.migrateFunctions(processedFiles, Path(args.split_functions), progressCallback)
 
+    # Files generated besides the sections, recorded by the incremental cache
+    otherOutputs: list[Path] = []
+    if args.split_functions is not None:
+        otherOutputs.append(Path(args.split_functions))
+
+    context.stats.startPhase("save_context")
     if args.save_context is not None:
         contextPath = Path(args.save_context)
         contextPath.parent.mkdir(parents=True, exist_ok=True)
-        context.saveContextToFile(contextPath)
+        otherOutputs.extend(context.saveContextToFile(contextPath))
+
+    if args.save_context_binary is not None:
+        binaryContextPath = Path(args.save_context_binary)
+        binaryContextPath.parent.mkdir(parents=True, exist_ok=True)
+        context.saveContextToBinaryFile(binaryContextPath)
+        otherOutputs.append(binaryContextPath)
 
+    context.stats.startPhase("function_info")
     if args.function_info is not None:
         fec.FrontendUtilities.writeFunctionInfoCsv(processedFiles, Path(args.function_info))
+        otherOutputs.append(Path(args.function_info))
+
+    if incrementalCache is not None:
+        incrementalCache.saveManifest(processedFiles, processedFilesOutputPaths, otherOutputs)
 
     common.Utils.printQuietless(500*" " + "\r", end="")
     common.Utils.printQuietless(f"Done: {args.binary}")